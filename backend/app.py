@@ -1,21 +1,30 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, has_app_context, make_response
 from flask_cors import CORS
 try:
     import orjson
     from flask.json.provider import JSONProvider
     class ORJSONProvider(JSONProvider):
+        # Fechas de MySQL (UTC sin zona) como '2024-01-01T00:00:00Z' en la misma pasada
+        OPCIONES = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z | orjson.OPT_OMIT_MICROSECONDS
+        def dumps_bytes(self, obj):
+            return orjson.dumps(obj, default=_json_default, option=self.OPCIONES)
         def dumps(self, obj, **kwargs):
-            return orjson.dumps(obj).decode()
+            return self.dumps_bytes(obj).decode()
         def loads(self, s: str | bytes):
             return orjson.loads(s)
+        def response(self, *args, **kwargs):
+            # Bytes de orjson directos al cuerpo, sin decodificar y volver a codificar
+            obj = self._prepare_response_obj(args, kwargs)
+            return self._app.response_class(self.dumps_bytes(obj), mimetype='application/json')
     _USE_ORJSON = True
 except Exception:
     _USE_ORJSON = False
 from flask_compress import Compress
+from flask.json.provider import DefaultJSONProvider
 import os
 import requests
 import json
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 import base64
 from dotenv import load_dotenv
 import time
@@ -24,6 +33,16 @@ from mysql.connector import pooling as mysql_pooling
 import re
 import bcrypt
 import logging
+import contextvars
+import decimal
+import functools
+import hashlib
+import queue
+import random
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 # Cargar variables de entorno
 # Nota: se usará el archivo .env creado por los scripts de inicio (local o nube)
@@ -40,10 +59,25 @@ else:
     load_dotenv()
     print("✅ Cargando configuración desde .env o variables de entorno")
 
+def _json_default(obj):
+    """Tipos que orjson no serializa; en el proveedor de respaldo, también las fechas."""
+    if isinstance(obj, datetime):
+        return obj.strftime('%Y-%m-%dT%H:%M:%SZ')
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)  # como el proveedor por defecto de Flask
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    raise TypeError(f"Objeto de tipo {type(obj).__name__} no serializable a JSON")
+
+class _JSONProviderRespaldo(DefaultJSONProvider):
+    """Sin orjson: mismo formato de fechas que ORJSONProvider."""
+    default = staticmethod(_json_default)
+    def dumps_bytes(self, obj):
+        return self.dumps(obj).encode('utf-8')
+
 app = Flask(__name__)
 Compress(app)
-if _USE_ORJSON:
-    app.json = ORJSONProvider(app)
+app.json = ORJSONProvider(app) if _USE_ORJSON else _JSONProviderRespaldo(app)
 
 # Detección de entorno (automática con override por ENV)
 def _detect_env():
@@ -64,22 +98,6 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 logger.info(f"[BOOT] Entorno: {ENV} - LogLevel: {logging.getLevelName(level)}")
 
-# Idempotencia simple en memoria para evitar dobles envíos rápidos
-_recent_request_signatures = {}
-_RECENT_REQ_TTL_SECONDS = 5
-
-def _is_duplicate_request(signature_key: str) -> bool:
-    now = time.time()
-    # Limpiar entradas viejas
-    expired_keys = [k for k, ts in _recent_request_signatures.items() if now - ts > _RECENT_REQ_TTL_SECONDS]
-    for k in expired_keys:
-        _recent_request_signatures.pop(k, None)
-    # Checar duplicado
-    if signature_key in _recent_request_signatures and now - _recent_request_signatures[signature_key] <= _RECENT_REQ_TTL_SECONDS:
-        return True
-    _recent_request_signatures[signature_key] = now
-    return False
-
 # Configuraciones de optimización para producción
 app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 300  # Cache estático por 5 minutos
 app.config['TEMPLATES_AUTO_RELOAD'] = False
@@ -90,7 +108,8 @@ CORS(app, resources={
     r"/*": {
         "origins": "*",
         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"],
+        "allow_headers": ["Content-Type", "Authorization", "Idempotency-Key", "X-Primario-Hasta"],
+        "expose_headers": ["ETag", "X-Sync-Token", "X-Primario-Hasta"],
         "max_age": 86400  # Cache preflight por 24 horas
     }
 })
@@ -101,10 +120,14 @@ def add_performance_headers(response):
     """Agregar headers de optimización a todas las respuestas"""
     # Evitar cache para endpoints de API dinámicos
     path = request.path or ''
-    if path.startswith(('/areas', '/tareas', '/dashboard', '/grupos', '/usuarios', '/notificaciones', '/invitaciones', '/login', '/task-notes', '/task-evidence')):
-        response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
-        response.headers['Pragma'] = 'no-cache'
-        response.headers['Expires'] = '0'
+    if path.startswith(('/areas', '/tareas', '/dashboard', '/grupos', '/usuarios', '/notificaciones', '/invitaciones', '/login', '/task-notes', '/task-evidence', '/debug', '/sync', '/bootstrap')):
+        if response.headers.get('ETag'):
+            # Con ETag: el navegador guarda la respuesta pero revalida siempre (If-None-Match -> 304)
+            response.headers['Cache-Control'] = 'private, no-cache'
+        else:
+            response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
+            response.headers['Pragma'] = 'no-cache'
+            response.headers['Expires'] = '0'
     else:
         # Permitir cache ligero solo para otros recursos/healthchecks
         response.headers['Cache-Control'] = 'public, max-age=300'
@@ -116,6 +139,13 @@ def add_performance_headers(response):
 # Almacenamiento temporal de tokens (en producción usar base de datos)
 tokens = {}
 db_pool = None
+db_pool_replica = None
+_db_pool_lock = threading.Lock()
+
+# Expresiones de rutas calientes, compiladas una vez al importar
+_RE_FECHA_MINUTOS = re.compile(r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}$')
+_RE_FECHA_SEGUNDOS = re.compile(r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$')
+_RE_CORREO = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
 
 # Utilidad: normalizar strings de fecha de vencimiento a UTC 'YYYY-MM-DD HH:MM:SS'
 def _normalize_due_date_str(due_value):
@@ -144,12 +174,12 @@ def _normalize_due_date_str(due_value):
                 except Exception:
                     pass
             try:
-                if re.match(r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}$', s):
+                if _RE_FECHA_MINUTOS.match(s):
                     dt = datetime.strptime(s, '%Y-%m-%d %H:%M')
                     offset = datetime.now() - datetime.utcnow()
                     dt_utc = dt - offset
                     return dt_utc.strftime('%Y-%m-%d %H:%M:%S')
-                if re.match(r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$', s):
+                if _RE_FECHA_SEGUNDOS.match(s):
                     dt = datetime.strptime(s, '%Y-%m-%d %H:%M:%S')
                     offset = datetime.now() - datetime.utcnow()
                     dt_utc = dt - offset
@@ -160,70 +190,1461 @@ def _normalize_due_date_str(due_value):
         pass
     return due_value
 
-def get_db_connection():
-    try:
-        # Debug: Imprimir las variables de entorno (aceptar tanto MYSQL_* como DB_*)
-        host = os.getenv('MYSQL_HOST') or os.getenv('DB_HOST', 'localhost')
-        user = os.getenv('MYSQL_USER') or os.getenv('DB_USER', 'root')
-        password = os.getenv('MYSQL_PASSWORD') or os.getenv('DB_PASSWORD', '1234')
-        database = os.getenv('MYSQL_DATABASE') or os.getenv('DB_NAME', 'astren')
-        port = int(os.getenv('MYSQL_PORT') or os.getenv('DB_PORT', '3306'))
-        pool_size = int(os.getenv('MYSQL_POOL_SIZE', '15'))
-        
-        # Logging de conexión para debugging
-        print(f"🔗 [DB] Conectando a: {host}:{port}")
-        print(f"🔗 [DB] Usuario: {user}")
-        print(f"🔗 [DB] Base de datos: {database}")
-
-        # Evitar caracteres no ASCII para compatibilidad en Windows
-        logger.info("[DB] Conectando a MySQL")
-
-        global db_pool
-        if db_pool is None:
-            print(f"[DEBUG] Inicializando pool de conexiones MySQL (size={pool_size})")
-            db_pool = mysql_pooling.MySQLConnectionPool(
-                pool_name="astren_pool",
-                pool_size=pool_size,
-                host=host,
-                user=user,
-                password=password,
-                database=database,
-                port=port,
-                connection_timeout=10
-            )
+def _config_conexion_mysql(solo_lectura=False):
+    """Parámetros de conexión (acepta MYSQL_* y DB_*) y ajustes de sesión.
+
+    time_zone, sql_mode, charset e init_command los aplica el conector una sola
+    vez por conexión física, al crearla o reconectarla, no en cada checkout.
+    """
+    cfg = {
+        'host': os.getenv('MYSQL_HOST') or os.getenv('DB_HOST', 'localhost'),
+        'user': os.getenv('MYSQL_USER') or os.getenv('DB_USER', 'root'),
+        'password': os.getenv('MYSQL_PASSWORD') or os.getenv('DB_PASSWORD', '1234'),
+        'database': os.getenv('MYSQL_DATABASE') or os.getenv('DB_NAME', 'astren'),
+        'port': int(os.getenv('MYSQL_PORT') or os.getenv('DB_PORT', '3306')),
+        'connection_timeout': 10,
+        # Varios helpers comparten la conexión del request: descartar resultados sin leer
+        'consume_results': True,
+        'charset': 'utf8mb4',
+        # Zona horaria de la sesión en UTC para consistencia global
+        'time_zone': '+00:00',
+    }
+    sql_mode = os.getenv('MYSQL_SQL_MODE')
+    if sql_mode:
+        cfg['sql_mode'] = sql_mode
+    ajustes = []
+    max_exec_ms = os.getenv('MYSQL_MAX_EXECUTION_TIME_MS')
+    if max_exec_ms:
+        ajustes.append(f"SESSION MAX_EXECUTION_TIME = {int(max_exec_ms)}")
+    if solo_lectura:
+        # La réplica solo atiende lecturas: una escritura por error falla en vez de divergir
+        ajustes.append("SESSION transaction_read_only = ON")
+    if ajustes:
+        cfg['init_command'] = "SET " + ", ".join(ajustes)
+    return cfg
+
+def _config_conexion_replica():
+    """Configuración de la réplica de lectura (MYSQL_REPLICA_*); hereda del primario lo no definido."""
+    cfg = _config_conexion_mysql(solo_lectura=True)
+    cfg['host'] = os.getenv('MYSQL_REPLICA_HOST')
+    cfg['port'] = int(os.getenv('MYSQL_REPLICA_PORT') or cfg['port'])
+    cfg['user'] = os.getenv('MYSQL_REPLICA_USER') or cfg['user']
+    cfg['password'] = os.getenv('MYSQL_REPLICA_PASSWORD') or cfg['password']
+    cfg['database'] = os.getenv('MYSQL_REPLICA_DATABASE') or cfg['database']
+    return cfg
+
+# ===== POOL INSTRUMENTADO =====
+
+class _Histograma:
+    """Histograma de latencias en ms con cubetas fijas (sin dependencias externas)."""
+    CUBETAS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+    def __init__(self):
+        self.conteos = [0] * (len(self.CUBETAS_MS) + 1)
+        self.total = 0
+        self.suma_ms = 0.0
+        self.max_ms = 0.0
+
+    def registrar(self, ms):
+        i = 0
+        while i < len(self.CUBETAS_MS) and ms > self.CUBETAS_MS[i]:
+            i += 1
+        self.conteos[i] += 1
+        self.total += 1
+        self.suma_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentil(self, p):
+        if not self.total:
+            return 0.0
+        objetivo = self.total * p
+        acumulado = 0
+        for i, c in enumerate(self.conteos):
+            acumulado += c
+            if acumulado >= objetivo:
+                return float(self.CUBETAS_MS[i]) if i < len(self.CUBETAS_MS) else self.max_ms
+        return self.max_ms
+
+    def resumen(self):
+        return {
+            'total': self.total,
+            'promedio_ms': round(self.suma_ms / self.total, 3) if self.total else 0.0,
+            'p50_ms': self.percentil(0.50),
+            'p95_ms': self.percentil(0.95),
+            'p99_ms': self.percentil(0.99),
+            'max_ms': round(self.max_ms, 3),
+        }
+
+
+def _nombre_unidad_actual():
+    uow = _unidad_de_trabajo_actual()
+    return uow.nombre if uow is not None else 'sin_unidad'
+
+
+# Destino de las conexiones: primario (lecturas/escrituras) o réplica (solo lecturas)
+DESTINO_PRIMARIO = 'primario'
+DESTINO_REPLICA = 'replica'
+
+# Prioridad de espera por una conexión (menor = se atiende antes)
+PRIORIDAD_LECTURA = 0
+PRIORIDAD_ESCRITURA = 1
+PRIORIDAD_ADMIN = 2
+
+
+class PoolSaturado(mysql.connector.errors.PoolError):
+    """No se obtuvo conexión dentro del plazo o la cola de espera está llena."""
+
+    def __init__(self, motivo, retry_after):
+        super().__init__(f"Pool MySQL saturado ({motivo})")
+        self.motivo = motivo
+        self.retry_after = retry_after
 
-        conn = db_pool.get_connection()
-        # Alinear zona horaria de la sesión MySQL en UTC para consistencia global
+
+class PoolInstrumentado(mysql_pooling.MySQLConnectionPool):
+    """MySQLConnectionPool con espera acotada y métricas.
+
+    A diferencia del pool del conector (que falla en cuanto no hay conexiones
+    libres), el checkout espera hasta `espera_max_s` en una cola de como máximo
+    `cola_max` solicitudes; las de menor prioridad ceden el turno. Registra
+    espera de checkout, retención por endpoint, uso pico y rechazos.
+    """
+
+    def __init__(self, *args, espera_max_s=2.0, cola_max=32, retry_after_s=1, **kwargs):
+        self._metricas_lock = threading.Lock()
+        self._liberada = threading.Condition(self._metricas_lock)
+        self.espera_max_s = espera_max_s
+        self.cola_max = cola_max
+        self.retry_after_s = retry_after_s
+        self.en_uso = 0
+        self.pico_en_uso = 0
+        self.checkouts = 0
+        self.esperando = 0
+        self.pico_esperando = 0
+        self._esperando_por_prioridad = {}
+        self.rechazos_cola_llena = 0
+        self.rechazos_timeout = 0
+        self._espera = _Histograma()
+        self._retencion = {}    # endpoint -> _Histograma
+        self._prestadas = {}    # id(conexión física) -> (inicio, endpoint)
+        super().__init__(*args, **kwargs)
+        self._libres = self.pool_size
+
+    def holgura(self):
+        """Cupos libres que no están ya comprometidos con solicitudes en espera."""
+        with self._metricas_lock:
+            return self._libres - self.esperando
+
+    @property
+    def agotamientos(self):
+        return self.rechazos_cola_llena + self.rechazos_timeout
+
+    def _cede_turno(self, prioridad):
+        return any(n for p, n in self._esperando_por_prioridad.items() if p < prioridad)
+
+    def _reservar(self, prioridad, espera_max_s):
+        """Reserva un cupo del pool esperando como mucho espera_max_s. Requiere el lock."""
+        if self._libres > 0 and not self._cede_turno(prioridad):
+            self._libres -= 1
+            return
+        # Las solicitudes de admin/debug solo usan la mitad de la cola
+        cola = self.cola_max if prioridad < PRIORIDAD_ADMIN else self.cola_max // 2
+        if self.esperando >= cola:
+            self.rechazos_cola_llena += 1
+            raise PoolSaturado('cola_llena', self.retry_after_s)
+        limite = time.perf_counter() + espera_max_s
+        self.esperando += 1
+        self.pico_esperando = max(self.pico_esperando, self.esperando)
+        self._esperando_por_prioridad[prioridad] = self._esperando_por_prioridad.get(prioridad, 0) + 1
         try:
-            cursor = conn.cursor()
-            cursor.execute("SET time_zone = '+00:00'")
-            cursor.close()
-        except Exception as tz_err:
-            logger.warning(f"[DB] No se pudo fijar time_zone UTC de la sesión: {tz_err}")
+            while self._libres <= 0 or self._cede_turno(prioridad):
+                restante = limite - time.perf_counter()
+                if restante <= 0:
+                    self.rechazos_timeout += 1
+                    raise PoolSaturado('timeout', self.retry_after_s)
+                self._liberada.wait(restante)
+            self._libres -= 1
+        finally:
+            self.esperando -= 1
+            self._esperando_por_prioridad[prioridad] -= 1
+            # Otro en espera puede ser ahora el de mayor prioridad
+            self._liberada.notify_all()
+
+    def get_connection(self, prioridad=PRIORIDAD_ESCRITURA, espera_max_s=None):
+        inicio = time.perf_counter()
+        with self._liberada:
+            try:
+                self._reservar(prioridad, self.espera_max_s if espera_max_s is None else espera_max_s)
+            except PoolSaturado as e:
+                logger.warning(f"[DB] Pool saturado ({e.motivo}) en '{_nombre_unidad_actual()}': en_uso={self.en_uso}/{self.pool_size} esperando={self.esperando}")
+                raise
+        try:
+            pooled = super().get_connection()
+        except Exception:
+            with self._liberada:
+                self._libres += 1
+                self._liberada.notify_all()
+            raise
+        ahora = time.perf_counter()
+        with self._metricas_lock:
+            self.checkouts += 1
+            self.en_uso += 1
+            if self.en_uso > self.pico_en_uso:
+                self.pico_en_uso = self.en_uso
+            self._espera.registrar((ahora - inicio) * 1000)
+            self._prestadas[id(pooled._cnx)] = (ahora, _nombre_unidad_actual())
+        return pooled
+
+    def add_connection(self, cnx=None):
+        # Con cnx es una devolución (PooledMySQLConnection.close); sin cnx, el llenado inicial
+        super().add_connection(cnx)
+        if cnx is None:
+            return
+        with self._liberada:
+            prestada = self._prestadas.pop(id(cnx), None)
+            if prestada is None:
+                return
+            self.en_uso -= 1
+            self._libres += 1
+            inicio, endpoint = prestada
+            hist = self._retencion.get(endpoint)
+            if hist is None:
+                hist = self._retencion[endpoint] = _Histograma()
+            hist.registrar((time.perf_counter() - inicio) * 1000)
+            self._liberada.notify_all()
+
+    def metricas(self):
+        with self._metricas_lock:
+            return {
+                'tamano': self.pool_size,
+                'en_uso': self.en_uso,
+                'pico_en_uso': self.pico_en_uso,
+                'checkouts': self.checkouts,
+                'esperando': self.esperando,
+                'pico_esperando': self.pico_esperando,
+                'cola_max': self.cola_max,
+                'espera_max_ms': int(self.espera_max_s * 1000),
+                'agotamientos': self.agotamientos,
+                'rechazos_cola_llena': self.rechazos_cola_llena,
+                'rechazos_timeout': self.rechazos_timeout,
+                'espera_checkout': self._espera.resumen(),
+                'retencion_por_endpoint': {ep: h.resumen() for ep, h in sorted(self._retencion.items())},
+            }
+
+
+def _metricas_de(pool):
+    if pool is None:
+        return {'inicializado': False}
+    return {'inicializado': True, **pool.metricas()}
+
+def metricas_pool():
+    return _metricas_de(db_pool)
+
+def _crear_pool(nombre="astren_pool", cfg=None, pool_size=None):
+    cfg = cfg or _config_conexion_mysql()
+    pool_size = pool_size or int(os.getenv('MYSQL_POOL_SIZE', '15'))
+    # Con reset de sesión el conector re-ejecuta todos los SET en cada devolución al pool
+    reset_session = os.getenv('MYSQL_POOL_RESET_SESSION', 'false').lower() in ('1', 'true', 'yes')
+    espera_max_s = int(os.getenv('MYSQL_POOL_WAIT_TIMEOUT_MS', '2000')) / 1000.0
+    cola_max = int(os.getenv('MYSQL_POOL_MAX_WAITERS', str(pool_size * 2)))
+    logger.info(f"[DB] Inicializando pool {nombre} {cfg['host']}:{cfg['port']}/{cfg['database']} (size={pool_size}, reset_session={reset_session}, espera_max={espera_max_s}s, cola_max={cola_max})")
+    return PoolInstrumentado(
+        pool_name=nombre,
+        pool_size=pool_size,
+        pool_reset_session=reset_session,
+        espera_max_s=espera_max_s,
+        cola_max=cola_max,
+        retry_after_s=int(os.getenv('MYSQL_POOL_RETRY_AFTER', '1')),
+        **cfg
+    )
+
+def _obtener_pool(destino):
+    global db_pool, db_pool_replica
+    if destino == DESTINO_REPLICA:
+        if db_pool_replica is None:
+            with _db_pool_lock:
+                if db_pool_replica is None:
+                    db_pool_replica = _crear_pool(
+                        "astren_pool_replica",
+                        _config_conexion_replica(),
+                        int(os.getenv('MYSQL_REPLICA_POOL_SIZE') or os.getenv('MYSQL_POOL_SIZE', '15'))
+                    )
+        return db_pool_replica
+    if db_pool is None:
+        with _db_pool_lock:
+            if db_pool is None:
+                db_pool = _crear_pool()
+    return db_pool
+
+def _checkout_pool(prioridad=PRIORIDAD_ESCRITURA, destino=DESTINO_PRIMARIO, espera_max_s=None):
+    """Toma una conexión física del pool del destino (crea el pool en el primer uso)."""
+    try:
+        conn = _obtener_pool(destino).get_connection(prioridad=prioridad, espera_max_s=espera_max_s)
+        if conn.in_transaction:
+            # Sin reset de sesión: no heredar un snapshot abierto por quien la devolvió
+            conn.rollback()
         return conn
+    except PoolSaturado:
+        raise
     except mysql.connector.Error as err:
-        print(f"[ERROR] Error de conexión a la base de datos: {err}")
+        logger.error(f"[DB] Error de conexión a la base de datos ({destino}): {err}")
         if err.errno == mysql.connector.errorcode.CR_CONN_HOST_ERROR:
-            print("No se puede conectar al host de la base de datos.")
+            logger.error("[DB] No se puede conectar al host de la base de datos.")
         elif err.errno == mysql.connector.errorcode.ER_ACCESS_DENIED_ERROR:
-            print("Credenciales de acceso incorrectas.")
+            logger.error("[DB] Credenciales de acceso incorrectas.")
         elif err.errno == mysql.connector.errorcode.ER_BAD_DB_ERROR:
-            print("La base de datos no existe.")
+            logger.error("[DB] La base de datos no existe.")
         raise
 
-def actualizar_tareas_vencidas():
+# ===== ENRUTAMIENTO LECTURA/ESCRITURA =====
+
+REPLICA_CONFIGURADA = bool(os.getenv('MYSQL_REPLICA_HOST'))
+# Tras una escritura, las lecturas del mismo usuario/cliente van al primario durante esta ventana
+_AFINIDAD_PRIMARIO_S = float(os.getenv('MYSQL_REPLICA_STICKY_SECONDS', '5'))
+_afinidad_primario = {}     # clave -> time.monotonic() de expiración (por worker)
+# La misma ventana viaja al cliente, que la devuelve: así vale en cualquier worker o instancia
+_CABECERA_AFINIDAD = 'X-Primario-Hasta'
+_afinidad_lock = threading.Lock()
+_metricas_enrutamiento = {'lecturas_replica': 0, 'lecturas_primario_afinidad': 0, 'fallback_primario': 0, 'escrituras_marcadas': 0}
+
+def _contar_enrutamiento(clave):
+    with _afinidad_lock:
+        _metricas_enrutamiento[clave] += 1
+
+def _claves_afinidad():
+    """Identidades del cliente para read-your-writes: usuario (si se conoce) y dirección de origen."""
+    origen = (request.headers.get('X-Forwarded-For') or request.remote_addr or '').split(',')[0].strip()
+    claves = [f"cliente:{origen}"]
+    usuario_id = (request.view_args or {}).get('usuario_id')
+    if usuario_id is None and request.method not in ('GET', 'HEAD'):
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            usuario_id = data.get('usuario_id') or data.get('creador_id')
+    if usuario_id is not None:
+        claves.append(f"usuario:{usuario_id}")
+    return claves
+
+def _marcar_escritura(claves):
+    hasta = time.monotonic() + _AFINIDAD_PRIMARIO_S
+    with _afinidad_lock:
+        for clave in claves:
+            _afinidad_primario[clave] = hasta
+        _metricas_enrutamiento['escrituras_marcadas'] += 1
+        if len(_afinidad_primario) > 10000:
+            ahora = time.monotonic()
+            for clave in [k for k, v in _afinidad_primario.items() if v < ahora]:
+                del _afinidad_primario[clave]
+
+def _afinidad_activa(claves):
+    ahora = time.monotonic()
+    with _afinidad_lock:
+        return any(_afinidad_primario.get(clave, 0) > ahora for clave in claves)
+
+def _afinidad_en_cliente():
+    """Ventana devuelta por el cliente en X-Primario-Hasta (epoch en segundos)."""
+    try:
+        hasta = float(request.headers.get(_CABECERA_AFINIDAD, ''))
+    except ValueError:
+        return False
+    ahora = time.time()
+    # Acotada a la ventana configurada: el cliente no puede fijarse al primario indefinidamente
+    return ahora < hasta <= ahora + _AFINIDAD_PRIMARIO_S + 1
+
+def _destino_request(prioridad):
+    if not REPLICA_CONFIGURADA or prioridad != PRIORIDAD_LECTURA:
+        return DESTINO_PRIMARIO
+    if _afinidad_en_cliente() or _afinidad_activa(_claves_afinidad()):
+        _contar_enrutamiento('lecturas_primario_afinidad')
+        return DESTINO_PRIMARIO
+    return DESTINO_REPLICA
+
+def metricas_enrutamiento():
+    with _afinidad_lock:
+        return {
+            'replica_configurada': REPLICA_CONFIGURADA,
+            'ventana_afinidad_s': _AFINIDAD_PRIMARIO_S,
+            'claves_con_afinidad': len(_afinidad_primario),
+            **_metricas_enrutamiento,
+            'pool_replica': _metricas_de(db_pool_replica),
+        }
+
+# ===== UNIDAD DE TRABAJO (UNA CONEXIÓN POR REQUEST O JOB) =====
+
+_SENTENCIAS_ESCRITURA = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+# Tras un deadlock (1213) o una espera de bloqueo agotada (1205) la unidad no debe confirmarse
+_ERRORES_TRANSACCION_PERDIDA = (1213, 1205)
+
+class _CursorCompartido:
+    """Cursor de un helper: abre el SAVEPOINT del helper antes de su primera escritura."""
+    __slots__ = ('_conexion', '_cursor')
+
+    def __init__(self, conexion, cursor):
+        self._conexion = conexion
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+
+    def _ejecutar(self, metodo, operation, *args, **kwargs):
+        if self._conexion._savepoint is None and operation.lstrip()[:7].upper().startswith(_SENTENCIAS_ESCRITURA):
+            self._conexion._abrir_savepoint()
+        try:
+            return metodo(operation, *args, **kwargs)
+        except mysql.connector.Error as e:
+            if getattr(e, 'errno', None) in _ERRORES_TRANSACCION_PERDIDA:
+                # InnoDB ya revirtió la transacción: aunque el helper capture el error,
+                # lo escrito después no puede confirmarse como si nada
+                self._conexion._uow.marcar_rollback()
+            raise
+
+    def execute(self, operation, *args, **kwargs):
+        return self._ejecutar(self._cursor.execute, operation, *args, **kwargs)
+
+    def executemany(self, operation, *args, **kwargs):
+        return self._ejecutar(self._cursor.executemany, operation, *args, **kwargs)
+
+
+class _ConexionCompartida:
+    """Vista de la conexión de una unidad de trabajo.
+
+    Los helpers siguen llamando commit()/close() como antes; aquí se difieren
+    y el commit real ocurre una sola vez al cerrar la unidad de trabajo.
+    Cada vista abre un SAVEPOINT antes de su primera escritura, así un rollback()
+    del helper deshace solo lo suyo (como cuando cada helper tenía su conexión);
+    si el savepoint ya no existe (deadlock), se revierte la unidad entera.
+    """
+    __slots__ = ('_uow', '_savepoint')
+
+    def __init__(self, uow):
+        self._uow = uow
+        self._savepoint = None
+
+    def __getattr__(self, name):
+        return getattr(self._uow._conn, name)
+
+    def cursor(self, *args, **kwargs):
+        return _CursorCompartido(self, self._uow._conn.cursor(*args, **kwargs))
+
+    def _sentencia(self, sql):
+        cursor = self._uow._conn.cursor()
+        try:
+            cursor.execute(sql)
+        finally:
+            cursor.close()
+
+    def _abrir_savepoint(self):
+        nombre = self._uow.nuevo_savepoint()
+        self._sentencia(f"SAVEPOINT {nombre}")
+        self._savepoint = nombre
+
+    def commit(self):
+        # Lo escrito hasta aquí ya no se deshace con un rollback() posterior del helper
+        self._savepoint = None
+
+    def rollback(self):
+        if self._savepoint is None or self._uow.solo_rollback:
+            # Sin escrituras propias desde el último commit(), o la unidad ya se revirtió entera
+            self._savepoint = None
+            return
+        nombre, self._savepoint = self._savepoint, None
+        try:
+            self._sentencia(f"ROLLBACK TO SAVEPOINT {nombre}")
+        except Exception as e:
+            logger.warning(f"[DB] Savepoint {nombre} no disponible en '{self._uow.nombre}', se revierte la unidad: {e}")
+            self._uow.marcar_rollback()
+
+    def close(self):
+        pass
+
+
+class UnidadDeTrabajo:
+    """Conexión del pool compartida por todos los helpers de un request o job."""
+
+    def __init__(self, nombre='request', prioridad=PRIORIDAD_ESCRITURA, destino=DESTINO_PRIMARIO):
+        self.nombre = nombre
+        self.prioridad = prioridad
+        self.destino = destino
+        self.checkouts = 0      # conexiones físicas tomadas del pool
+        self.solicitudes = 0    # llamadas a get_db_connection()
+        self.solo_rollback = False
+        self.savepoints = 0
+        self.saturacion = None  # PoolSaturado si no se obtuvo conexión
+        self.memo = {}          # lecturas que se hacen una sola vez por unidad
+        self._conn = None
+        self._tras_commit = []  # callbacks a ejecutar solo si el commit se confirma
+        self._tras_rollback = []  # callbacks a ejecutar si la unidad no se confirma
+
+    def conexion(self):
+        self.solicitudes += 1
+        if self._conn is None:
+            # Si ya se agotó la espera una vez, no volver a esperar en cada helper
+            if self.saturacion is not None:
+                raise self.saturacion
+            try:
+                self._conn = self._checkout()
+            except PoolSaturado as e:
+                self.saturacion = e
+                raise
+            self.checkouts += 1
+        return _ConexionCompartida(self)
+
+    def _checkout(self):
+        if self.destino == DESTINO_REPLICA:
+            try:
+                conn = _checkout_pool(self.prioridad, DESTINO_REPLICA)
+                _contar_enrutamiento('lecturas_replica')
+                return conn
+            except PoolSaturado:
+                raise
+            except mysql.connector.Error as e:
+                # Réplica caída: degradar al primario en vez de fallar la lectura
+                logger.warning(f"[DB] Réplica no disponible para '{self.nombre}', usando primario: {e}")
+                _contar_enrutamiento('fallback_primario')
+                self.destino = DESTINO_PRIMARIO
+        return _checkout_pool(self.prioridad, DESTINO_PRIMARIO)
+
+    def forzar_primario(self):
+        """Para lecturas que deben ver lo último escrito (o GETs que escriben): usar el primario."""
+        if self.destino == DESTINO_PRIMARIO:
+            return
+        self.destino = DESTINO_PRIMARIO
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            try:
+                conn.rollback()
+            finally:
+                conn.close()
+
+    def al_confirmar(self, callback):
+        """Registra callback() para después del commit; se descarta si hay rollback."""
+        self._tras_commit.append(callback)
+
+    def al_revertir(self, callback):
+        """Registra callback() para cuando la unidad termina sin commit."""
+        self._tras_rollback.append(callback)
+
+    def _ejecutar_callbacks(self, confirmada):
+        callbacks = self._tras_commit if confirmada else self._tras_rollback
+        self._tras_commit, self._tras_rollback = [], []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"[DB] Callback de fin de unidad falló en '{self.nombre}': {e}")
+
+    def nuevo_savepoint(self):
+        self.savepoints += 1
+        return f"uow_{self.savepoints}"
+
+    def marcar_rollback(self):
+        self.solo_rollback = True
+        if self._conn is not None:
+            try:
+                self._conn.rollback()
+            except Exception as e:
+                logger.warning(f"[DB] Rollback fallido en unidad '{self.nombre}': {e}")
+
+    def finalizar(self, confirmar=True):
+        """Confirma (o revierte) y devuelve la conexión al pool. Retorna True si hubo commit."""
+        conn = self._conn
+        confirmar = confirmar and not self.solo_rollback
+        if conn is None:
+            # Sin conexión no hay nada que confirmar: la unidad termina bien si así se pidió
+            self._ejecutar_callbacks(confirmar)
+            return False
+        self._conn = None
+        try:
+            if confirmar:
+                try:
+                    conn.commit()
+                except Exception:
+                    self._ejecutar_callbacks(False)
+                    raise
+                self._ejecutar_callbacks(True)
+                return True
+            try:
+                conn.rollback()
+            finally:
+                self._ejecutar_callbacks(False)
+            return False
+        finally:
+            try:
+                conn.close()
+            except Exception as e:
+                logger.warning(f"[DB] No se pudo devolver la conexión al pool: {e}")
+
+
+_uow_job = contextvars.ContextVar('astren_uow_job', default=None)
+
+def _unidad_de_trabajo_actual():
+    if has_app_context():
+        uow = g.get('uow')
+        if uow is not None:
+            return uow
+    return _uow_job.get()
+
+@contextmanager
+def unidad_de_trabajo(nombre='job'):
+    """Unidad de trabajo para jobs en segundo plano (fuera de un request)."""
+    uow = UnidadDeTrabajo(nombre)
+    token = _uow_job.set(uow)
+    try:
+        yield uow
+    except Exception:
+        uow.finalizar(confirmar=False)
+        raise
+    else:
+        uow.finalizar()
+    finally:
+        _uow_job.reset(token)
+
+# Errores de esquema (migración sin aplicar: tabla o columna inexistente) que los helpers
+# auxiliares pueden omitir. Cualquier otro se propaga: tras un deadlock (1213) o una espera
+# de bloqueo agotada (1205) la escritura principal ya no es válida y no debe confirmarse.
+_ERRORES_ESQUEMA = (1146, 1054)
+
+def _error_de_esquema(e):
+    return getattr(e, 'errno', None) in _ERRORES_ESQUEMA
+
+def get_db_connection():
+    """Conexión de la unidad de trabajo activa; sin unidad activa, una conexión suelta del pool."""
+    uow = _unidad_de_trabajo_actual()
+    if uow is not None:
+        return uow.conexion()
+    return _checkout_pool()
+
+def _prioridad_request():
+    path = request.path or ''
+    if path.startswith(('/debug', '/admin', '/test')):
+        return PRIORIDAD_ADMIN
+    if request.method in ('GET', 'HEAD'):
+        return PRIORIDAD_LECTURA
+    return PRIORIDAD_ESCRITURA
+
+def _respuesta_saturacion(saturacion):
+    response = jsonify({'error': 'Servidor ocupado, intenta de nuevo en unos segundos'})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(saturacion.retry_after)
+    return response
+
+@app.before_request
+def _abrir_unidad_de_trabajo():
+    iniciar_barrido_vencidas()
+    prioridad = _prioridad_request()
+    g.uow = UnidadDeTrabajo(request.endpoint or 'request', prioridad, _destino_request(prioridad))
+
+@app.after_request
+def _cerrar_unidad_de_trabajo(response):
+    """Commit único al final del request (rollback si la respuesta es 5xx)."""
+    uow = g.pop('uow', None)
+    if uow is None:
+        return response
+    if uow.saturacion is not None:
+        # Los helpers suelen capturar la excepción y devolver listas vacías: responder 503 igualmente
+        uow.finalizar(confirmar=False)
+        response = _respuesta_saturacion(uow.saturacion)
+    if uow.solo_rollback and response.status_code < 500:
+        # La unidad se revirtió entera (deadlock o savepoint perdido): no responder 2xx sin commit
+        logger.error(f"[DB] '{uow.nombre}' revertido por completo; se responde 500")
+        response = jsonify({'error': 'Error al guardar los cambios'})
+        response.status_code = 500
+    try:
+        confirmado = uow.finalizar(confirmar=response.status_code < 500)
+        if confirmado and REPLICA_CONFIGURADA and request.method not in ('GET', 'HEAD'):
+            _marcar_escritura(_claves_afinidad())
+            response.headers[_CABECERA_AFINIDAD] = f"{time.time() + _AFINIDAD_PRIMARIO_S:.3f}"
+    except Exception as e:
+        logger.error(f"[DB] Error al confirmar la transacción de '{uow.nombre}': {e}")
+        response = jsonify({'error': 'Error al guardar los cambios'})
+        response.status_code = 500
+    response.headers['X-DB-Checkouts'] = str(uow.checkouts)
+    if uow.checkouts:
+        response.headers['X-DB-Destino'] = uow.destino
+        logger.debug(f"[DB] {uow.nombre}: checkouts={uow.checkouts} llamadas={uow.solicitudes}")
+    return response
+
+@app.teardown_request
+def _liberar_unidad_de_trabajo(exc):
+    # Solo queda una unidad aquí si after_request no llegó a ejecutarse
+    uow = g.pop('uow', None)
+    if uow is not None:
+        try:
+            uow.finalizar(confirmar=False)
+        except Exception as e:
+            logger.warning(f"[DB] Error liberando unidad de trabajo '{uow.nombre}': {e}")
+
+# ===== VERSIONES DE DATOS Y CACHÉS EN PROCESO =====
+
+class CacheLRU:
+    """Caché en proceso acotada por tamaño (LRU) y con expiración por entrada."""
+
+    def __init__(self, capacidad=1000, ttl_s=60):
+        self.capacidad = capacidad
+        self.ttl_s = ttl_s
+        self._datos = OrderedDict()     # clave -> (expira_monotonic, valor)
+        self._lock = threading.Lock()
+
+    def obtener(self, clave, defecto=None):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return defecto
+            if entrada[0] <= time.monotonic():
+                del self._datos[clave]
+                return defecto
+            self._datos.move_to_end(clave)
+            return entrada[1]
+
+    def guardar(self, clave, valor, ttl_s=None):
+        expira = time.monotonic() + (self.ttl_s if ttl_s is None else ttl_s)
+        with self._lock:
+            self._datos[clave] = (expira, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.capacidad:
+                self._datos.popitem(last=False)
+
+    def eliminar(self, clave):
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+    def __len__(self):
+        return len(self._datos)
+
+
+class _VersionesMemoria:
+    """Versiones por clave en memoria del proceso: válido con un solo worker."""
+    transaccional = False
+
+    def __init__(self):
+        self._versiones = {}
+        self._lock = threading.Lock()
+
+    def obtener(self, claves):
+        with self._lock:
+            return {clave: self._versiones.get(clave, 0) for clave in claves}
+
+    def incrementar(self, claves, conn=None):
+        with self._lock:
+            for clave in claves:
+                self._versiones[clave] = self._versiones.get(clave, 0) + 1
+
+
+class _VersionesMySQL:
+    """Versiones en la tabla versiones_datos: compartidas entre workers y confirmadas
+    en la misma transacción que la escritura que las provoca."""
+    transaccional = True
+
+    def obtener(self, claves):
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            marcadores = ', '.join(['%s'] * len(claves))
+            cursor.execute(f"SELECT clave, version FROM versiones_datos WHERE clave IN ({marcadores})", list(claves))
+            encontradas = dict(cursor.fetchall())
+        finally:
+            cursor.close()
+            conn.close()
+        return {clave: encontradas.get(clave, 0) for clave in claves}
+
+    def incrementar(self, claves, conn):
+        cursor = conn.cursor()
+        try:
+            # Orden fijo de claves para no provocar deadlocks entre escrituras concurrentes
+            valores = ', '.join(['(%s, 1)'] * len(claves))
+            cursor.execute(
+                f"INSERT INTO versiones_datos (clave, version) VALUES {valores} "
+                "ON DUPLICATE KEY UPDATE version = version + 1",
+                list(claves)
+            )
+        finally:
+            cursor.close()
+
+
+_VERSIONES_BACKEND = os.getenv('VERSIONES_BACKEND', 'mysql').lower()
+_versiones = _VersionesMemoria() if _VERSIONES_BACKEND == 'memoria' else _VersionesMySQL()
+_versiones_lock = threading.Lock()
+_metricas_versiones = {'incrementos': 0, 'errores': 0}
+# Funciones a llamar con las claves invalidadas tras cada commit (cachés locales)
+_oyentes_invalidacion = []
+
+def obtener_versiones(claves):
+    """Versión actual de cada clave, o None si el almacén de versiones no responde."""
+    try:
+        return _versiones.obtener(list(claves))
+    except PoolSaturado:
+        raise
+    except Exception as e:
+        with _versiones_lock:
+            _metricas_versiones['errores'] += 1
+        logger.warning(f"[VERSIONES] No se pudieron leer versiones ({_VERSIONES_BACKEND}): {e}")
+        return None
+
+def _publicar_invalidacion(claves):
+    if not _versiones.transaccional:
+        _versiones.incrementar(claves)
+    for oyente in _oyentes_invalidacion:
+        oyente(claves)
+
+def incrementar_versiones(*claves):
+    """Invalida las claves: la versión sube junto con el commit de la unidad de trabajo."""
+    claves = sorted({clave for clave in claves if clave})
+    if not claves:
+        return
+    uow = _unidad_de_trabajo_actual()
+    if uow is None:
+        with unidad_de_trabajo('incrementar_versiones'):
+            return incrementar_versiones(*claves)
+    if _versiones.transaccional:
+        try:
+            _versiones.incrementar(claves, get_db_connection())
+        except PoolSaturado:
+            raise
+        except mysql.connector.Error as e:
+            # Solo se omite si falta versiones_datos; un deadlock aborta la escritura entera
+            if not _error_de_esquema(e):
+                raise
+            with _versiones_lock:
+                _metricas_versiones['errores'] += 1
+            logger.warning(f"[VERSIONES] No se pudieron incrementar versiones: {e}")
+    with _versiones_lock:
+        _metricas_versiones['incrementos'] += len(claves)
+    uow.al_confirmar(lambda: _publicar_invalidacion(claves))
+
+def clave_usuario(usuario_id):
+    return f"usuario:{int(usuario_id)}"
+
+def invalidar_usuarios(*usuario_ids):
+    incrementar_versiones(*(clave_usuario(u) for u in usuario_ids if u))
+
+def clave_grupo(grupo_id):
+    return f"grupo:{int(grupo_id)}"
+
+def clave_roles_grupo(grupo_id):
+    return f"roles_grupo:{int(grupo_id)}"
+
+def clave_notificaciones(usuario_id):
+    return f"notificaciones:{int(usuario_id)}"
+
+def invalidar_notificaciones(*usuario_ids):
+    incrementar_versiones(*(clave_notificaciones(u) for u in usuario_ids if u))
+
+def _ids_por_consulta(sql, params):
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE tareas
-        SET estado = 'vencida'
-        WHERE estado = 'pendiente'
-        AND fecha_vencimiento IS NOT NULL
-        AND fecha_vencimiento < UTC_TIMESTAMP()
-    """)
-    conn.commit()
-    cursor.close()
-    conn.close()
+    try:
+        cursor.execute(sql, params)
+        return [fila[0] for fila in cursor.fetchall()]
+    finally:
+        cursor.close()
+        conn.close()
+
+def invalidar_tarea(tarea_id):
+    """Creador y asignado de la tarea, y su grupo."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT usuario_id, asignado_a_id, grupo_id FROM tareas WHERE id = %s", (tarea_id,))
+        fila = cursor.fetchone()
+    finally:
+        cursor.close()
+        conn.close()
+    if fila:
+        incrementar_versiones(*(clave_usuario(u) for u in fila[:2] if u), clave_grupo(fila[2]) if fila[2] else None)
+
+def invalidar_area(area_id):
+    invalidar_usuarios(*_ids_por_consulta("SELECT usuario_id FROM areas WHERE id = %s", (area_id,)))
+
+def invalidar_grupo(grupo_id, *usuario_ids):
+    """El grupo, todos sus miembros (nombre, estado o número de miembros) y usuarios extra."""
+    ids = _ids_por_consulta("SELECT usuario_id FROM miembros_grupo WHERE grupo_id = %s", (grupo_id,))
+    incrementar_versiones(clave_grupo(grupo_id), *(clave_usuario(u) for u in (*ids, *usuario_ids) if u))
+
+def invalidar_invitacion(invitacion_id):
+    """Usuario invitado (sus invitaciones pendientes salen en el listado de grupos)."""
+    invalidar_usuarios(*_ids_por_consulta("SELECT usuario_id FROM invitaciones_grupo WHERE id = %s", (invitacion_id,)))
+
+def metricas_versiones():
+    with _versiones_lock:
+        return {'backend': _VERSIONES_BACKEND, **_metricas_versiones}
+
+# ===== IDEMPOTENCIA DE ESCRITURAS =====
+
+class _IdempotenciaMemoria:
+    """Registros de idempotencia en el proceso (un solo worker).
+
+    Una cola FIFO por TTL: como todas las entradas de una cola viven lo mismo,
+    las vencidas están siempre al frente y expirarlas es O(1) amortizado.
+    """
+
+    def __init__(self):
+        self._registros = {}    # clave -> dict(estado, huella, status, cuerpo, tipo, expira)
+        self._colas = {}        # ttl -> OrderedDict(clave -> expira)
+        self._lock = threading.Lock()
+
+    def _expirar(self, ahora):
+        for cola in self._colas.values():
+            while cola:
+                clave, expira = next(iter(cola.items()))
+                if expira > ahora:
+                    break
+                cola.popitem(last=False)
+                registro = self._registros.get(clave)
+                if registro is not None and registro['expira'] <= ahora:
+                    del self._registros[clave]
+
+    def reservar(self, clave, huella, ttl_s):
+        ahora = time.monotonic()
+        with self._lock:
+            self._expirar(ahora)
+            registro = self._registros.get(clave)
+            if registro is not None:
+                return dict(registro)
+            self._registros[clave] = {'estado': 'en_curso', 'huella': huella, 'status': None, 'cuerpo': None, 'tipo': None, 'expira': ahora + ttl_s}
+            cola = self._colas.setdefault(ttl_s, OrderedDict())
+            cola.pop(clave, None)
+            cola[clave] = ahora + ttl_s
+            return None
+
+    def completar(self, clave, status, cuerpo, tipo):
+        with self._lock:
+            registro = self._registros.get(clave)
+            if registro is not None:
+                registro.update(estado='completa', status=status, cuerpo=cuerpo, tipo=tipo)
+
+    def liberar(self, clave):
+        with self._lock:
+            self._registros.pop(clave, None)
+
+    def limpiar(self):
+        with self._lock:
+            self._registros.clear()
+            self._colas.clear()
+
+
+class _IdempotenciaMySQL:
+    """Registros en la tabla idempotencia, compartidos entre workers.
+
+    Usa conexiones propias (fuera de la unidad de trabajo) para que la reserva sea
+    visible para otros workers en cuanto se hace, no al final del request.
+    """
+
+    def __init__(self):
+        self._reservas = 0
+
+    def _ejecutar(self, sql, params, leer=False):
+        conn = _checkout_pool(PRIORIDAD_ESCRITURA)
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(sql, params)
+            resultado = cursor.fetchone() if leer else cursor.rowcount
+            cursor.close()
+            conn.commit()
+            return resultado
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def reservar(self, clave, huella, ttl_s):
+        # Insertar o recuperar una entrada vencida; `expira` va al final porque MySQL
+        # evalúa las asignaciones en orden. rowcount: 1 insertada, 2 recuperada, 0 vigente.
+        filas = self._ejecutar(
+            """
+            INSERT INTO idempotencia (clave, huella, estado, expira)
+            VALUES (%s, %s, 'en_curso', UTC_TIMESTAMP(3) + INTERVAL %s SECOND)
+            ON DUPLICATE KEY UPDATE
+                huella = IF(expira < UTC_TIMESTAMP(3), VALUES(huella), huella),
+                estado = IF(expira < UTC_TIMESTAMP(3), 'en_curso', estado),
+                status = IF(expira < UTC_TIMESTAMP(3), NULL, status),
+                cuerpo = IF(expira < UTC_TIMESTAMP(3), NULL, cuerpo),
+                tipo = IF(expira < UTC_TIMESTAMP(3), NULL, tipo),
+                expira = IF(expira < UTC_TIMESTAMP(3), VALUES(expira), expira)
+            """,
+            (clave, huella, int(ttl_s))
+        )
+        self._reservas += 1
+        if self._reservas % 100 == 0:
+            self._purgar()
+        if filas in (1, 2):
+            return None
+        return self._ejecutar(
+            "SELECT estado, huella, status, cuerpo, tipo FROM idempotencia WHERE clave = %s",
+            (clave,), leer=True
+        ) or {'estado': 'en_curso', 'huella': huella}
+
+    def completar(self, clave, status, cuerpo, tipo):
+        self._ejecutar(
+            "UPDATE idempotencia SET estado = 'completa', status = %s, cuerpo = %s, tipo = %s WHERE clave = %s",
+            (status, cuerpo, tipo, clave)
+        )
+
+    def liberar(self, clave):
+        self._ejecutar("DELETE FROM idempotencia WHERE clave = %s AND estado = 'en_curso'", (clave,))
+
+    def _purgar(self):
+        try:
+            self._ejecutar("DELETE FROM idempotencia WHERE expira < UTC_TIMESTAMP(3) LIMIT 1000", ())
+        except Exception as e:
+            logger.warning(f"[IDEMPOTENCIA] Purga de registros vencidos falló: {e}")
+
+
+_IDEMPOTENCIA_BACKEND = os.getenv('IDEMPOTENCIA_BACKEND', 'mysql').lower()
+_idempotencia = _IdempotenciaMemoria() if _IDEMPOTENCIA_BACKEND == 'memoria' else _IdempotenciaMySQL()
+# Con Idempotency-Key el cliente decide cuándo reintentar: guardar la respuesta un día
+_IDEMPOTENCIA_TTL_CLAVE = int(os.getenv('IDEMPOTENCIA_TTL', '86400'))
+# Sin cabecera se deduplica por firma del contenido (doble click), solo unos segundos
+_IDEMPOTENCIA_TTL_FIRMA = int(os.getenv('IDEMPOTENCIA_TTL_FIRMA', '5'))
+_metricas_idempotencia = {'reservas': 0, 'repeticiones': 0, 'en_curso': 0, 'conflictos': 0, 'errores': 0}
+_idempotencia_lock = threading.Lock()
+
+def _contar_idempotencia(clave):
+    with _idempotencia_lock:
+        _metricas_idempotencia[clave] += 1
+
+def _respuesta_repetida(registro):
+    response = app.response_class(registro['cuerpo'] or b'', status=registro['status'] or 200, mimetype=registro.get('tipo') or 'application/json')
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+def idempotente(firma):
+    """Decorador para endpoints de creación.
+
+    Con cabecera Idempotency-Key, un reintento con la misma clave recibe la
+    respuesta original (o 409 si aún se está procesando; 422 si el contenido
+    cambió). Sin cabecera, `firma(data, **view_args)` deduplica dobles envíos
+    durante unos segundos. La respuesta solo se guarda si el request confirma.
+    """
+    def decorador(vista):
+        @functools.wraps(vista)
+        def envoltura(*args, **kwargs):
+            clave_cliente = request.headers.get('Idempotency-Key')
+            if clave_cliente:
+                if len(clave_cliente) > 128:
+                    return jsonify({'error': 'Idempotency-Key demasiado larga (máx. 128)'}), 400
+                clave, ttl_s = f"clave:{request.path}:{clave_cliente}", _IDEMPOTENCIA_TTL_CLAVE
+            else:
+                try:
+                    base = firma(request.get_json(silent=True) or {}, **kwargs)
+                except Exception:
+                    base = None
+                if not base:
+                    return vista(*args, **kwargs)
+                clave, ttl_s = f"firma:{base}", _IDEMPOTENCIA_TTL_FIRMA
+            clave = hashlib.sha256(clave.encode('utf-8')).hexdigest()
+            huella = hashlib.sha256(request.get_data() or b'').hexdigest()
+
+            try:
+                registro = _idempotencia.reservar(clave, huella, ttl_s)
+            except PoolSaturado:
+                raise
+            except Exception as e:
+                # Sin almacén de idempotencia se procesa igual (como antes de tenerlo)
+                _contar_idempotencia('errores')
+                logger.warning(f"[IDEMPOTENCIA] No disponible ({_IDEMPOTENCIA_BACKEND}): {e}")
+                return vista(*args, **kwargs)
+
+            if registro is not None:
+                if clave_cliente and registro.get('huella') != huella:
+                    _contar_idempotencia('conflictos')
+                    return jsonify({'error': 'Idempotency-Key reutilizada con otro contenido'}), 422
+                if registro.get('estado') == 'completa':
+                    _contar_idempotencia('repeticiones')
+                    return _respuesta_repetida(registro)
+                _contar_idempotencia('en_curso')
+                if clave_cliente:
+                    response = jsonify({'error': 'La solicitud original aún se está procesando'})
+                    response.status_code = 409
+                    response.headers['Retry-After'] = '1'
+                    return response
+                return jsonify({'mensaje': 'Solicitud ya procesada recientemente'}), 200
+
+            _contar_idempotencia('reservas')
+            uow = _unidad_de_trabajo_actual()
+            try:
+                response = make_response(vista(*args, **kwargs))
+            except Exception:
+                _idempotencia.liberar(clave)
+                raise
+            if response.status_code >= 500 or uow is None:
+                _idempotencia.liberar(clave)
+                return response
+            status, cuerpo, tipo = response.status_code, response.get_data(), response.mimetype
+            # Guardar la respuesta solo si el commit se confirma; si no, permitir el reintento
+            uow.al_confirmar(lambda: _idempotencia.completar(clave, status, cuerpo, tipo))
+            uow.al_revertir(lambda: _idempotencia.liberar(clave))
+            return response
+        return envoltura
+    return decorador
+
+def metricas_idempotencia():
+    with _idempotencia_lock:
+        return {'backend': _IDEMPOTENCIA_BACKEND, **_metricas_idempotencia}
+
+# ===== GET CONDICIONAL (ETag / If-None-Match) =====
+# Los listados llevan un ETag calculado con las versiones de datos de las que dependen (más la
+# fecha UTC, por los campos de "hoy"). Se valida antes de ejecutar la vista: si el cliente ya
+# tiene esa versión, 304 sin consultar MySQL ni serializar. Las versiones se leen antes que
+# los datos, así que un ETag nunca describe datos más nuevos que el cuerpo que lo acompaña.
+# Las tareas que vencen por el reloj cambian de versión con el barrido de vencidas, pero los
+# listados ya las muestran como 'vencida' antes del barrido: esos ETag llevan la hora de la
+# próxima pendiente que vence ("<hash>-<epoch>") y dejan de coincidir al llegar esa hora.
+_ETAG_SEMILLA = os.getenv('ETAG_SEMILLA', '1')  # cambiarla invalida todos los ETag (p. ej. nuevo formato)
+_etag_lock = threading.Lock()
+_metricas_etag = {'no_modificado': 0, 'completas': 0, 'sin_version': 0}
+
+def _contar_etag(clave):
+    with _etag_lock:
+        _metricas_etag[clave] += 1
+
+def _etag_coincide(etag):
+    """ETag de If-None-Match que coincide y sigue vigente, o None (Flask-Compress le añade ':gzip', ':br'...)."""
+    inm = request.if_none_match
+    if not inm:
+        return None
+    if inm.star_tag:
+        return etag
+    ahora = time.time()
+    for valor in inm.as_set():
+        valor = valor.split(':', 1)[0]
+        base, _, caduca = valor.partition('-')
+        if base == etag and (not caduca or (caduca.isdigit() and int(caduca) > ahora)):
+            return valor
+    return None
+
+def caducar_etag_con(tareas):
+    """Para listados con el estado efectivo calculado al vuelo: el ETag caduca cuando vence la próxima pendiente."""
+    ahora = datetime.utcnow()
+    for tarea in tareas:
+        vence = tarea.get('fecha_vencimiento')
+        if tarea.get('estado') == 'pendiente' and isinstance(vence, datetime) and vence > ahora:
+            if g.get('etag_caduca') is None or vence < g.etag_caduca:
+                g.etag_caduca = vence
+
+def claves_usuario_y_grupos(usuario_id):
+    """Usuario y sus grupos: listados con estadísticas de grupo que cambian por tareas de otros."""
+    grupos = _ids_por_consulta("SELECT grupo_id FROM miembros_grupo WHERE usuario_id = %s", (usuario_id,))
+    return [clave_usuario(usuario_id), *(clave_grupo(g) for g in grupos)]
+
+def condicional(claves):
+    """Decorador para GET de listados: ETag a partir de las versiones de `claves(**view_args)`.
+
+    Con If-None-Match vigente responde 304 sin ejecutar la vista. Si las versiones no
+    se pueden leer, la vista responde como siempre y sin ETag.
+    """
+    def decorador(vista):
+        @functools.wraps(vista)
+        def envoltura(*args, **kwargs):
+            try:
+                lista = claves(**kwargs)
+            except PoolSaturado:
+                raise
+            except mysql.connector.Error as e:
+                logger.warning(f"[ETAG] No se pudieron obtener las claves de {request.path}: {e}")
+                lista = None
+            versiones = obtener_versiones(lista) if lista else None
+            if versiones is None:
+                _contar_etag('sin_version')
+                return vista(*args, **kwargs)
+            base = '|'.join([_ETAG_SEMILLA, request.full_path, datetime.utcnow().strftime('%Y-%m-%d')]
+                            + [f"{clave}={versiones[clave]}" for clave in sorted(versiones)])
+            etag = hashlib.sha256(base.encode('utf-8')).hexdigest()[:32]
+            vigente = _etag_coincide(etag)
+            if vigente:
+                _contar_etag('no_modificado')
+                response = app.response_class(status=304)
+                response.set_etag(vigente)
+                return response
+            g.etag_caduca = None
+            response = make_response(vista(*args, **kwargs))
+            if response.status_code == 200:
+                _contar_etag('completas')
+                caduca = g.pop('etag_caduca', None)
+                if caduca is not None:
+                    etag = f"{etag}-{int(caduca.replace(tzinfo=timezone.utc).timestamp())}"
+                response.set_etag(etag)
+            return response
+        return envoltura
+    return decorador
+
+def metricas_etag():
+    with _etag_lock:
+        return dict(_metricas_etag)
+
+# Filas por sentencia en los INSERT multi-fila
+_LOTE_INSERT = 500
+
+def _marcadores(n):
+    return ', '.join(['%s'] * n)
+
+# ===== CONTADORES MATERIALIZADOS DE TAREAS =====
+# contadores_usuario: tareas por estado de las que el usuario es creador o asignado (una
+# tarea propia y asignada a uno mismo cuenta dos veces, como en el dashboard).
+# contadores_area: tareas por estado de cada área.
+# grupo_estadisticas: tareas por estado y número de miembros de cada grupo.
+# Las escrituras aplican deltas en su misma transacción y solo sobre filas existentes; las
+# filas se crean al dar de alta el usuario, área o grupo, o con scripts/reconciliar_contadores.py
+# (que además repara cualquier deriva). Sin fila, la lectura vuelve a la agregación sobre tareas.
+
+# Con 'false' las lecturas siempre agregan sobre tareas (los deltas se siguen aplicando)
+_CONTADORES_MATERIALIZADOS = os.getenv('CONTADORES_MATERIALIZADOS', 'true').lower() in ('1', 'true', 'yes')
+_COLUMNAS_CONTADOR = {'pendiente': 'pendientes', 'completada': 'completadas', 'vencida': 'vencidas'}
+_contadores_lock = threading.Lock()
+_metricas_contadores = {'deltas': 0, 'lecturas': 0, 'sin_fila': 0, 'errores': 0}
+
+def _contar_contadores(clave, n=1):
+    with _contadores_lock:
+        _metricas_contadores[clave] += n
+
+def filas_contables(tarea_ids):
+    """(usuario_id, asignado_a_id, area_id, grupo_id, estado) de las tareas, bloqueadas hasta el commit."""
+    ids = list(dict.fromkeys(int(t) for t in tarea_ids))
+    if not ids:
+        return []
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"SELECT usuario_id, asignado_a_id, area_id, grupo_id, estado FROM tareas WHERE id IN ({_marcadores(len(ids))}) FOR UPDATE",
+            ids
+        )
+        return [tuple(fila) for fila in cursor.fetchall()]
+    finally:
+        cursor.close()
+        conn.close()
+
+def _deltas_contadores(antes, despues):
+    usuarios, areas, grupos = {}, {}, {}
+    for filas, signo in ((antes, -1), (despues, 1)):
+        for usuario_id, asignado_a_id, area_id, grupo_id, estado in filas:
+            columna = _COLUMNAS_CONTADOR.get(estado)
+            if columna is None:
+                continue
+            for deltas, id_ in ((usuarios, usuario_id), (usuarios, asignado_a_id), (areas, area_id), (grupos, grupo_id)):
+                if id_ is not None:
+                    delta = deltas.setdefault(int(id_), dict.fromkeys(_COLUMNAS_CONTADOR.values(), 0))
+                    delta[columna] += signo
+    return usuarios, areas, grupos
+
+def _aplicar_deltas(cursor, tabla, columna_id, deltas):
+    # Orden fijo de filas para no provocar deadlocks entre escrituras concurrentes
+    filas = [(k, d['pendientes'], d['completadas'], d['vencidas']) for k, d in sorted(deltas.items()) if any(d.values())]
+    if not filas:
+        return
+    derivada = ' UNION ALL '.join(['SELECT %s AS id, %s AS p, %s AS c, %s AS v'] * len(filas))
+    cursor.execute(
+        f"UPDATE {tabla} t JOIN ({derivada}) d ON t.{columna_id} = d.id "
+        "SET t.pendientes = t.pendientes + d.p, t.completadas = t.completadas + d.c, t.vencidas = t.vencidas + d.v",
+        [valor for fila in filas for valor in fila]
+    )
+
+def ajustar_contadores(antes, despues):
+    """Aplica a contadores_usuario/contadores_area la diferencia entre las filas contables
+    antes y después de una escritura (listas de (usuario_id, asignado_a_id, area_id, grupo_id, estado))."""
+    usuarios, areas, grupos = _deltas_contadores(antes, despues)
+    if not usuarios and not areas and not grupos:
+        return
+    uow = _unidad_de_trabajo_actual()
+    if uow is None:
+        with unidad_de_trabajo('ajustar_contadores'):
+            return ajustar_contadores(antes, despues)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        _aplicar_deltas(cursor, 'contadores_usuario', 'usuario_id', usuarios)
+        _aplicar_deltas(cursor, 'contadores_area', 'area_id', areas)
+        _aplicar_deltas(cursor, 'grupo_estadisticas', 'grupo_id', grupos)
+        _contar_contadores('deltas')
+    except PoolSaturado:
+        raise
+    except mysql.connector.Error as e:
+        # Tablas de contadores sin crear: la reconciliación repara. Un deadlock o una espera
+        # de bloqueo agotada ya revirtió la escritura: se propaga para que no se confirme nada
+        if not _error_de_esquema(e):
+            raise
+        _contar_contadores('errores')
+        logger.warning(f"[CONTADORES] No se pudieron ajustar contadores: {e}")
+    finally:
+        cursor.close()
+
+def ajustar_miembros_grupo(grupo_id, delta):
+    """Altas (+1) y bajas (-1) de miembros en grupo_estadisticas, dentro de la transacción."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("UPDATE grupo_estadisticas SET miembros = miembros + %s WHERE grupo_id = %s", (delta, grupo_id))
+        _contar_contadores('deltas')
+    except PoolSaturado:
+        raise
+    except mysql.connector.Error as e:
+        # Igual que ajustar_contadores: solo se omite si falta la tabla
+        if not _error_de_esquema(e):
+            raise
+        _contar_contadores('errores')
+        logger.warning(f"[CONTADORES] No se pudieron ajustar miembros del grupo {grupo_id}: {e}")
+    finally:
+        cursor.close()
+        conn.close()
+    # El número de miembros sale en los listados de grupos de todos los miembros
+    incrementar_versiones(clave_grupo(grupo_id))
+
+def crear_fila_contadores(tabla, columna_id, id_):
+    """Fila a cero para un usuario, área o grupo recién creados (sin tareas todavía)."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"INSERT IGNORE INTO {tabla} ({columna_id}) VALUES (%s)", (id_,))
+    except PoolSaturado:
+        raise
+    except mysql.connector.Error as e:
+        if not _error_de_esquema(e):
+            raise
+        _contar_contadores('errores')
+        logger.warning(f"[CONTADORES] No se pudo crear la fila de {tabla} para {id_}: {e}")
+    finally:
+        cursor.close()
+        conn.close()
+
+def metricas_contadores():
+    with _contadores_lock:
+        return dict(_metricas_contadores)
+
+# ===== BARRIDO DE TAREAS VENCIDAS =====
+# Un hilo por worker pasa a 'vencida' las pendientes cuyo vencimiento ya pasó, en lotes
+# pequeños por el índice (estado, fecha_vencimiento). GET_LOCK evita que varios workers
+# barran a la vez. Los listados siguen calculando el estado efectivo al vuelo para el
+# intervalo entre barridos.
+_VENCIDAS_INTERVALO_S = float(os.getenv('VENCIDAS_BARRIDO_INTERVALO', '60'))
+_VENCIDAS_LOTE = int(os.getenv('VENCIDAS_BARRIDO_LOTE', '200'))
+_barrido_hilo = None
+_barrido_pid = None
+_barrido_parar = threading.Event()
+_barrido_lock = threading.Lock()
+_metricas_barrido = {'barridos': 0, 'omitidos_por_lock': 0, 'lotes': 0, 'tareas': 0, 'errores': 0, 'ultimo_ms': None}
+
+def actualizar_tareas_vencidas(lote=None):
+    """Pasa a 'vencida' las tareas pendientes ya vencidas, un lote por transacción.
+
+    Retorna cuántas tareas cambiaron.
+    """
+    lote = lote or _VENCIDAS_LOTE
+    total = 0
+    while True:
+        with unidad_de_trabajo('actualizar_tareas_vencidas'):
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, usuario_id, asignado_a_id, area_id, grupo_id FROM tareas
+                WHERE estado = 'pendiente'
+                AND fecha_vencimiento < UTC_TIMESTAMP()
+                ORDER BY fecha_vencimiento
+                LIMIT %s
+                FOR UPDATE
+            """, (lote,))
+            vencidas = cursor.fetchall()
+            if vencidas:
+                ids = [fila[0] for fila in vencidas]
+                cursor.execute(f"UPDATE tareas SET estado = 'vencida' WHERE id IN ({_marcadores(len(ids))}) AND estado = 'pendiente'", ids)
+                ajustar_contadores(
+                    [tuple(fila[1:]) + ('pendiente',) for fila in vencidas],
+                    [tuple(fila[1:]) + ('vencida',) for fila in vencidas]
+                )
+                incrementar_versiones(
+                    *{clave_usuario(u) for fila in vencidas for u in fila[1:3] if u},
+                    *{clave_grupo(fila[4]) for fila in vencidas if fila[4]}
+                )
+            conn.commit()
+            cursor.close()
+            conn.close()
+        total += len(vencidas)
+        with _barrido_lock:
+            _metricas_barrido['lotes'] += 1
+        if len(vencidas) < lote:
+            return total
+
+def barrer_tareas_vencidas():
+    """Un barrido completo si ningún otro worker lo está haciendo."""
+    conn = _checkout_pool(PRIORIDAD_ADMIN)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT GET_LOCK('astren_barrido_vencidas', 0)")
+        if not cursor.fetchone()[0]:
+            with _barrido_lock:
+                _metricas_barrido['omitidos_por_lock'] += 1
+            return 0
+        try:
+            t0 = time.perf_counter()
+            total = actualizar_tareas_vencidas()
+            with _barrido_lock:
+                _metricas_barrido['barridos'] += 1
+                _metricas_barrido['tareas'] += total
+                _metricas_barrido['ultimo_ms'] = round((time.perf_counter() - t0) * 1000, 1)
+            if total:
+                logger.info(f"[VENCIDAS] {total} tareas pasaron a 'vencida'")
+            try:
+                # Mismo lock: un solo worker purga las lápidas de /sync caducadas
+                purgar_eliminaciones()
+            except mysql.connector.Error as e:
+                logger.debug(f"[SYNC] Purga de eliminaciones omitida: {e}")
+            try:
+                # ... y archiva notificaciones leídas antiguas (acotado por barrido)
+                archivar_notificaciones()
+            except mysql.connector.Error as e:
+                logger.debug(f"[NOTIFICACIONES] Archivo omitido: {e}")
+            return total
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK('astren_barrido_vencidas')")
+            cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+def _bucle_barrido():
+    # Arranque desfasado para que los workers no consulten todos a la vez
+    espera = random.uniform(0, min(_VENCIDAS_INTERVALO_S, 10))
+    while not _barrido_parar.wait(espera):
+        try:
+            barrer_tareas_vencidas()
+        except Exception as e:
+            with _barrido_lock:
+                _metricas_barrido['errores'] += 1
+            logger.warning(f"[VENCIDAS] Barrido fallido: {e}")
+        espera = _VENCIDAS_INTERVALO_S
+
+def iniciar_barrido_vencidas():
+    """Arranca el hilo de barrido de este proceso (idempotente; 0 en el intervalo lo desactiva)."""
+    global _barrido_hilo, _barrido_pid
+    if _VENCIDAS_INTERVALO_S <= 0:
+        return
+    if _barrido_pid == os.getpid():
+        return
+    with _barrido_lock:
+        if _barrido_pid == os.getpid():
+            return
+        _barrido_parar.clear()
+        _barrido_hilo = threading.Thread(target=_bucle_barrido, name='barrido-vencidas', daemon=True)
+        _barrido_pid = os.getpid()
+        _barrido_hilo.start()
+
+def detener_barrido_vencidas():
+    _barrido_parar.set()
+
+def metricas_barrido():
+    with _barrido_lock:
+        return {'intervalo_s': _VENCIDAS_INTERVALO_S, 'lote': _VENCIDAS_LOTE, 'activo': _barrido_hilo is not None and _barrido_hilo.is_alive(), **_metricas_barrido}
 
 def _get_bcrypt_rounds() -> int:
     """Determina el costo de bcrypt según entorno o variable de entorno.
@@ -251,11 +1672,59 @@ def crear_usuario(nombre, apellido, correo, contrasena, telefono=None):
     sql = "INSERT INTO usuarios (nombre, apellido, correo, contrasena, telefono) VALUES (%s, %s, %s, %s, %s)"
     logger.debug("[SQL] INSERT usuarios ...", extra={'category': 'DB'})
     cursor.execute(sql, (nombre, apellido, correo, hashed_str, telefono))
+    # Descartar un posible negativo cacheado para el id recién creado
+    _usuarios_cache.eliminar(cursor.lastrowid)
+    crear_fila_contadores('contadores_usuario', 'usuario_id', cursor.lastrowid)
     conn.commit()
     cursor.close()
     conn.close()
     logger.info("[DB] Usuario insertado correctamente", extra={'category': 'DB'})
 
+# Existencia de usuarios por clave primaria. No hay borrado de usuarios, así que los
+# positivos duran más; los negativos expiran pronto (alta en otro worker).
+_usuarios_cache = CacheLRU(int(os.getenv('USUARIOS_CACHE_MAX', '50000')), int(os.getenv('USUARIOS_CACHE_TTL', '300')))
+_USUARIOS_CACHE_TTL_NEGATIVO = int(os.getenv('USUARIOS_CACHE_TTL_NEGATIVO', '10'))
+_metricas_usuarios = {'hits': 0, 'misses': 0, 'consultas': 0}
+_usuarios_lock = threading.Lock()
+
+def usuarios_existentes(usuario_ids):
+    """Subconjunto de usuario_ids que existen; una consulta por PK para los no cacheados."""
+    ids = list(dict.fromkeys(int(u) for u in usuario_ids))
+    existentes, faltantes = set(), []
+    for usuario_id in ids:
+        existe = _usuarios_cache.obtener(usuario_id)
+        if existe is None:
+            faltantes.append(usuario_id)
+        elif existe:
+            existentes.add(usuario_id)
+    with _usuarios_lock:
+        _metricas_usuarios['hits'] += len(ids) - len(faltantes)
+        _metricas_usuarios['misses'] += len(faltantes)
+    if faltantes:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        marcadores = ', '.join(['%s'] * len(faltantes))
+        cursor.execute(f"SELECT id FROM usuarios WHERE id IN ({marcadores})", faltantes)
+        encontrados = {fila[0] for fila in cursor.fetchall()}
+        cursor.close()
+        conn.close()
+        with _usuarios_lock:
+            _metricas_usuarios['consultas'] += 1
+        for usuario_id in faltantes:
+            if usuario_id in encontrados:
+                _usuarios_cache.guardar(usuario_id, True)
+                existentes.add(usuario_id)
+            else:
+                _usuarios_cache.guardar(usuario_id, False, _USUARIOS_CACHE_TTL_NEGATIVO)
+    return existentes
+
+def usuario_existe(usuario_id):
+    return int(usuario_id) in usuarios_existentes([usuario_id])
+
+def metricas_usuarios():
+    with _usuarios_lock:
+        return {'entradas': len(_usuarios_cache), **_metricas_usuarios}
+
 def obtener_usuarios():
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -341,8 +1810,11 @@ def crear_tarea(usuario_id, titulo, descripcion, area_id=None, grupo_id=None, as
     try:
         fv_norm = _normalize_due_date_str(fecha_vencimiento)
         cursor.execute(sql, (usuario_id, area_id, grupo_id, asignado_a_id, titulo, descripcion, fv_norm, estado))
-        conn.commit()
         task_id = cursor.lastrowid
+        ajustar_contadores([], [(usuario_id, asignado_a_id, area_id, grupo_id, estado)])
+        incrementar_versiones(clave_usuario(usuario_id), clave_usuario(asignado_a_id) if asignado_a_id else None,
+                              clave_grupo(grupo_id) if grupo_id else None)
+        conn.commit()
         
         print(f"✅ [SUCCESS] Tarea creada con ID: {task_id}")
         
@@ -361,9 +1833,13 @@ def crear_tarea(usuario_id, titulo, descripcion, area_id=None, grupo_id=None, as
         return None
 
 def crear_tarea_grupo_multiple(usuario_id, titulo, descripcion, grupo_id, asignados_ids, area_id=None, fecha_vencimiento=None, estado='pendiente'):
-    """Crear múltiples tareas para un grupo (una por cada miembro asignado)"""
+    """Crear múltiples tareas para un grupo (una por cada miembro asignado).
+
+    Trabajo por conjuntos: membresía, áreas personales y duplicados se resuelven con
+    una consulta cada uno, las tareas y notificaciones se insertan en lotes multi-fila.
+    """
     conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    cursor = conn.cursor()
     
     print(f"🔍 [DEBUG] Creando tareas múltiples para grupo:")
     print(f"   - usuario_id: {usuario_id}")
@@ -371,63 +1847,94 @@ def crear_tarea_grupo_multiple(usuario_id, titulo, descripcion, grupo_id, asigna
     print(f"   - grupo_id: {grupo_id}")
     print(f"   - asignados_ids: {asignados_ids}")
     
-    tareas_creadas = []
-    
     try:
-        for asignado_id in asignados_ids:
-            # Verificar que el usuario asignado sea miembro del grupo
-            if not verificar_miembro_grupo(grupo_id, asignado_id):
-                print(f"⚠️ [WARN] Usuario {asignado_id} no es miembro del grupo {grupo_id}")
-                continue
-            
-            # Obtener el área personal del usuario asignado para este grupo
-            area_personal_id = None
-            if area_id is None:  # Solo buscar área personal si no se especificó una
-                sql_area = """
-                    SELECT area_id FROM grupo_areas_usuario 
-                    WHERE grupo_id = %s AND usuario_id = %s
-                """
-                cursor.execute(sql_area, (grupo_id, asignado_id))
-                result = cursor.fetchone()
-                if result:
-                    area_personal_id = result['area_id']
-                    print(f"🔍 [DEBUG] Área personal encontrada para usuario {asignado_id}: {area_personal_id}")
-                else:
-                    print(f"⚠️ [WARN] No se encontró área personal para usuario {asignado_id} en grupo {grupo_id}")
-            else:
-                area_personal_id = area_id
-            
-            # Evitar duplicados recientes para el mismo destinatario en el mismo grupo
-            dup_sql = """
-                SELECT id FROM tareas
+        asignados = list(dict.fromkeys(int(a) for a in asignados_ids))
+        
+        # 1. Membresía de todos los asignados (caché de roles + una consulta)
+        roles = obtener_roles_grupo(grupo_id, asignados)
+        no_miembros = [a for a in asignados if roles.get(a) is None]
+        if no_miembros:
+            print(f"⚠️ [WARN] Usuarios {no_miembros} no son miembros del grupo {grupo_id}")
+        asignados = [a for a in asignados if roles.get(a) is not None]
+        if not asignados:
+            cursor.close()
+            conn.close()
+            return []
+        
+        # 2. Área personal de cada asignado en este grupo (solo si no se especificó una)
+        areas_personales = {}
+        if area_id is None:
+            cursor.execute(
+                f"SELECT usuario_id, area_id FROM grupo_areas_usuario WHERE grupo_id = %s AND usuario_id IN ({_marcadores(len(asignados))})",
+                [grupo_id, *asignados]
+            )
+            areas_personales = dict(cursor.fetchall())
+            sin_area = [a for a in asignados if a not in areas_personales]
+            if sin_area:
+                print(f"⚠️ [WARN] Sin área personal en grupo {grupo_id} para usuarios {sin_area}")
+        
+        # 3. Duplicados recientes para los mismos destinatarios en el mismo grupo
+        cursor.execute(
+            f"""
+                SELECT DISTINCT asignado_a_id FROM tareas
                 WHERE titulo = %s
                   AND (descripcion IS NULL AND %s IS NULL OR descripcion = %s)
                   AND grupo_id = %s
-                  AND asignado_a_id = %s
+                  AND asignado_a_id IN ({_marcadores(len(asignados))})
                   AND estado = %s
                   AND fecha_creacion > UTC_TIMESTAMP() - INTERVAL 1 MINUTE
-            """
-            fv_norm = _normalize_due_date_str(fecha_vencimiento)
-            cursor.execute(dup_sql, (titulo, descripcion, descripcion, grupo_id, asignado_id, estado))
-            if cursor.fetchone():
-                print(f"⚠️ [WARN] Tarea duplicada detectada para asignado {asignado_id}, se omite inserción")
-                continue
-
-            # Insertar la tarea para este destinatario
-            sql = """
-                INSERT INTO tareas (usuario_id, area_id, grupo_id, asignado_a_id, titulo, descripcion, fecha_vencimiento, estado)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            # Importante: usuario_id debe ser el creador; asignado_a_id el destinatario
-            cursor.execute(sql, (usuario_id, area_personal_id, grupo_id, asignado_id, titulo, descripcion, fv_norm, estado))
-            task_id = cursor.lastrowid
-            
-            # Crear notificación si no es el mismo usuario
-            if asignado_id != usuario_id:
-                notificar_tarea_asignada(task_id, grupo_id, asignado_id, titulo)
-            
-            tareas_creadas.append(task_id)
-            print(f"✅ [SUCCESS] Tarea creada con ID: {task_id} para usuario {asignado_id} con área {area_personal_id}")
+            """,
+            [titulo, descripcion, descripcion, grupo_id, *asignados, estado]
+        )
+        duplicados = {fila[0] for fila in cursor.fetchall()}
+        if duplicados:
+            print(f"⚠️ [WARN] Tareas duplicadas detectadas para asignados {sorted(duplicados)}, se omiten")
+        asignados = [a for a in asignados if a not in duplicados]
+        if not asignados:
+            cursor.close()
+            conn.close()
+            return []
+        
+        # 4. Insertar las tareas en lotes multi-fila
+        # Importante: usuario_id debe ser el creador; asignado_a_id el destinatario
+        fv_norm = _normalize_due_date_str(fecha_vencimiento)
+        tareas_por_asignado = {}
+        for i in range(0, len(asignados), _LOTE_INSERT):
+            lote = asignados[i:i + _LOTE_INSERT]
+            valores = []
+            for asignado_id in lote:
+                area_tarea = area_id if area_id is not None else areas_personales.get(asignado_id)
+                valores.extend((usuario_id, area_tarea, grupo_id, asignado_id, titulo, descripcion, fv_norm, estado))
+            cursor.execute(
+                "INSERT INTO tareas (usuario_id, area_id, grupo_id, asignado_a_id, titulo, descripcion, fecha_vencimiento, estado) VALUES "
+                + ', '.join(['(%s, %s, %s, %s, %s, %s, %s, %s)'] * len(lote)),
+                valores
+            )
+            # lastrowid es el primer id del lote; recuperar los ids sin suponer que son consecutivos
+            cursor.execute(
+                f"""
+                    SELECT id, asignado_a_id FROM tareas
+                    WHERE id >= %s AND grupo_id = %s AND usuario_id = %s
+                      AND asignado_a_id IN ({_marcadores(len(lote))})
+                    ORDER BY id
+                    LIMIT %s
+                """,
+                [cursor.lastrowid, grupo_id, usuario_id, *lote, len(lote)]
+            )
+            for task_id, asignado_id in cursor.fetchall():
+                tareas_por_asignado.setdefault(asignado_id, task_id)
+        tareas_creadas = [tareas_por_asignado[a] for a in asignados if a in tareas_por_asignado]
+        ajustar_contadores([], [
+            (usuario_id, a, area_id if area_id is not None else areas_personales.get(a), grupo_id, estado)
+            for a in asignados if a in tareas_por_asignado
+        ])
+        
+        # 5. Notificaciones para los destinatarios (un solo INSERT) y versiones de dashboard
+        notificar_tareas_asignadas([
+            (tareas_por_asignado[a], a) for a in asignados
+            if a in tareas_por_asignado and a != int(usuario_id)
+        ], grupo_id, titulo)
+        incrementar_versiones(clave_grupo(grupo_id), *(clave_usuario(u) for u in (usuario_id, *asignados)))
         
         conn.commit()
         cursor.close()
@@ -443,6 +1950,93 @@ def crear_tarea_grupo_multiple(usuario_id, titulo, descripcion, grupo_id, asigna
         conn.close()
         return []
 
+_SQL_TAREAS_USUARIO_SELECT = '''
+    SELECT 
+        t.id, t.titulo, t.descripcion,
+        CASE 
+            WHEN t.estado = 'pendiente' AND t.fecha_vencimiento IS NOT NULL AND t.fecha_vencimiento < UTC_TIMESTAMP() THEN 'vencida'
+            ELSE t.estado
+        END AS estado,
+        t.fecha_creacion AS fecha_creacion,
+        t.fecha_vencimiento,
+        t.area_id, t.grupo_id, t.asignado_a_id,
+        a.nombre AS area_nombre, a.color AS area_color, a.icono AS area_icono,
+        g.nombre AS grupo_nombre, g.color AS grupo_color, g.icono AS grupo_icono,
+        u.nombre AS asignado_nombre, u.apellido AS asignado_apellido
+    FROM tareas t
+    LEFT JOIN areas a ON t.area_id = a.id
+    LEFT JOIN grupos g ON t.grupo_id = g.id
+    LEFT JOIN usuarios u ON t.asignado_a_id = u.id
+'''
+
+# ===== PAGINACIÓN POR CURSOR (KEYSET) =====
+# El cursor es opaco para el cliente: (fecha_creacion, id) de la última fila entregada.
+# Cada página continúa desde ahí por índice (… , fecha_creacion, id), sin leer y
+# descartar las filas anteriores como hace OFFSET.
+_PAGINA_MAX = 200
+# (fecha_creacion, id) estrictamente anterior al cursor, en orden descendente
+_SQL_KEYSET = "AND ({p}fecha_creacion < %s OR ({p}fecha_creacion = %s AND {p}id < %s))"
+
+def codificar_cursor(fecha_creacion, tarea_id):
+    if isinstance(fecha_creacion, datetime):
+        fecha = fecha_creacion.strftime('%Y-%m-%dT%H:%M:%S')
+    else:
+        fecha = str(fecha_creacion).rstrip('Z')
+    return base64.urlsafe_b64encode(f"{fecha}|{int(tarea_id)}".encode()).decode().rstrip('=')
+
+def decodificar_cursor(cursor):
+    """(fecha_creacion, id) de un cursor opaco; ValueError si no es válido."""
+    try:
+        texto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        fecha, tarea_id = texto.split('|')
+        return datetime.strptime(fecha, '%Y-%m-%dT%H:%M:%S'), int(tarea_id)
+    except Exception:
+        raise ValueError('Cursor inválido')
+
+def _filtro_keyset(despues, prefijo=''):
+    if despues is None:
+        return '', ()
+    fecha, tarea_id = despues
+    return _SQL_KEYSET.format(p=prefijo), (fecha, fecha, tarea_id)
+
+def _cortar_pagina(filas, limit):
+    """Se pide una fila de más para saber si hay otra página; next_cursor o None."""
+    if len(filas) <= limit:
+        return filas, None
+    filas = filas[:limit]
+    return filas, codificar_cursor(filas[-1]['fecha_creacion'], filas[-1]['id'])
+
+def obtener_tareas_usuario_pagina(usuario_id, limit=50, despues=None):
+    """Página de tareas creadas por o asignadas al usuario a partir del cursor.
+
+    Las dos condiciones del OR se resuelven por separado (índices (usuario_id, fecha_creacion, id)
+    y (asignado_a_id, fecha_creacion, id)) y solo se unen las claves de la página.
+    """
+    limit = max(1, min(int(limit), _PAGINA_MAX))
+    filtro, params_filtro = _filtro_keyset(despues)
+    sql = _SQL_TAREAS_USUARIO_SELECT + f'''
+        JOIN (
+            (SELECT id FROM tareas
+             WHERE usuario_id = %s AND estado != 'eliminada' {filtro}
+             ORDER BY fecha_creacion DESC, id DESC LIMIT %s)
+            UNION
+            (SELECT id FROM tareas
+             WHERE asignado_a_id = %s AND estado != 'eliminada' {filtro}
+             ORDER BY fecha_creacion DESC, id DESC LIMIT %s)
+        ) k ON k.id = t.id
+        ORDER BY t.fecha_creacion DESC, t.id DESC
+        LIMIT %s
+    '''
+    params = (usuario_id, *params_filtro, limit + 1, usuario_id, *params_filtro, limit + 1, limit + 1)
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(sql, params)
+        return _cortar_pagina(cursor.fetchall(), limit)
+    finally:
+        cursor.close()
+        conn.close()
+
 def obtener_tareas_usuario(usuario_id, limit=50, offset=0):
     start = datetime.now()
     conn = get_db_connection()
@@ -456,23 +2050,7 @@ def obtener_tareas_usuario(usuario_id, limit=50, offset=0):
         offset = int(offset)
     except Exception:
         offset = 0
-    sql = '''
-        SELECT 
-            t.id, t.titulo, t.descripcion,
-            CASE 
-                WHEN t.estado = 'pendiente' AND t.fecha_vencimiento IS NOT NULL AND t.fecha_vencimiento < UTC_TIMESTAMP() THEN 'vencida'
-                ELSE t.estado
-            END AS estado,
-            t.fecha_creacion AS fecha_creacion,
-            t.fecha_vencimiento,
-            t.area_id, t.grupo_id, t.asignado_a_id,
-            a.nombre AS area_nombre, a.color AS area_color, a.icono AS area_icono,
-            g.nombre AS grupo_nombre, g.color AS grupo_color, g.icono AS grupo_icono,
-            u.nombre AS asignado_nombre, u.apellido AS asignado_apellido
-        FROM tareas t
-        LEFT JOIN areas a ON t.area_id = a.id
-        LEFT JOIN grupos g ON t.grupo_id = g.id
-        LEFT JOIN usuarios u ON t.asignado_a_id = u.id
+    sql = _SQL_TAREAS_USUARIO_SELECT + '''
         WHERE t.estado != 'eliminada'
           AND (t.usuario_id = %s OR t.asignado_a_id = %s)
         ORDER BY t.fecha_creacion DESC
@@ -497,28 +2075,50 @@ def obtener_tareas_usuario(usuario_id, limit=50, offset=0):
         dur = (datetime.now() - start).total_seconds()
         logger.info(f"⏱️ obtener_tareas_usuario uid={usuario_id} limit={limit} offset={offset} en {dur:.3f}s - filas={len(tareas) if 'tareas' in locals() else 'ERR'}")
 
+_SQL_TAREAS_GRUPO_SELECT = '''
+    SELECT t.id, t.titulo, t.descripcion,
+           CASE 
+                WHEN t.estado = 'pendiente' AND t.fecha_vencimiento IS NOT NULL AND t.fecha_vencimiento < UTC_TIMESTAMP() THEN 'vencida'
+                ELSE t.estado
+           END AS estado,
+           t.fecha_creacion, t.fecha_vencimiento,
+           t.area_id, t.grupo_id, t.asignado_a_id,
+           a.nombre AS area_nombre, a.color AS area_color, a.icono AS area_icono,
+           g.nombre AS grupo_nombre, u.nombre AS asignado_nombre, u.apellido AS asignado_apellido,
+           c.nombre AS creador_nombre, c.apellido AS creador_apellido
+    FROM tareas t
+    LEFT JOIN areas a ON t.area_id = a.id
+    LEFT JOIN grupos g ON t.grupo_id = g.id
+    LEFT JOIN usuarios u ON t.asignado_a_id = u.id
+    LEFT JOIN usuarios c ON t.usuario_id = c.id
+'''
+
+def obtener_tareas_grupo_pagina(grupo_id, limit=50, despues=None):
+    """Página de tareas del grupo a partir del cursor (índice (grupo_id, fecha_creacion, id))."""
+    limit = max(1, min(int(limit), _PAGINA_MAX))
+    filtro, params_filtro = _filtro_keyset(despues, 't.')
+    sql = _SQL_TAREAS_GRUPO_SELECT + f'''
+        WHERE t.grupo_id = %s AND t.estado != 'eliminada' {filtro}
+        ORDER BY t.fecha_creacion DESC, t.id DESC
+        LIMIT %s
+    '''
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(sql, (grupo_id, *params_filtro, limit + 1))
+        tareas, next_cursor = _cortar_pagina(cursor.fetchall(), limit)
+    finally:
+        cursor.close()
+        conn.close()
+    return tareas, next_cursor
+
 def obtener_tareas_grupo(grupo_id, limit=50, offset=0):
     """Obtener todas las tareas de un grupo específico"""
     try:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
-        sql = '''
-            SELECT t.id, t.titulo, t.descripcion,
-                   CASE 
-                        WHEN t.estado = 'pendiente' AND t.fecha_vencimiento IS NOT NULL AND t.fecha_vencimiento < UTC_TIMESTAMP() THEN 'vencida'
-                        ELSE t.estado
-                   END AS estado,
-                   t.fecha_creacion, t.fecha_vencimiento,
-                   t.area_id, t.grupo_id, t.asignado_a_id,
-                   a.nombre AS area_nombre, a.color AS area_color, a.icono AS area_icono,
-                   g.nombre AS grupo_nombre, u.nombre AS asignado_nombre, u.apellido AS asignado_apellido,
-                   c.nombre AS creador_nombre, c.apellido AS creador_apellido
-            FROM tareas t
-            LEFT JOIN areas a ON t.area_id = a.id
-            LEFT JOIN grupos g ON t.grupo_id = g.id
-            LEFT JOIN usuarios u ON t.asignado_a_id = u.id
-            LEFT JOIN usuarios c ON t.usuario_id = c.id
+        sql = _SQL_TAREAS_GRUPO_SELECT + '''
             WHERE t.grupo_id = %s AND t.estado != 'eliminada'
             ORDER BY t.fecha_creacion DESC
             LIMIT %s OFFSET %s
@@ -527,15 +2127,6 @@ def obtener_tareas_grupo(grupo_id, limit=50, offset=0):
         cursor.execute(sql, (grupo_id, limit, offset))
         tareas = cursor.fetchall()
         
-        # Convertir fechas a string
-        for tarea in tareas:
-            if tarea['fecha_creacion']:
-                if isinstance(tarea['fecha_creacion'], datetime):
-                    tarea['fecha_creacion'] = tarea['fecha_creacion'].strftime('%Y-%m-%dT%H:%M:%SZ')
-            if tarea['fecha_vencimiento']:
-                if isinstance(tarea['fecha_vencimiento'], datetime):
-                    tarea['fecha_vencimiento'] = tarea['fecha_vencimiento'].strftime('%Y-%m-%dT%H:%M:%SZ')
-        
         cursor.close()
         conn.close()
         
@@ -566,15 +2157,6 @@ def obtener_tareas_asignadas_usuario(usuario_id):
         cursor.execute(sql, (usuario_id,))
         tareas = cursor.fetchall()
         
-        # Convertir fechas a string
-        for tarea in tareas:
-            if tarea['fecha_creacion']:
-                if isinstance(tarea['fecha_creacion'], datetime):
-                    tarea['fecha_creacion'] = tarea['fecha_creacion'].strftime('%Y-%m-%dT%H:%M:%SZ')
-            if tarea['fecha_vencimiento']:
-                if isinstance(tarea['fecha_vencimiento'], datetime):
-                    tarea['fecha_vencimiento'] = tarea['fecha_vencimiento'].strftime('%Y-%m-%dT%H:%M:%SZ')
-        
         cursor.close()
         conn.close()
         
@@ -590,8 +2172,10 @@ def crear_area(usuario_id, nombre, descripcion=None, color=None, icono=None):
     cursor = conn.cursor()
     sql = "INSERT INTO areas (usuario_id, nombre, descripcion, color, icono, estado) VALUES (%s, %s, %s, %s, %s, %s)"
     cursor.execute(sql, (usuario_id, nombre, descripcion, color, icono, 'activa'))
-    conn.commit()
     area_id = cursor.lastrowid
+    crear_fila_contadores('contadores_area', 'area_id', area_id)
+    invalidar_usuarios(usuario_id)
+    conn.commit()
     cursor.close()
     conn.close()
     return area_id
@@ -663,8 +2247,11 @@ def registrar_area():
     if not data.get('nombre') or len(data['nombre'].strip()) < 2:
         return jsonify({"error": "El nombre del área debe tener al menos 2 caracteres"}), 400
     # Validar que el usuario exista
-    usuarios = obtener_usuarios()
-    if not any(str(u['id']) == str(data['usuario_id']) for u in usuarios):
+    try:
+        existe = usuario_existe(data['usuario_id'])
+    except (ValueError, TypeError):
+        existe = False
+    if not existe:
         return jsonify({"error": "El usuario no existe"}), 400
     descripcion = data.get('descripcion')
     color = data.get('color')
@@ -687,8 +2274,7 @@ def registrar_usuario():
     if not data.get('correo'):
         return jsonify({"error": "Correo es obligatorio"}), 400
     # Validar formato de correo
-    email_regex = r"^[^@\s]+@[^@\s]+\.[^@\s]+$"
-    if not re.match(email_regex, data['correo']):
+    if not _RE_CORREO.match(data['correo']):
         return jsonify({"error": "Correo inválido"}), 400
     if not data.get('contrasena') or len(data['contrasena']) < 8:
         return jsonify({"error": "La contrasena debe tener al menos 8 caracteres"}), 400
@@ -788,17 +2374,15 @@ def login_usuario():
         logger.error(f"[LOGIN] Error inesperado: {e}", exc_info=True)
         return jsonify({'error': 'Error interno del servidor'}), 500
 
+def _firma_tarea(data):
+    # Idempotencia sin cabecera: evitar doble creación por doble click
+    return f"/tareas:{data.get('usuario_id')}:{data.get('titulo')}:{data.get('descripcion')}:{data.get('area_id')}:{data.get('grupo_id')}:{data.get('fecha_vencimiento')}"
+
 @app.route('/tareas', methods=['POST'])
+@idempotente(_firma_tarea)
 def registrar_tarea():
     data = request.json
     print("🔍 [DEBUG] Datos recibidos para tarea:", data)  # Depuración detallada
-    # Idempotencia: evitar doble creación por doble click
-    try:
-        sig = f"/tareas:{data.get('usuario_id')}:{data.get('titulo')}:{data.get('descripcion')}:{data.get('area_id')}:{data.get('grupo_id')}:{data.get('fecha_vencimiento')}"
-        if _is_duplicate_request(sig):
-            return jsonify({"mensaje": "Tarea ya procesada recientemente"}), 200
-    except Exception:
-        pass
     
     # Validaciones
     if not data:
@@ -820,13 +2404,11 @@ def registrar_tarea():
         print(f"❌ [ERROR] usuario_id inválido: {data.get('usuario_id')}")
         return jsonify({"error": "usuario_id debe ser un número válido", "valor_recibido": data.get('usuario_id')}), 400
     
-    # Validar que el usuario exista (comparar como string para evitar problemas de tipo)
-    usuarios = obtener_usuarios()
-    if not any(str(u['id']) == str(usuario_id) for u in usuarios):
+    # Validar que el usuario exista (búsqueda por clave primaria, cacheada)
+    if not usuario_existe(usuario_id):
         print(f"❌ [ERROR] El usuario {usuario_id} no existe")
         return jsonify({
             "error": "El usuario no existe", 
-            "usuarios_disponibles": [u['id'] for u in usuarios],
             "usuario_intentado": usuario_id
         }), 400
     
@@ -901,6 +2483,7 @@ def registrar_tarea():
     }), 201
 
 @app.route('/tareas/<int:usuario_id>', methods=['GET'])
+@condicional(lambda usuario_id, **_: [clave_usuario(usuario_id)])
 def listar_tareas(usuario_id):
     # Paginación opcional
     try:
@@ -912,22 +2495,20 @@ def listar_tareas(usuario_id):
     except Exception:
         offset = 0
 
-    tareas = obtener_tareas_usuario(usuario_id, limit=limit, offset=offset)
-    tareas = [dict(t) for t in tareas]  # Asegura que cada tarea es un dict
-    for tarea in tareas:
-        fecha = tarea.get('fecha_vencimiento')
-        if fecha:
-            if isinstance(fecha, datetime):
-                tarea['fecha_vencimiento'] = fecha.strftime('%Y-%m-%dT%H:%M:%SZ')
-            elif isinstance(fecha, str) and 'T' in fecha:
-                tarea['fecha_vencimiento'] = fecha
-        # Serializar fecha_creacion igual que en dashboard para evitar errores de JSON
-        fc = tarea.get('fecha_creacion')
-        if fc:
-            if isinstance(fc, datetime):
-                tarea['fecha_creacion'] = fc.strftime('%Y-%m-%dT%H:%M:%SZ')
-            elif isinstance(fc, str) and 'T' in fc:
-                tarea['fecha_creacion'] = fc
+    # ?cursor= (vacío en la primera página) activa la paginación por cursor
+    next_cursor = None
+    cursor_param = request.args.get('cursor')
+    if cursor_param is not None:
+        try:
+            despues = decodificar_cursor(cursor_param) if cursor_param else None
+        except ValueError:
+            return jsonify({'error': 'Cursor inválido'}), 400
+        tareas, next_cursor = obtener_tareas_usuario_pagina(usuario_id, limit=limit, despues=despues)
+    else:
+        tareas = obtener_tareas_usuario(usuario_id, limit=limit, offset=offset)
+    caducar_etag_con(tareas)
+    if cursor_param is not None:
+        return jsonify({'tareas': tareas, 'next_cursor': next_cursor})
     return jsonify(tareas)
 
 @app.route('/tareas/<int:tarea_id>/estado', methods=['PUT'])
@@ -938,8 +2519,11 @@ def actualizar_estado_tarea(tarea_id):
         return jsonify({'error': 'Estado inválido'}), 400
     conn = get_db_connection()
     cursor = conn.cursor()
+    antes = filas_contables([tarea_id])
     sql = "UPDATE tareas SET estado = %s WHERE id = %s"
     cursor.execute(sql, (nuevo_estado, tarea_id))
+    ajustar_contadores(antes, [fila[:4] + (nuevo_estado,) for fila in antes])
+    invalidar_tarea(tarea_id)
     conn.commit()
     cursor.close()
     conn.close()
@@ -1002,9 +2586,12 @@ def actualizar_tarea(tarea_id):
         # Agregar el ID de la tarea al final de los valores
         update_values.append(tarea_id)
         
-        # Ejecutar la actualización
+        # Ejecutar la actualización (mover de área cambia los contadores de ambas áreas)
+        antes = filas_contables([tarea_id]) if area_id is not None else []
         sql = "UPDATE tareas SET " + ", ".join(update_fields) + " WHERE id = %s"  # nosec B608: columns are hardcoded/allowlisted; values are parameterized
         cursor.execute(sql, update_values)
+        ajustar_contadores(antes, [fila[:2] + (area_id,) + fila[3:] for fila in antes])
+        invalidar_tarea(tarea_id)
         conn.commit()
         
         cursor.close()
@@ -1033,8 +2620,11 @@ def eliminar_tarea(tarea_id):
             return jsonify({'mensaje': 'Tarea no encontrada o ya eliminada'}), 404
         
         # Realizar soft delete
+        antes = filas_contables([tarea_id])
         sql = "UPDATE tareas SET estado = 'eliminada' WHERE id = %s"
         cursor.execute(sql, (tarea_id,))
+        ajustar_contadores(antes, [])
+        invalidar_tarea(tarea_id)
         conn.commit()
         
         print(f"✅ [SUCCESS] Tarea {tarea_id} eliminada exitosamente")
@@ -1050,45 +2640,86 @@ def eliminar_tarea(tarea_id):
         return jsonify({'error': 'Error al eliminar la tarea'}), 500
 
 @app.route('/tareas/area/<int:usuario_id>/<int:area_id>', methods=['GET'])
+@condicional(lambda usuario_id, **_: [clave_usuario(usuario_id)])
 def listar_tareas_area(usuario_id, area_id):
     tareas = obtener_tareas_area(usuario_id, area_id)
+    caducar_etag_con(tareas)
     return jsonify(tareas)
 
 @app.route('/areas/<int:usuario_id>', methods=['GET'])
+@condicional(lambda usuario_id, **_: [clave_usuario(usuario_id)])
 def listar_areas(usuario_id):
     areas = obtener_areas_usuario(usuario_id)
     return jsonify(areas)
 
+# Estadísticas por área agregando sobre tareas (sin contadores materializados)
+_AREAS_SQL_AGREGADAS = """
+    SELECT 
+        a.id,
+        a.nombre,
+        a.descripcion,
+        a.color,
+        a.icono,
+        a.estado,
+        a.fecha_creacion,
+        COALESCE(COUNT(t.id), 0) as total_tareas,
+        COALESCE(SUM(CASE WHEN t.estado = 'completada' THEN 1 ELSE 0 END), 0) as tareas_completadas,
+        COALESCE(SUM(CASE WHEN t.estado = 'pendiente' THEN 1 ELSE 0 END), 0) as tareas_pendientes,
+        COALESCE(SUM(CASE WHEN t.estado = 'vencida' THEN 1 ELSE 0 END), 0) as tareas_vencidas
+    FROM areas a
+    LEFT JOIN tareas t ON a.id = t.area_id AND t.estado != 'eliminada'
+    WHERE a.usuario_id = %s AND a.estado = %s
+    GROUP BY a.id, a.nombre, a.descripcion, a.color, a.icono, a.estado, a.fecha_creacion
+    ORDER BY a.fecha_creacion DESC
+"""
+
+# Las mismas columnas desde contadores_area: una fila por área, sin recorrer tareas
+_AREAS_SQL_CONTADORES = """
+    SELECT 
+        a.id,
+        a.nombre,
+        a.descripcion,
+        a.color,
+        a.icono,
+        a.estado,
+        a.fecha_creacion,
+        c.pendientes + c.completadas + c.vencidas as total_tareas,
+        c.completadas as tareas_completadas,
+        c.pendientes as tareas_pendientes,
+        c.vencidas as tareas_vencidas,
+        c.area_id as con_contador
+    FROM areas a
+    LEFT JOIN contadores_area c ON c.area_id = a.id
+    WHERE a.usuario_id = %s AND a.estado = %s
+    ORDER BY a.fecha_creacion DESC
+"""
+
+def obtener_areas_con_contadores(cursor, usuario_id, estado):
+    """Áreas del usuario en un estado con sus totales de tareas (cursor de diccionario)."""
+    if _CONTADORES_MATERIALIZADOS:
+        try:
+            cursor.execute(_AREAS_SQL_CONTADORES, [usuario_id, estado])
+            areas = cursor.fetchall()
+            _contar_contadores('lecturas')
+            if all(area.pop('con_contador') is not None for area in areas):
+                return areas
+            # Alguna área sin fila todavía (pendiente de reconciliar)
+            _contar_contadores('sin_fila')
+        except mysql.connector.Error as e:
+            _contar_contadores('errores')
+            logger.warning(f"[CONTADORES] Lectura de contadores de área falló, se agrega sobre tareas: {e}")
+    cursor.execute(_AREAS_SQL_AGREGADAS, [usuario_id, estado])
+    return cursor.fetchall()
+
 @app.route('/areas/<int:usuario_id>/con-tareas', methods=['GET'])
+@condicional(lambda usuario_id, **_: [clave_usuario(usuario_id)])
 def listar_areas_con_tareas(usuario_id):
     """Endpoint optimizado para obtener áreas con estadísticas de tareas incluidas"""
     try:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
-        # Consulta optimizada con JOIN para evitar N+1
-        query = """
-            SELECT 
-                a.id,
-                a.nombre,
-                a.descripcion,
-                a.color,
-                a.icono,
-                a.estado,
-                a.fecha_creacion,
-                COALESCE(COUNT(t.id), 0) as total_tareas,
-                COALESCE(SUM(CASE WHEN t.estado = 'completada' THEN 1 ELSE 0 END), 0) as tareas_completadas,
-                COALESCE(SUM(CASE WHEN t.estado = 'pendiente' THEN 1 ELSE 0 END), 0) as tareas_pendientes,
-                COALESCE(SUM(CASE WHEN t.estado = 'vencida' THEN 1 ELSE 0 END), 0) as tareas_vencidas
-            FROM areas a
-            LEFT JOIN tareas t ON a.id = t.area_id AND t.estado != 'eliminada'
-            WHERE a.usuario_id = %s AND a.estado = 'activa'
-            GROUP BY a.id, a.nombre, a.descripcion, a.color, a.icono, a.estado, a.fecha_creacion
-            ORDER BY a.fecha_creacion DESC
-        """
-        
-        cursor.execute(query, [usuario_id])
-        areas = cursor.fetchall()
+        areas = obtener_areas_con_contadores(cursor, usuario_id, 'activa')
         
         print(f"🔍 [DEBUG] Áreas con tareas para usuario {usuario_id}: {len(areas)}")
         for area in areas:
@@ -1110,6 +2741,8 @@ def eliminar_area(area_id):
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
+        invalidar_area(area_id)
+        registrar_eliminaciones('area', "SELECT id, usuario_id FROM areas WHERE id = %s", (area_id,))
         cursor.execute("DELETE FROM areas WHERE id = %s", (area_id,))
         conn.commit()
         cursor.close()
@@ -1136,6 +2769,7 @@ def cambiar_estado_area(area_id):
             conn.close()
             return jsonify({"error": "Área no encontrada"}), 404
         
+        invalidar_area(area_id)
         conn.commit()
         cursor.close()
         conn.close()
@@ -1195,6 +2829,7 @@ def actualizar_area(area_id):
             conn.close()
             return jsonify({"error": "Área no encontrada"}), 404
         
+        invalidar_area(area_id)
         conn.commit()
         cursor.close()
         conn.close()
@@ -1232,6 +2867,8 @@ def crear_grupo(creador_id, nombre, descripcion=None, color='#3b82f6', icono='fa
         # Agregar el creador como líder del grupo
         sql_miembro = "INSERT INTO miembros_grupo (grupo_id, usuario_id, rol) VALUES (%s, %s, 'lider')"
         cursor.execute(sql_miembro, (grupo_id, creador_id))
+        crear_fila_contadores('grupo_estadisticas', 'grupo_id', grupo_id)
+        ajustar_miembros_grupo(grupo_id, 1)
         
         # Si se proporcionó un área, asignarla como área personal del creador
         if area_id:
@@ -1243,6 +2880,7 @@ def crear_grupo(creador_id, nombre, descripcion=None, color='#3b82f6', icono='fa
             """
             cursor.execute(sql_area, (grupo_id, creador_id, area_id))
         
+        invalidar_usuarios(creador_id)
         conn.commit()
         cursor.close()
         conn.close()
@@ -1256,6 +2894,44 @@ def crear_grupo(creador_id, nombre, descripcion=None, color='#3b82f6', icono='fa
             conn.close()
         return None
 
+def _grupos_con_estadisticas(cursor, sql, params):
+    """Grupos leídos con LEFT JOIN a grupo_estadisticas (columna con_estadisticas), o None si
+    falta la tabla o la fila de algún grupo y hay que agregar sobre tareas."""
+    try:
+        cursor.execute(sql, params)
+        grupos = cursor.fetchall()
+    except mysql.connector.Error as e:
+        _contar_contadores('errores')
+        logger.warning(f"[CONTADORES] Lectura de grupo_estadisticas falló, se agrega sobre tareas: {e}")
+        return None
+    _contar_contadores('lecturas')
+    if any(grupo['con_estadisticas'] is None for grupo in grupos):
+        _contar_contadores('sin_fila')
+        return None
+    for grupo in grupos:
+        del grupo['con_estadisticas']
+    return grupos
+
+def _completar_tareas_hoy(cursor, grupos):
+    """tareas_hoy depende de la fecha: un rango por índice sobre las pendientes que vencen hoy."""
+    for grupo in grupos:
+        grupo['tareas_hoy'] = 0
+    if not grupos:
+        return
+    ids = [grupo['id'] for grupo in grupos]
+    cursor.execute(
+        f"""
+            SELECT grupo_id, COUNT(*) AS n FROM tareas
+            WHERE grupo_id IN ({_marcadores(len(ids))}) AND estado = 'pendiente'
+              AND fecha_vencimiento >= UTC_DATE() AND fecha_vencimiento < UTC_DATE() + INTERVAL 1 DAY
+            GROUP BY grupo_id
+        """,
+        ids
+    )
+    hoy = {fila['grupo_id']: fila['n'] for fila in cursor.fetchall()}
+    for grupo in grupos:
+        grupo['tareas_hoy'] = hoy.get(grupo['id'], 0)
+
 def obtener_grupos_usuario(usuario_id, incluir_archivados=False):
     """Obtener todos los grupos donde el usuario es miembro"""
     try:
@@ -1269,39 +2945,57 @@ def obtener_grupos_usuario(usuario_id, incluir_archivados=False):
         if not incluir_archivados:
             estado_condicion += " AND g.estado != 'archivado'"
         
-        sql = f"""
-            SELECT g.*, mg.rol, gau.area_id, a.nombre as area_nombre, a.color as area_color, a.icono as area_icono,
-                   (SELECT COUNT(*) FROM miembros_grupo WHERE grupo_id = g.id) as total_miembros,
-                   (SELECT COUNT(*) FROM tareas WHERE grupo_id = g.id AND estado = 'completada') as tareas_completadas,
-                   (SELECT COUNT(*) FROM tareas WHERE grupo_id = g.id AND estado = 'pendiente') as tareas_pendientes,
-                   (SELECT COUNT(*) FROM tareas WHERE grupo_id = g.id AND estado = 'vencida') as tareas_vencidas,
-                   (SELECT COUNT(*) FROM tareas WHERE grupo_id = g.id AND estado = 'pendiente' AND DATE(fecha_vencimiento) = UTC_DATE()) as tareas_hoy,
-                   (SELECT COUNT(*) FROM tareas WHERE grupo_id = g.id AND estado != 'eliminada') as total_tareas
-            FROM grupos g
-            INNER JOIN miembros_grupo mg ON g.id = mg.grupo_id
-            LEFT JOIN grupo_areas_usuario gau ON g.id = gau.grupo_id AND gau.usuario_id = %s
-            LEFT JOIN areas a ON gau.area_id = a.id
-            WHERE mg.usuario_id = %s {estado_condicion}
-            ORDER BY g.fecha_creacion DESC
-        """
-        
-        print(f"🔍 [DEBUG] SQL ejecutado: {sql}")
-        print(f"🔍 [DEBUG] Parámetros: usuario_id = {usuario_id}")
-        
-        cursor.execute(sql, (usuario_id, usuario_id))
-        grupos = cursor.fetchall()
+        grupos = None
+        if _CONTADORES_MATERIALIZADOS:
+            # Estadísticas mantenidas en grupo_estadisticas: coste independiente de las tareas del grupo
+            sql = f"""
+                SELECT g.*, mg.rol, gau.area_id, a.nombre as area_nombre, a.color as area_color, a.icono as area_icono,
+                       ge.miembros as total_miembros,
+                       ge.completadas as tareas_completadas,
+                       ge.pendientes as tareas_pendientes,
+                       ge.vencidas as tareas_vencidas,
+                       ge.pendientes + ge.completadas + ge.vencidas as total_tareas,
+                       ge.grupo_id as con_estadisticas
+                FROM grupos g
+                INNER JOIN miembros_grupo mg ON g.id = mg.grupo_id
+                LEFT JOIN grupo_areas_usuario gau ON g.id = gau.grupo_id AND gau.usuario_id = %s
+                LEFT JOIN areas a ON gau.area_id = a.id
+                LEFT JOIN grupo_estadisticas ge ON ge.grupo_id = g.id
+                WHERE mg.usuario_id = %s {estado_condicion}
+                ORDER BY g.fecha_creacion DESC
+            """
+            grupos = _grupos_con_estadisticas(cursor, sql, (usuario_id, usuario_id))
+            if grupos is not None:
+                _completar_tareas_hoy(cursor, grupos)
+        
+        if grupos is None:
+            sql = f"""
+                SELECT g.*, mg.rol, gau.area_id, a.nombre as area_nombre, a.color as area_color, a.icono as area_icono,
+                       (SELECT COUNT(*) FROM miembros_grupo WHERE grupo_id = g.id) as total_miembros,
+                       (SELECT COUNT(*) FROM tareas WHERE grupo_id = g.id AND estado = 'completada') as tareas_completadas,
+                       (SELECT COUNT(*) FROM tareas WHERE grupo_id = g.id AND estado = 'pendiente') as tareas_pendientes,
+                       (SELECT COUNT(*) FROM tareas WHERE grupo_id = g.id AND estado = 'vencida') as tareas_vencidas,
+                       (SELECT COUNT(*) FROM tareas WHERE grupo_id = g.id AND estado = 'pendiente' AND fecha_vencimiento >= UTC_DATE() AND fecha_vencimiento < UTC_DATE() + INTERVAL 1 DAY) as tareas_hoy,
+                       (SELECT COUNT(*) FROM tareas WHERE grupo_id = g.id AND estado != 'eliminada') as total_tareas
+                FROM grupos g
+                INNER JOIN miembros_grupo mg ON g.id = mg.grupo_id
+                LEFT JOIN grupo_areas_usuario gau ON g.id = gau.grupo_id AND gau.usuario_id = %s
+                LEFT JOIN areas a ON gau.area_id = a.id
+                WHERE mg.usuario_id = %s {estado_condicion}
+                ORDER BY g.fecha_creacion DESC
+            """
+            
+            print(f"🔍 [DEBUG] SQL ejecutado: {sql}")
+            print(f"🔍 [DEBUG] Parámetros: usuario_id = {usuario_id}")
+            
+            cursor.execute(sql, (usuario_id, usuario_id))
+            grupos = cursor.fetchall()
         
         print(f"🔍 [DEBUG] Resultado de la consulta: {len(grupos)} grupos encontrados")
         print(f"🔍 [DEBUG] Datos crudos de grupos:")
         for i, grupo in enumerate(grupos):
             print(f"   Grupo {i+1}: ID={grupo.get('id')}, Nombre={grupo.get('nombre')}, Estado={grupo.get('estado')}, Rol={grupo.get('rol')}")
         
-        # Convertir fechas a string
-        for grupo in grupos:
-            if grupo['fecha_creacion']:
-                if isinstance(grupo['fecha_creacion'], datetime):
-                    grupo['fecha_creacion'] = grupo['fecha_creacion'].strftime('%Y-%m-%dT%H:%M:%SZ')
-        
         cursor.close()
         conn.close()
         
@@ -1418,6 +3112,7 @@ def actualizar_grupo(grupo_id, nombre=None, descripcion=None, estado=None, color
         values.append(grupo_id)
         sql = f"UPDATE grupos SET {', '.join(updates)} WHERE id = %s"
         cursor.execute(sql, values)
+        invalidar_grupo(grupo_id)
         
         conn.commit()
         cursor.close()
@@ -1440,6 +3135,7 @@ def eliminar_grupo(grupo_id):
         
         # Soft delete - cambiar estado a 'eliminado'
         cursor.execute("UPDATE grupos SET estado = 'eliminado' WHERE id = %s", (grupo_id,))
+        invalidar_grupo(grupo_id)
         
         conn.commit()
         cursor.close()
@@ -1462,6 +3158,7 @@ def archivar_grupo(grupo_id):
         
         # Cambiar estado a 'archivado'
         cursor.execute("UPDATE grupos SET estado = 'archivado' WHERE id = %s", (grupo_id,))
+        invalidar_grupo(grupo_id)
         
         conn.commit()
         cursor.close()
@@ -1484,6 +3181,7 @@ def activar_grupo(grupo_id):
         
         # Cambiar estado a 'activo'
         cursor.execute("UPDATE grupos SET estado = 'activo' WHERE id = %s", (grupo_id,))
+        invalidar_grupo(grupo_id)
         
         conn.commit()
         cursor.close()
@@ -1517,22 +3215,91 @@ def buscar_usuario_por_email(email):
         print(f"❌ [ERROR] Error al buscar usuario por email: {e}")
         return None
 
-def verificar_miembro_grupo(grupo_id, usuario_id):
-    """Verificar si un usuario ya es miembro de un grupo"""
-    try:
+# Caché (grupo_id, usuario_id) -> (versión de 'roles_grupo:<id>', rol) para las verificaciones de
+# permisos. '' marca "no es miembro" (caché negativa). Cada cambio de miembros o roles sube esa
+# versión en la misma transacción (y solo eso: las escrituras de tareas del grupo no la tocan),
+# así que una entrada solo se usa si la versión actual coincide y ningún worker confía en un rol
+# anterior. La versión se lee una vez por unidad de trabajo; sin versiones, se consulta siempre.
+_SIN_ROL = ''
+_roles_cache = CacheLRU(int(os.getenv('ROLES_CACHE_MAX', '20000')), int(os.getenv('ROLES_CACHE_TTL', '30')))
+_metricas_roles = {'hits': 0, 'misses': 0, 'consultas': 0, 'invalidaciones': 0, 'sin_version': 0}
+_roles_lock = threading.Lock()
+
+def _version_roles(grupo_id):
+    """Versión de los roles del grupo, leída una sola vez por unidad de trabajo.
+
+    Se lee antes que los roles: una entrada nunca queda con datos más viejos que su versión.
+    """
+    uow = _unidad_de_trabajo_actual()
+    memo = uow.memo.setdefault('versiones_roles', {}) if uow is not None else {}
+    if grupo_id not in memo:
+        versiones = obtener_versiones([clave_roles_grupo(grupo_id)])
+        memo[grupo_id] = versiones[clave_roles_grupo(grupo_id)] if versiones is not None else None
+    return memo[grupo_id]
+
+def obtener_roles_grupo(grupo_id, usuario_ids):
+    """Rol de cada usuario en el grupo ({usuario_id: rol o None}) con una sola consulta para los no cacheados."""
+    version = _version_roles(grupo_id)
+    roles, faltantes = {}, []
+    for usuario_id in dict.fromkeys(int(u) for u in usuario_ids):
+        entrada = _roles_cache.obtener((grupo_id, usuario_id)) if version is not None else None
+        if entrada is None or entrada[0] != version:
+            faltantes.append(usuario_id)
+        else:
+            roles[usuario_id] = entrada[1] or None
+    with _roles_lock:
+        _metricas_roles['hits'] += len(roles)
+        _metricas_roles['misses'] += len(faltantes)
+        if version is None:
+            _metricas_roles['sin_version'] += 1
+    if faltantes:
         conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        sql = "SELECT COUNT(*) as count FROM miembros_grupo WHERE grupo_id = %s AND usuario_id = %s"
-        cursor.execute(sql, (grupo_id, usuario_id))
-        result = cursor.fetchone()
-        count = result['count'] if result else 0
-        
-        print(f"🔍 [DEBUG] verificar_miembro_grupo: grupo_id={grupo_id}, usuario_id={usuario_id}, count={count}")
-        
+        cursor = conn.cursor()
+        marcadores = ', '.join(['%s'] * len(faltantes))
+        cursor.execute(
+            f"SELECT usuario_id, rol FROM miembros_grupo WHERE grupo_id = %s AND usuario_id IN ({marcadores})",
+            [grupo_id, *faltantes]
+        )
+        encontrados = dict(cursor.fetchall())
         cursor.close()
         conn.close()
-        return count > 0
+        with _roles_lock:
+            _metricas_roles['consultas'] += 1
+        for usuario_id in faltantes:
+            rol = encontrados.get(usuario_id)
+            if version is not None:
+                _roles_cache.guardar((grupo_id, usuario_id), (version, rol or _SIN_ROL))
+            roles[usuario_id] = rol
+    return roles
+
+def obtener_rol_grupo(grupo_id, usuario_id):
+    return obtener_roles_grupo(grupo_id, [usuario_id]).get(int(usuario_id))
+
+def invalidar_roles(grupo_id, *usuario_ids):
+    """Sube la versión de roles del grupo (los demás workers dejan de usar sus roles cacheados) y
+    descarta los de este worker ahora y de nuevo tras el commit."""
+    incrementar_versiones(clave_roles_grupo(grupo_id))
+    claves = [(grupo_id, int(u)) for u in usuario_ids]
+    def _eliminar():
+        for clave in claves:
+            _roles_cache.eliminar(clave)
+    _eliminar()
+    with _roles_lock:
+        _metricas_roles['invalidaciones'] += len(claves)
+    uow = _unidad_de_trabajo_actual()
+    if uow is not None:
+        # La versión memorizada en esta unidad ya no es la vigente
+        uow.memo.get('versiones_roles', {}).pop(grupo_id, None)
+        uow.al_confirmar(_eliminar)
+
+def metricas_roles():
+    with _roles_lock:
+        return {'entradas': len(_roles_cache), 'ttl_s': _roles_cache.ttl_s, **_metricas_roles}
+
+def verificar_miembro_grupo(grupo_id, usuario_id):
+    """Verificar si un usuario ya es miembro de un grupo"""
+    try:
+        return obtener_rol_grupo(grupo_id, usuario_id) is not None
     except Exception as e:
         print(f"❌ [ERROR] Error al verificar miembro del grupo: {e}")
         return False
@@ -1540,16 +3307,7 @@ def verificar_miembro_grupo(grupo_id, usuario_id):
 def verificar_lider_grupo(grupo_id, usuario_id):
     """Verificar si un usuario es líder de un grupo"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT rol FROM miembros_grupo WHERE grupo_id = %s AND usuario_id = %s", (grupo_id, usuario_id))
-        resultado = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        
-        if resultado and resultado['rol'] == 'lider':
-            return True
-        return False
+        return obtener_rol_grupo(grupo_id, usuario_id) == 'lider'
     except Exception as e:
         print(f"❌ [ERROR] Error en verificar_lider_grupo: {e}")
         return False
@@ -1557,16 +3315,7 @@ def verificar_lider_grupo(grupo_id, usuario_id):
 def verificar_puede_crear_tareas(grupo_id, usuario_id):
     """Verificar si un usuario puede crear tareas (líder o administrador)"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT rol FROM miembros_grupo WHERE grupo_id = %s AND usuario_id = %s", (grupo_id, usuario_id))
-        resultado = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        
-        if resultado and resultado['rol'] in ['lider', 'administrador']:
-            return True
-        return False
+        return obtener_rol_grupo(grupo_id, usuario_id) in ('lider', 'administrador')
     except Exception as e:
         print(f"❌ [ERROR] Error en verificar_puede_crear_tareas: {e}")
         return False
@@ -1610,6 +3359,8 @@ def agregar_miembro_grupo(grupo_id, usuario_id, rol='miembro'):
         print(f"🔍 [DEBUG] Parámetros: grupo_id={grupo_id}, usuario_id={usuario_id}, rol={rol}")
         
         cursor.execute(sql, (grupo_id, usuario_id, rol))
+        invalidar_roles(grupo_id, usuario_id)
+        invalidar_usuarios(usuario_id)
         
         print(f"✅ [DEBUG] SQL ejecutado exitosamente")
         
@@ -1654,6 +3405,10 @@ def remover_miembro_grupo(grupo_id, usuario_id):
         # Remover miembro
         sql = "DELETE FROM miembros_grupo WHERE grupo_id = %s AND usuario_id = %s"
         cursor.execute(sql, (grupo_id, usuario_id))
+        if cursor.rowcount:
+            ajustar_miembros_grupo(grupo_id, -1)
+        invalidar_grupo(grupo_id, usuario_id)
+        invalidar_roles(grupo_id, usuario_id)
         
         conn.commit()
         cursor.close()
@@ -1718,6 +3473,8 @@ def cambiar_rol_miembro(grupo_id, usuario_id, nuevo_rol):
         # Verificar que se actualizó correctamente
         filas_afectadas = cursor.rowcount
         print(f"📋 [DEBUG] Filas afectadas por el UPDATE: {filas_afectadas}")
+        invalidar_usuarios(usuario_id)
+        invalidar_roles(grupo_id, usuario_id)
         
         print(f"🔍 [DEBUG] Haciendo commit...")
         conn.commit()
@@ -1770,6 +3527,28 @@ def obtener_usuarios_disponibles(grupo_id):
         return []
 
 # ===== FUNCIONES PARA NOTIFICACIONES =====
+# datos_adicionales se valida y serializa una sola vez al escribir; al leer, el JSON
+# guardado se incrusta tal cual en la respuesta (orjson.Fragment) sin parsearlo
+
+def _datos_notificacion_json(datos):
+    """JSON de datos_adicionales para guardar (None si no hay datos); valida el texto ya serializado."""
+    if not datos:
+        return None
+    if isinstance(datos, (str, bytes)):
+        # Texto ya serializado: se valida aquí porque al leer no se vuelve a parsear
+        (orjson.loads if _USE_ORJSON else json.loads)(datos)
+        return datos.decode() if isinstance(datos, bytes) else datos
+    return orjson.dumps(datos).decode() if _USE_ORJSON else json.dumps(datos)
+
+def _datos_notificacion_respuesta(datos):
+    if not datos:
+        return datos
+    if _USE_ORJSON:
+        return orjson.Fragment(bytes(datos) if isinstance(datos, bytearray) else datos)
+    try:
+        return json.loads(datos)
+    except ValueError:
+        return {}
 
 def crear_notificacion(usuario_id, tipo, titulo, mensaje, datos_adicionales=None):
     """Crear una nueva notificación para un usuario"""
@@ -1783,12 +3562,11 @@ def crear_notificacion(usuario_id, tipo, titulo, mensaje, datos_adicionales=None
         """
         
         # Convertir datos_adicionales a JSON string si existe
-        datos_json = None
-        if datos_adicionales:
-            datos_json = json.dumps(datos_adicionales)
+        datos_json = _datos_notificacion_json(datos_adicionales)
         
         cursor.execute(sql, (usuario_id, tipo, titulo, mensaje, datos_json))
         notificacion_id = cursor.lastrowid
+        invalidar_notificaciones(usuario_id)
         
         conn.commit()
         cursor.close()
@@ -1803,17 +3581,218 @@ def crear_notificacion(usuario_id, tipo, titulo, mensaje, datos_adicionales=None
             conn.close()
         return None
 
+def crear_notificaciones_lote(notificaciones):
+    """Crear varias notificaciones [(usuario_id, tipo, titulo, mensaje, datos_adicionales)] con INSERT multi-fila"""
+    if not notificaciones:
+        return 0
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        for i in range(0, len(notificaciones), _LOTE_INSERT):
+            lote = notificaciones[i:i + _LOTE_INSERT]
+            valores = []
+            for usuario_id, tipo, titulo, mensaje, datos in lote:
+                valores.extend((usuario_id, tipo, titulo, mensaje, _datos_notificacion_json(datos)))
+            cursor.execute(
+                "INSERT INTO notificaciones (usuario_id, tipo, titulo, mensaje, datos_adicionales) VALUES "
+                + ', '.join(['(%s, %s, %s, %s, %s)'] * len(lote)),
+                valores
+            )
+        invalidar_notificaciones(*{n[0] for n in notificaciones})
+        print(f"✅ [SUCCESS] {len(notificaciones)} notificaciones creadas")
+        return len(notificaciones)
+    finally:
+        cursor.close()
+        conn.close()
+
+# ===== COLA EN MEMORIA DE NOTIFICACIONES =====
+# Las notificaciones que generan las escrituras (asignaciones, invitaciones, membresías) se
+# encolan al confirmar la transacción y un hilo las escribe en lotes con INSERT multi-fila,
+# fuera de la latencia del request. La versión 'notificaciones:<id>' sube con ese commit,
+# así que SSE y ETag se enteran igual que antes.
+# No es un outbox: la cola vive en la memoria del worker y la entrega es "como mucho una vez".
+# Si el proceso muere (caída, OOM, SIGKILL) con trabajos encolados, o un trabajo falla también
+# escrito por separado ('perdidas' en las métricas), esas notificaciones no se escriben; la escritura que las originó
+# ya está confirmada y sigue visible en su listado. Con NOTIFICACIONES_COLA_MAX=0 se escriben
+# en el propio request, dentro de su transacción, a cambio de la latencia.
+
+_COLA_NOTIF_MAX = int(os.getenv('NOTIFICACIONES_COLA_MAX', '1000'))
+_COLA_NOTIF_HILOS = max(1, int(os.getenv('NOTIFICACIONES_COLA_HILOS', '1')))
+_COLA_NOTIF_LOTE = max(1, int(os.getenv('NOTIFICACIONES_COLA_LOTE', '100')))
+_COLA_NOTIF_ESPERA_S = max(0, int(os.getenv('NOTIFICACIONES_COLA_ESPERA_MS', '50'))) / 1000
+
+class _ColaNotificaciones:
+    """Cola acotada en memoria de trabajos construir() -> [(usuario_id, tipo, titulo, mensaje, datos)].
+
+    Entrega como mucho una vez: lo encolado se pierde si el worker muere antes de escribirlo.
+    """
+
+    def __init__(self):
+        self._cola = queue.Queue(maxsize=max(1, _COLA_NOTIF_MAX))
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._hilos = []
+        self._pid = None
+        self._metricas = {'encoladas': 0, 'escritas': 0, 'lotes': 0, 'sincronas': 0, 'errores': 0, 'perdidas': 0,
+                          'profundidad_max': 0, 'ultimo_flush_ms': None, 'flush_ms_max': 0, 'espera_ms_max': 0}
+
+    def encolar(self, construir):
+        if not self._parar.is_set():
+            self._iniciar()
+            try:
+                self._cola.put_nowait((time.monotonic(), construir))
+            except queue.Full:
+                pass
+            else:
+                with self._lock:
+                    self._metricas['encoladas'] += 1
+                    self._metricas['profundidad_max'] = max(self._metricas['profundidad_max'], self._cola.qsize())
+                return
+        # Cola llena o worker cerrándose: escribir aquí (contrapresión en vez de perderlas)
+        with self._lock:
+            self._metricas['sincronas'] += 1
+        with unidad_de_trabajo('cola_notificaciones_sincrona'):
+            crear_notificaciones_lote(construir())
+
+    def _iniciar(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._hilos = [
+                threading.Thread(target=self._bucle, name=f'cola-notificaciones-{i}', daemon=True)
+                for i in range(_COLA_NOTIF_HILOS)
+            ]
+            self._pid = os.getpid()
+            for hilo in self._hilos:
+                hilo.start()
+
+    def _bucle(self):
+        while True:
+            try:
+                primero = self._cola.get(timeout=0.5)
+            except queue.Empty:
+                if self._parar.is_set():
+                    return
+                continue
+            # Se escribe al llenar el lote o al pasar la espera desde el primer trabajo
+            lote = [primero]
+            limite = time.monotonic() + _COLA_NOTIF_ESPERA_S
+            while len(lote) < _COLA_NOTIF_LOTE:
+                restante = 0 if self._parar.is_set() else limite - time.monotonic()
+                try:
+                    lote.append(self._cola.get(timeout=restante) if restante > 0 else self._cola.get_nowait())
+                except queue.Empty:
+                    break
+            self._escribir(lote)
+
+    def _escribir(self, lote):
+        t0 = time.perf_counter()
+        # Nombres de grupo leídos una vez por escritura, aunque varios trabajos los pidan
+        grupos = {}
+        try:
+            escritas = self._escribir_trabajos(lote, grupos)
+        except Exception as e:
+            # Una fila inválida (p. ej. usuario borrado: clave foránea) tumba el INSERT multi-fila:
+            # se repite trabajo por trabajo y solo se pierde el que falla
+            with self._lock:
+                self._metricas['errores'] += 1
+            logger.warning(f"[NOTIFICACIONES] Lote de {len(lote)} trabajos fallido, se escriben por separado: {e}")
+            time.sleep(0.2)
+            escritas = 0
+            for trabajo in lote:
+                try:
+                    escritas += self._escribir_trabajos([trabajo], grupos)
+                except Exception as e:
+                    with self._lock:
+                        self._metricas['errores'] += 1
+                        self._metricas['perdidas'] += 1
+                    logger.error(f"[NOTIFICACIONES] Trabajo de notificaciones perdido: {e}")
+        ahora = time.monotonic()
+        ms = round((time.perf_counter() - t0) * 1000, 1)
+        with self._lock:
+            self._metricas['lotes'] += 1
+            self._metricas['escritas'] += escritas
+            self._metricas['ultimo_flush_ms'] = ms
+            self._metricas['flush_ms_max'] = max(self._metricas['flush_ms_max'], ms)
+            espera = max((ahora - encolado) * 1000 for encolado, _ in lote)
+            self._metricas['espera_ms_max'] = max(self._metricas['espera_ms_max'], round(espera, 1))
+
+    def _escribir_trabajos(self, trabajos, grupos):
+        """Construye y escribe `trabajos` en una transacción; retorna las notificaciones escritas."""
+        with unidad_de_trabajo('cola_notificaciones') as uow:
+            uow.memo['grupos'] = grupos
+            filas = []
+            for _, construir in trabajos:
+                try:
+                    filas.extend(construir())
+                except (PoolSaturado, mysql.connector.Error):
+                    raise
+                except Exception as e:
+                    with self._lock:
+                        self._metricas['errores'] += 1
+                    logger.warning(f"[NOTIFICACIONES] Notificación descartada: {e}")
+            crear_notificaciones_lote(filas)
+        return len(filas)
+
+    def detener(self, timeout=10):
+        """Deja de aceptar trabajos y espera a que los hilos vacíen la cola."""
+        self._parar.set()
+        limite = time.monotonic() + timeout
+        for hilo in self._hilos:
+            hilo.join(max(0, limite - time.monotonic()))
+        return self._cola.qsize()
+
+    def metricas(self):
+        with self._lock:
+            return {
+                'max': _COLA_NOTIF_MAX,
+                'hilos': _COLA_NOTIF_HILOS,
+                'lote': _COLA_NOTIF_LOTE,
+                'profundidad': self._cola.qsize(),
+                'activo': any(h.is_alive() for h in self._hilos),
+                **self._metricas,
+            }
+
+_cola_notificaciones = _ColaNotificaciones()
+
+def encolar_notificaciones(construir):
+    """Escribe las notificaciones de construir() en segundo plano, solo si la unidad actual se confirma."""
+    if _COLA_NOTIF_MAX <= 0:
+        try:
+            return crear_notificaciones_lote(construir())
+        except PoolSaturado:
+            raise
+        except Exception as e:
+            # Como antes: un fallo de la notificación no revierte la escritura principal
+            logger.warning(f"[NOTIFICACIONES] Error al crear notificaciones: {e}")
+            return 0
+    uow = _unidad_de_trabajo_actual()
+    if uow is None:
+        _cola_notificaciones.encolar(construir)
+    else:
+        uow.al_confirmar(lambda: _cola_notificaciones.encolar(construir))
+
+def detener_cola_notificaciones(timeout=10):
+    pendientes = _cola_notificaciones.detener(timeout)
+    if pendientes:
+        logger.warning(f"[NOTIFICACIONES] {pendientes} notificaciones sin escribir al cerrar")
+
+def metricas_cola_notificaciones():
+    return _cola_notificaciones.metricas()
+
+def _formatear_notificacion(notif):
+    notif['datos_adicionales'] = _datos_notificacion_respuesta(notif['datos_adicionales'])
+    return notif
+
 def obtener_notificaciones_usuario(usuario_id, solo_no_leidas=False):
     """Obtener notificaciones de un usuario"""
     try:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
-        sql = """
-            SELECT id, tipo, titulo, mensaje, datos_adicionales, leida, fecha_creacion
-            FROM notificaciones 
-            WHERE usuario_id = %s
-        """
+        sql = _SQL_NOTIFICACIONES_SELECT + " WHERE usuario_id = %s"
         
         if solo_no_leidas:
             sql += " AND leida = FALSE"
@@ -1825,15 +3804,7 @@ def obtener_notificaciones_usuario(usuario_id, solo_no_leidas=False):
         
         # Convertir fechas a string y parsear JSON
         for notif in notificaciones:
-            if notif['fecha_creacion']:
-                if isinstance(notif['fecha_creacion'], datetime):
-                    notif['fecha_creacion'] = notif['fecha_creacion'].strftime('%Y-%m-%dT%H:%M:%SZ')
-            
-            if notif['datos_adicionales']:
-                try:
-                    notif['datos_adicionales'] = json.loads(notif['datos_adicionales'])
-                except:
-                    notif['datos_adicionales'] = {}
+            _formatear_notificacion(notif)
         
         cursor.close()
         conn.close()
@@ -1842,14 +3813,102 @@ def obtener_notificaciones_usuario(usuario_id, solo_no_leidas=False):
         print(f"❌ [ERROR] Error al obtener notificaciones: {e}")
         return []
 
+_SQL_NOTIFICACIONES_SELECT = """
+    SELECT id, tipo, titulo, mensaje, datos_adicionales, leida, fecha_creacion
+    FROM notificaciones
+"""
+
+def obtener_notificaciones_pagina(usuario_id, limit=50, despues=None, solo_no_leidas=False):
+    """Página de notificaciones desde el cursor, por (usuario_id[, leida], fecha_creacion, id)."""
+    limit = max(1, min(int(limit), _PAGINA_MAX))
+    filtro, params_filtro = _filtro_keyset(despues)
+    # Solo no leídas: rango del índice (usuario_id, leida, fecha_creacion, id)
+    leida = "AND leida = FALSE" if solo_no_leidas else ""
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(_SQL_NOTIFICACIONES_SELECT + f"""
+            WHERE usuario_id = %s {leida} {filtro}
+            ORDER BY fecha_creacion DESC, id DESC
+            LIMIT %s
+        """, (usuario_id, *params_filtro, limit + 1))
+        notificaciones, next_cursor = _cortar_pagina(cursor.fetchall(), limit)
+    finally:
+        cursor.close()
+        conn.close()
+    for notif in notificaciones:
+        _formatear_notificacion(notif)
+    return notificaciones, next_cursor
+
+# Retención: las leídas con más de N días pasan a notificaciones_archivo (misma estructura,
+# creada con LIKE por scripts/apply_schema.py) para que la tabla caliente no crezca sin límite
+_NOTIF_RETENCION_DIAS = int(os.getenv('NOTIFICACIONES_RETENCION_DIAS', '90'))
+_NOTIF_ARCHIVO_LOTE = int(os.getenv('NOTIFICACIONES_ARCHIVO_LOTE', '500'))
+_NOTIF_ARCHIVO_MAX_LOTES = int(os.getenv('NOTIFICACIONES_ARCHIVO_MAX_LOTES', '10'))
+_metricas_archivo = {'ejecuciones': 0, 'lotes': 0, 'archivadas': 0}
+_archivo_lock = threading.Lock()
+
+# Columnas explícitas: si las tablas llegan a diferir, el INSERT falla en vez de desalinear datos
+_COLUMNAS_NOTIFICACION = "id, usuario_id, tipo, titulo, mensaje, datos_adicionales, leida, fecha_creacion"
+
+def archivar_notificaciones(lote=None, max_lotes=None):
+    """Mueve notificaciones leídas antiguas al archivo, un lote por transacción (0 días lo desactiva)."""
+    if _NOTIF_RETENCION_DIAS <= 0:
+        return 0
+    lote = lote or _NOTIF_ARCHIVO_LOTE
+    total = 0
+    for _ in range(max_lotes or _NOTIF_ARCHIVO_MAX_LOTES):
+        with unidad_de_trabajo('archivar_notificaciones'):
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            # Índice (leida, fecha_creacion): solo se recorren las candidatas
+            cursor.execute("""
+                SELECT id, usuario_id FROM notificaciones
+                WHERE leida = TRUE AND fecha_creacion < UTC_TIMESTAMP() - INTERVAL %s DAY
+                ORDER BY fecha_creacion
+                LIMIT %s
+                FOR UPDATE
+            """, (_NOTIF_RETENCION_DIAS, lote))
+            filas = cursor.fetchall()
+            if filas:
+                ids = [fila[0] for fila in filas]
+                # INSERT sin IGNORE: un id ya archivado aborta el lote (y su DELETE) en vez de perder la fila
+                cursor.execute(
+                    f"INSERT INTO notificaciones_archivo ({_COLUMNAS_NOTIFICACION}) "
+                    f"SELECT {_COLUMNAS_NOTIFICACION} FROM notificaciones WHERE id IN ({_marcadores(len(ids))})",
+                    ids
+                )
+                cursor.execute(f"DELETE FROM notificaciones WHERE id IN ({_marcadores(len(ids))})", ids)
+                invalidar_notificaciones(*{fila[1] for fila in filas})
+            conn.commit()
+            cursor.close()
+            conn.close()
+        total += len(filas)
+        with _archivo_lock:
+            _metricas_archivo['lotes'] += 1
+        if len(filas) < lote:
+            break
+    with _archivo_lock:
+        _metricas_archivo['ejecuciones'] += 1
+        _metricas_archivo['archivadas'] += total
+    if total:
+        logger.info(f"[NOTIFICACIONES] {total} notificaciones leídas archivadas")
+    return total
+
+def metricas_archivo_notificaciones():
+    with _archivo_lock:
+        return {'retencion_dias': _NOTIF_RETENCION_DIAS, **_metricas_archivo}
+
 def marcar_notificacion_leida(notificacion_id):
     """Marcar una notificación como leída"""
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        sql = "UPDATE notificaciones SET leida = TRUE WHERE id = %s"
+        sql = "UPDATE notificaciones SET leida = TRUE WHERE id = %s AND leida = FALSE"
         cursor.execute(sql, (notificacion_id,))
+        if cursor.rowcount:
+            invalidar_notificaciones(*_ids_por_consulta("SELECT usuario_id FROM notificaciones WHERE id = %s", (notificacion_id,)))
         
         conn.commit()
         cursor.close()
@@ -1870,8 +3929,11 @@ def marcar_todas_notificaciones_leidas(usuario_id):
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        sql = "UPDATE notificaciones SET leida = TRUE WHERE usuario_id = %s"
+        # Solo las no leídas (índice (usuario_id, leida, ...)): no reescribir filas ya leídas
+        sql = "UPDATE notificaciones SET leida = TRUE WHERE usuario_id = %s AND leida = FALSE"
         cursor.execute(sql, (usuario_id,))
+        if cursor.rowcount:
+            invalidar_notificaciones(usuario_id)
         
         conn.commit()
         cursor.close()
@@ -1892,6 +3954,7 @@ def eliminar_notificacion(notificacion_id):
         conn = get_db_connection()
         cursor = conn.cursor()
         
+        invalidar_notificaciones(*_ids_por_consulta("SELECT usuario_id FROM notificaciones WHERE id = %s", (notificacion_id,)))
         sql = "DELETE FROM notificaciones WHERE id = %s"
         cursor.execute(sql, (notificacion_id,))
         
@@ -1908,6 +3971,53 @@ def eliminar_notificacion(notificacion_id):
             conn.close()
         return False
 
+_NOTIF_LOTE_MAX_IDS = 1000
+
+def operar_notificaciones_lote(usuario_id, accion, ids=None, tipo=None, antes=None, solo_leidas=False):
+    """Marca como leídas ('leer') o elimina ('eliminar') por lista de ids o por filtro, en bloques.
+
+    Retorna (afectadas, no_leidas) con el contador ya actualizado en la misma transacción.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    afectadas = 0
+    try:
+        if accion == 'leer':
+            base = "UPDATE notificaciones SET leida = TRUE WHERE usuario_id = %s AND leida = FALSE"
+        else:
+            base = "DELETE FROM notificaciones WHERE usuario_id = %s" + (" AND leida = TRUE" if solo_leidas else "")
+        if ids is not None:
+            for i in range(0, len(ids), _LOTE_INSERT):
+                bloque = ids[i:i + _LOTE_INSERT]
+                cursor.execute(f"{base} AND id IN ({_marcadores(len(bloque))})", (usuario_id, *bloque))
+                afectadas += cursor.rowcount
+        else:
+            filtro, params = "", []
+            if tipo:
+                filtro += " AND tipo = %s"
+                params.append(tipo)
+            if antes:
+                filtro += " AND fecha_creacion < %s"
+                params.append(antes)
+            # Bloques acotados con LIMIT para no retener muchos bloqueos de fila a la vez
+            while True:
+                cursor.execute(f"{base}{filtro} LIMIT %s", (usuario_id, *params, _LOTE_INSERT))
+                afectadas += cursor.rowcount
+                if cursor.rowcount < _LOTE_INSERT:
+                    break
+        if afectadas:
+            invalidar_notificaciones(usuario_id)
+        cursor.execute("SELECT COUNT(*) FROM notificaciones WHERE usuario_id = %s AND leida = FALSE", (usuario_id,))
+        no_leidas = cursor.fetchone()[0]
+        conn.commit()
+        return afectadas, no_leidas
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
 def contar_notificaciones_no_leidas(usuario_id):
     """Contar notificaciones no leídas de un usuario"""
     try:
@@ -1926,21 +4036,30 @@ def contar_notificaciones_no_leidas(usuario_id):
         return 0
 
 # ===== FUNCIONES ESPECÍFICAS DE NOTIFICACIONES DE GRUPOS =====
+# Cada notificar_* encola un construir() en la cola de notificaciones: el nombre del grupo
+# se consulta en el hilo de la cola, no en el request
+
+def _grupo_para_notificar(grupo_id):
+    """Fila del grupo, consultada una vez por unidad de trabajo (la cola comparte una por escritura)."""
+    uow = _unidad_de_trabajo_actual()
+    grupos = uow.memo.setdefault('grupos', {}) if uow is not None else {}
+    if grupo_id not in grupos:
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute("SELECT nombre FROM grupos WHERE id = %s", (grupo_id,))
+            grupos[grupo_id] = cursor.fetchone()
+        finally:
+            cursor.close()
+            conn.close()
+    return grupos[grupo_id]
 
 def notificar_invitacion_grupo(grupo_id, usuario_id, rol):
     """Crear notificación cuando se invita a un usuario a un grupo"""
-    try:
-        # Obtener información del grupo
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT nombre FROM grupos WHERE id = %s", (grupo_id,))
-        grupo = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        
+    def construir():
+        grupo = _grupo_para_notificar(grupo_id)
         if not grupo:
-            return False
-        
+            return []
         titulo = f"Nueva invitación a grupo"
         mensaje = f"Has sido invitado al grupo '{grupo['nombre']}' como {rol}. Revisa tus invitaciones para aceptar o rechazar."
         datos = {
@@ -1949,26 +4068,16 @@ def notificar_invitacion_grupo(grupo_id, usuario_id, rol):
             'rol': rol,
             'tipo': 'grupo_invitacion'
         }
-        
-        return crear_notificacion(usuario_id, 'grupo_invitacion', titulo, mensaje, datos)
-    except Exception as e:
-        print(f"❌ [ERROR] Error al crear notificación de invitación: {e}")
-        return None
+        return [(usuario_id, 'grupo_invitacion', titulo, mensaje, datos)]
+    encolar_notificaciones(construir)
+    return True
 
 def notificar_cambio_rol(grupo_id, usuario_id, nuevo_rol):
     """Crear notificación cuando cambia el rol de un usuario"""
-    try:
-        # Obtener información del grupo
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT nombre FROM grupos WHERE id = %s", (grupo_id,))
-        grupo = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        
+    def construir():
+        grupo = _grupo_para_notificar(grupo_id)
         if not grupo:
-            return False
-        
+            return []
         titulo = f"Cambio de rol en grupo"
         mensaje = f"Tu rol en el grupo '{grupo['nombre']}' ha cambiado a {nuevo_rol}."
         datos = {
@@ -1977,26 +4086,16 @@ def notificar_cambio_rol(grupo_id, usuario_id, nuevo_rol):
             'nuevo_rol': nuevo_rol,
             'tipo': 'grupo_rol_cambio'
         }
-        
-        return crear_notificacion(usuario_id, 'grupo_rol_cambio', titulo, mensaje, datos)
-    except Exception as e:
-        print(f"❌ [ERROR] Error al crear notificación de cambio de rol: {e}")
-        return None
+        return [(usuario_id, 'grupo_rol_cambio', titulo, mensaje, datos)]
+    encolar_notificaciones(construir)
+    return True
 
 def notificar_remocion_grupo(grupo_id, usuario_id):
     """Crear notificación cuando se remueve un usuario de un grupo"""
-    try:
-        # Obtener información del grupo
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT nombre FROM grupos WHERE id = %s", (grupo_id,))
-        grupo = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        
+    def construir():
+        grupo = _grupo_para_notificar(grupo_id)
         if not grupo:
-            return False
-        
+            return []
         titulo = f"Removido de grupo"
         mensaje = f"Has sido removido del grupo '{grupo['nombre']}'."
         datos = {
@@ -2004,26 +4103,16 @@ def notificar_remocion_grupo(grupo_id, usuario_id):
             'grupo_nombre': grupo['nombre'],
             'tipo': 'grupo_removido'
         }
-        
-        return crear_notificacion(usuario_id, 'grupo_removido', titulo, mensaje, datos)
-    except Exception as e:
-        print(f"❌ [ERROR] Error al crear notificación de remoción: {e}")
-        return None
+        return [(usuario_id, 'grupo_removido', titulo, mensaje, datos)]
+    encolar_notificaciones(construir)
+    return True
 
 def notificar_tarea_asignada(tarea_id, grupo_id, usuario_id, titulo_tarea):
     """Crear notificación cuando se asigna una tarea a un usuario"""
-    try:
-        # Obtener información del grupo
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT nombre FROM grupos WHERE id = %s", (grupo_id,))
-        grupo = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        
+    def construir():
+        grupo = _grupo_para_notificar(grupo_id)
         if not grupo:
-            return False
-        
+            return []
         titulo = f"Nueva tarea asignada"
         mensaje = f"Te han asignado la tarea '{titulo_tarea}' en el grupo '{grupo['nombre']}'."
         datos = {
@@ -2033,11 +4122,31 @@ def notificar_tarea_asignada(tarea_id, grupo_id, usuario_id, titulo_tarea):
             'titulo_tarea': titulo_tarea,
             'tipo': 'tarea_asignada'
         }
-        
-        return crear_notificacion(usuario_id, 'tarea_asignada', titulo, mensaje, datos)
-    except Exception as e:
-        print(f"❌ [ERROR] Error al crear notificación de tarea asignada: {e}")
-        return None
+        return [(usuario_id, 'tarea_asignada', titulo, mensaje, datos)]
+    encolar_notificaciones(construir)
+    return True
+
+def notificar_tareas_asignadas(tareas_asignadas, grupo_id, titulo_tarea):
+    """Notificar varias asignaciones [(tarea_id, usuario_id)] de un grupo: una consulta y un INSERT"""
+    if not tareas_asignadas:
+        return 0
+    def construir():
+        grupo = _grupo_para_notificar(grupo_id)
+        if not grupo:
+            return []
+        mensaje = f"Te han asignado la tarea '{titulo_tarea}' en el grupo '{grupo['nombre']}'."
+        return [
+            (usuario_id, 'tarea_asignada', "Nueva tarea asignada", mensaje, {
+                'tarea_id': tarea_id,
+                'grupo_id': grupo_id,
+                'grupo_nombre': grupo['nombre'],
+                'titulo_tarea': titulo_tarea,
+                'tipo': 'tarea_asignada'
+            })
+            for tarea_id, usuario_id in tareas_asignadas
+        ]
+    encolar_notificaciones(construir)
+    return len(tareas_asignadas)
 
 # ===== ENDPOINTS PARA GRUPOS =====
 
@@ -2071,6 +4180,7 @@ def crear_grupo_endpoint():
         return jsonify({'error': 'Error al crear el grupo'}), 500
 
 @app.route('/grupos/<int:usuario_id>', methods=['GET'])
+@condicional(lambda usuario_id, **_: claves_usuario_y_grupos(usuario_id))
 def listar_grupos(usuario_id):
     try:
         grupos = obtener_grupos_usuario(usuario_id, incluir_archivados=False)
@@ -2089,6 +4199,7 @@ def listar_grupos(usuario_id):
         return jsonify({'error': str(e)}), 500
 
 @app.route('/grupos/<int:usuario_id>/con-estadisticas', methods=['GET'])
+@condicional(lambda usuario_id, **_: claves_usuario_y_grupos(usuario_id))
 def listar_grupos_con_estadisticas(usuario_id):
     """Endpoint optimizado para obtener grupos con estadísticas de tareas incluidas"""
     try:
@@ -2096,6 +4207,39 @@ def listar_grupos_con_estadisticas(usuario_id):
         cursor = conn.cursor(dictionary=True)
         
         # Obtener grupos con estadísticas de tareas y información completa
+        grupos = None
+        if _CONTADORES_MATERIALIZADOS:
+            grupos = _grupos_con_estadisticas(cursor, """
+                SELECT 
+                    g.id,
+                    g.nombre,
+                    g.descripcion,
+                    g.color,
+                    g.icono,
+                    g.estado,
+                    g.fecha_creacion,
+                    g.creador_id,
+                    mg.rol,
+                    gau.area_id,
+                    a.nombre as area_nombre,
+                    a.color as area_color,
+                    a.icono as area_icono,
+                    ge.miembros as total_miembros,
+                    ge.pendientes + ge.completadas + ge.vencidas as total_tareas,
+                    ge.completadas as tareas_completadas,
+                    ge.pendientes as tareas_pendientes,
+                    ge.vencidas as tareas_vencidas,
+                    ge.grupo_id as con_estadisticas
+                FROM grupos g
+                INNER JOIN miembros_grupo mg ON g.id = mg.grupo_id
+                LEFT JOIN grupo_areas_usuario gau ON g.id = gau.grupo_id AND gau.usuario_id = %s
+                LEFT JOIN areas a ON gau.area_id = a.id
+                LEFT JOIN grupo_estadisticas ge ON ge.grupo_id = g.id
+                WHERE g.estado = 'activo'
+                AND mg.usuario_id = %s
+                ORDER BY g.fecha_creacion DESC
+            """, [usuario_id, usuario_id])
+        
         query_grupos = """
             SELECT 
                 g.id,
@@ -2127,8 +4271,9 @@ def listar_grupos_con_estadisticas(usuario_id):
             ORDER BY g.fecha_creacion DESC
         """
         
-        cursor.execute(query_grupos, [usuario_id, usuario_id])
-        grupos = cursor.fetchall()
+        if grupos is None:
+            cursor.execute(query_grupos, [usuario_id, usuario_id])
+            grupos = cursor.fetchall()
         
         print(f"🔍 [DEBUG] Grupos activos con estadísticas para usuario {usuario_id}: {len(grupos)}")
         for grupo in grupos:
@@ -2260,6 +4405,7 @@ def activar_grupo_endpoint(grupo_id):
         return jsonify({'error': 'Error al activar el grupo'}), 500
 
 @app.route('/grupos/<int:usuario_id>/archivados', methods=['GET'])
+@condicional(lambda usuario_id, **_: claves_usuario_y_grupos(usuario_id))
 def listar_grupos_archivados(usuario_id):
     """Obtener grupos archivados del usuario"""
     try:
@@ -2443,6 +4589,8 @@ def cambiar_rol_miembro_endpoint(grupo_id, usuario_id):
         # Verificar que se actualizó correctamente
         filas_afectadas = cursor.rowcount
         print(f"📋 [DEBUG] Filas afectadas por el UPDATE: {filas_afectadas}")
+        invalidar_usuarios(usuario_id)
+        invalidar_roles(grupo_id, usuario_id)
         
         conn.commit()
         cursor.close()
@@ -2491,18 +4639,6 @@ def listar_miembros_completos(grupo_id):
         
         print(f"📦 [DEBUG] Miembros encontrados: {len(miembros)}")
         
-        # Convertir fechas a string de forma más segura
-        for miembro in miembros:
-            if miembro['fecha_union']:
-                try:
-                    if isinstance(miembro['fecha_union'], datetime):
-                        miembro['fecha_union'] = miembro['fecha_union'].strftime('%Y-%m-%dT%H:%M:%SZ')
-                    else:
-                        miembro['fecha_union'] = str(miembro['fecha_union'])
-                except Exception as date_error:
-                    print(f"⚠️ [WARNING] Error al convertir fecha: {date_error}")
-                    miembro['fecha_union'] = str(miembro['fecha_union'])
-        
         cursor.close()
         conn.close()
         
@@ -2555,10 +4691,21 @@ def debug_usuarios():
 # ===== ENDPOINTS PARA NOTIFICACIONES =====
 
 @app.route('/notificaciones/<int:usuario_id>', methods=['GET'])
+@condicional(lambda usuario_id: [clave_notificaciones(usuario_id)])
 def listar_notificaciones(usuario_id):
     """Obtener notificaciones de un usuario"""
     try:
         solo_no_leidas = request.args.get('solo_no_leidas', 'false').lower() == 'true'
+        # ?cursor= (vacío en la primera página) activa la paginación por cursor
+        cursor_param = request.args.get('cursor')
+        if cursor_param is not None:
+            try:
+                despues = decodificar_cursor(cursor_param) if cursor_param else None
+                limit = int(request.args.get('limit', 50))
+            except ValueError:
+                return jsonify({'error': 'Cursor inválido'}), 400
+            notificaciones, next_cursor = obtener_notificaciones_pagina(usuario_id, limit, despues, solo_no_leidas)
+            return jsonify({'notificaciones': notificaciones, 'next_cursor': next_cursor})
         notificaciones = obtener_notificaciones_usuario(usuario_id, solo_no_leidas)
         return jsonify(notificaciones)
     except Exception as e:
@@ -2604,15 +4751,354 @@ def eliminar_notificacion_endpoint(notificacion_id):
         print(f"❌ [ERROR] Error en eliminar_notificacion_endpoint: {e}")
         return jsonify({'error': 'Error al eliminar notificación'}), 500
 
-@app.route('/notificaciones/<int:usuario_id>/contar-no-leidas', methods=['GET'])
-def contar_notificaciones_no_leidas_endpoint(usuario_id):
-    """Contar notificaciones no leídas de un usuario"""
+def _operar_notificaciones_lote_endpoint(usuario_id, accion):
+    data = request.get_json(silent=True) or {}
+    ids = data.get('ids')
+    tipo = data.get('tipo')
+    antes = data.get('antes')
+    solo_leidas = bool(data.get('solo_leidas'))
+    if ids is not None:
+        if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            return jsonify({'error': 'ids debe ser una lista de enteros'}), 400
+        if len(ids) > _NOTIF_LOTE_MAX_IDS:
+            return jsonify({'error': f'Máximo {_NOTIF_LOTE_MAX_IDS} ids por petición'}), 400
+        ids = sorted(set(ids))
+    if tipo is not None and not isinstance(tipo, str):
+        return jsonify({'error': 'tipo inválido'}), 400
+    if antes:
+        try:
+            antes = datetime.fromisoformat(str(antes).replace('Z', '+00:00'))
+        except ValueError:
+            return jsonify({'error': 'antes debe ser una fecha ISO 8601'}), 400
+        if antes.tzinfo is not None:
+            antes = antes.astimezone(timezone.utc).replace(tzinfo=None)
+    if accion == 'eliminar' and ids is None and not (tipo or antes or solo_leidas):
+        return jsonify({'error': 'Indica ids o algún filtro (tipo, antes, solo_leidas)'}), 400
+    afectadas, no_leidas = operar_notificaciones_lote(usuario_id, accion, ids, tipo, antes, solo_leidas)
+    return jsonify({'afectadas': afectadas, 'no_leidas': no_leidas})
+
+@app.route('/notificaciones/<int:usuario_id>/leer-lote', methods=['POST'])
+def marcar_notificaciones_lote_endpoint(usuario_id):
+    """Marcar como leídas varias notificaciones (ids o filtro tipo/antes); sin nada, todas"""
+    try:
+        return _operar_notificaciones_lote_endpoint(usuario_id, 'leer')
+    except Exception as e:
+        print(f"❌ [ERROR] Error en marcar_notificaciones_lote_endpoint: {e}")
+        return jsonify({'error': 'Error al marcar notificaciones como leídas'}), 500
+
+@app.route('/notificaciones/<int:usuario_id>/eliminar-lote', methods=['POST'])
+def eliminar_notificaciones_lote_endpoint(usuario_id):
+    """Eliminar varias notificaciones (ids o filtro tipo/antes/solo_leidas)"""
+    try:
+        return _operar_notificaciones_lote_endpoint(usuario_id, 'eliminar')
+    except Exception as e:
+        print(f"❌ [ERROR] Error en eliminar_notificaciones_lote_endpoint: {e}")
+        return jsonify({'error': 'Error al eliminar notificaciones'}), 500
+
+@app.route('/notificaciones/<int:usuario_id>/contar-no-leidas', methods=['GET'])
+@condicional(lambda usuario_id: [clave_notificaciones(usuario_id)])
+def contar_notificaciones_no_leidas_endpoint(usuario_id):
+    """Contar notificaciones no leídas de un usuario"""
+    try:
+        count = contar_notificaciones_no_leidas(usuario_id)
+        return jsonify({'count': count})
+    except Exception as e:
+        print(f"❌ [ERROR] Error en contar_notificaciones_no_leidas_endpoint: {e}")
+        return jsonify({'error': 'Error al contar notificaciones'}), 500
+
+# ===== NOTIFICACIONES EN TIEMPO REAL (SSE) =====
+# /notificaciones/<id>/stream mantiene abierta una respuesta text/event-stream por pestaña y
+# empuja el contador de no leídas y las notificaciones nuevas, en lugar del sondeo cada 30s.
+# Un hub por worker recibe los cambios de la clave 'notificaciones:<usuario>':
+# - escrituras en este worker: el oyente de invalidación lo marca tras el commit;
+# - escrituras en otros workers: su hilo lee de versiones_datos (por clave primaria) la versión
+#   de cada usuario suscrito y la compara con la última vista; sin ventanas de tiempo, un commit
+#   tardío se detecta igual en el siguiente sondeo.
+# El mismo hilo calcula contador y novedades una vez por usuario y las reparte a sus pestañas.
+# Cada stream ocupa un hilo de gunicorn mientras está abierto (esperando en su cola, sin
+# conexión a MySQL). gunicorn.conf.py suma SSE_MAX_SUSCRIPTORES a GUNICORN_THREADS, de modo
+# que los streams tienen hilos propios y las peticiones normales conservan los suyos aunque
+# todos estén abiertos. El límite por worker es deliberado: la capacidad total es
+# SSE_MAX_SUSCRIPTORES x WEB_CONCURRENCY pestañas; las que no caben reciben 503 con Retry-After
+# y el frontend vuelve al sondeo. 0 lo desactiva. tests/test_sse_stream.py abre 2000 conexiones
+# reales contra un worker.
+_SSE_MAX_SUSCRIPTORES = int(os.getenv('SSE_MAX_SUSCRIPTORES', '100'))
+_SSE_SONDEO_S = int(os.getenv('SSE_SONDEO_MS', '500')) / 1000.0
+_SSE_LATIDO_S = int(os.getenv('SSE_LATIDO_SEGUNDOS', '25'))
+_SSE_DURACION_S = int(os.getenv('SSE_DURACION_SEGUNDOS', '300'))
+_SSE_COLA_MAX = 100
+_SSE_CLAVES_POR_SONDEO = 500
+_SSE_USUARIOS_POR_DESPACHO = 200
+
+def _evento_sse(evento, datos, id_evento=None):
+    cabecera = f"id: {id_evento}\n" if id_evento is not None else ""
+    return f"{cabecera}event: {evento}\ndata: {app.json.dumps(datos)}\n\n"
+
+class _Suscriptor:
+    def __init__(self, usuario_id):
+        self.usuario_id = usuario_id
+        self.cola = queue.Queue(maxsize=_SSE_COLA_MAX)
+
+class _HubNotificaciones:
+    """Suscriptores SSE de este worker y el hilo que les despacha los cambios."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._suscriptores = {}     # usuario_id -> set(_Suscriptor)
+        self._estado = {}           # usuario_id -> {'count': n, 'ultimo_id': n}
+        self._pendientes = set()    # usuarios marcados por escrituras de este worker
+        self._versiones_vistas = {}  # usuario_id -> versión vista en versiones_datos
+        self._despertar = threading.Event()
+        self._parar = threading.Event()
+        self._hilo = None
+        self._pid = None
+        self._metricas = {'suscripciones': 0, 'rechazadas': 0, 'eventos': 0, 'descartados': 0,
+                          'despachos': 0, 'sondeos': 0, 'errores': 0}
+
+    def _contar(self, clave, n=1):
+        with self._lock:
+            self._metricas[clave] += n
+
+    def suscribir(self, usuario_id):
+        """Registra una pestaña. El estado inicial se lee después (estado_inicial): así ningún
+        despacho cae entre la lectura y el alta sin llegar a la pestaña nueva."""
+        with self._lock:
+            total = sum(len(s) for s in self._suscriptores.values())
+            if total >= _SSE_MAX_SUSCRIPTORES or self._parar.is_set():
+                self._metricas['rechazadas'] += 1
+                return None
+            sub = _Suscriptor(usuario_id)
+            self._suscriptores.setdefault(usuario_id, set()).add(sub)
+            self._metricas['suscripciones'] += 1
+        self._iniciar()
+        return sub
+
+    def estado_inicial(self, usuario_id, count, ultimo_id):
+        """Punto de partida del hub para un usuario sin otras pestañas (si ya tenía, se conserva el suyo)."""
+        with self._lock:
+            if usuario_id in self._suscriptores:
+                self._estado.setdefault(usuario_id, {'count': count, 'ultimo_id': ultimo_id})
+
+    def desuscribir(self, sub):
+        with self._lock:
+            subs = self._suscriptores.get(sub.usuario_id)
+            if subs is None or sub not in subs:
+                return
+            subs.discard(sub)
+            if not subs:
+                del self._suscriptores[sub.usuario_id]
+                self._estado.pop(sub.usuario_id, None)
+                self._versiones_vistas.pop(sub.usuario_id, None)
+
+    def marcar(self, usuario_ids):
+        with self._lock:
+            usuarios = {u for u in usuario_ids if u in self._suscriptores}
+            self._pendientes |= usuarios
+        if usuarios:
+            self._despertar.set()
+
+    def detenido(self):
+        return self._parar.is_set()
+
+    def detener(self):
+        self._parar.set()
+        self._despertar.set()
+        with self._lock:
+            subs = [sub for s in self._suscriptores.values() for sub in s]
+        for sub in subs:
+            try:
+                sub.cola.put_nowait(None)
+            except queue.Full:
+                pass
+
+    def _iniciar(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._hilo = threading.Thread(target=self._bucle, name='sse-notificaciones', daemon=True)
+            self._pid = os.getpid()
+            self._hilo.start()
+
+    def _bucle(self):
+        while not self._parar.is_set():
+            self._despertar.wait(_SSE_SONDEO_S)
+            self._despertar.clear()
+            with self._lock:
+                hay_suscriptores = bool(self._suscriptores)
+            if not hay_suscriptores:
+                continue
+            try:
+                remotos = self._sondear() if _versiones.transaccional else set()
+                with self._lock:
+                    usuarios = (self._pendientes | remotos) & self._suscriptores.keys()
+                    self._pendientes.clear()
+                if usuarios:
+                    self._despachar(usuarios)
+            except Exception as e:
+                self._contar('errores')
+                logger.warning(f"[SSE] Despacho fallido: {e}")
+
+    def _sondear(self):
+        """Usuarios suscritos cuya versión de notificaciones cambió en cualquier worker."""
+        with self._lock:
+            usuarios = list(self._suscriptores)
+        versiones = {}
+        with unidad_de_trabajo('sse_sondeo'):
+            for i in range(0, len(usuarios), _SSE_CLAVES_POR_SONDEO):
+                bloque = usuarios[i:i + _SSE_CLAVES_POR_SONDEO]
+                actuales = _versiones.obtener([clave_notificaciones(u) for u in bloque])
+                versiones.update((u, actuales[clave_notificaciones(u)]) for u in bloque)
+        self._contar('sondeos')
+        cambiados = set()
+        with self._lock:
+            for usuario_id, version in versiones.items():
+                # Sin versión vista (recién suscrito): despachar igual, el despacho no repite eventos
+                if usuario_id in self._suscriptores and self._versiones_vistas.get(usuario_id) != version:
+                    self._versiones_vistas[usuario_id] = version
+                    cambiados.add(usuario_id)
+        return cambiados
+
+    def _despachar(self, usuarios):
+        """Contador y notificaciones nuevas de los usuarios: dos consultas por bloque de usuarios,
+        calculadas una vez para todas sus pestañas."""
+        with self._lock:
+            estados = {u: self._estado[u] for u in usuarios if u in self._estado}
+            # Recién suscritos cuyo estado inicial aún se está leyendo: al siguiente despacho
+            self._pendientes |= {u for u in usuarios if u not in estados and u in self._suscriptores}
+        ids = sorted(estados)
+        with unidad_de_trabajo('sse_despacho'):
+            conn = get_db_connection()
+            cursor = conn.cursor(dictionary=True)
+            try:
+                for i in range(0, len(ids), _SSE_USUARIOS_POR_DESPACHO):
+                    bloque = ids[i:i + _SSE_USUARIOS_POR_DESPACHO]
+                    cursor.execute(f"""
+                        SELECT usuario_id, COUNT(*) AS n FROM notificaciones
+                        WHERE usuario_id IN ({_marcadores(len(bloque))}) AND leida = FALSE
+                        GROUP BY usuario_id
+                    """, bloque)
+                    counts = {fila['usuario_id']: fila['n'] for fila in cursor.fetchall()}
+                    # Un rango (usuario_id, id > último enviado) por usuario
+                    cursor.execute(f"""
+                        SELECT usuario_id, id, tipo, titulo, mensaje, datos_adicionales, leida, fecha_creacion
+                        FROM notificaciones
+                        WHERE {' OR '.join(['(usuario_id = %s AND id > %s)'] * len(bloque))}
+                        ORDER BY usuario_id, id
+                    """, [valor for u in bloque for valor in (u, estados[u]['ultimo_id'])])
+                    nuevas = {}
+                    for fila in cursor.fetchall():
+                        lista = nuevas.setdefault(fila.pop('usuario_id'), [])
+                        if len(lista) < _SSE_COLA_MAX // 2:
+                            lista.append(fila)
+                    for usuario_id in bloque:
+                        estado, count, filas = estados[usuario_id], counts.get(usuario_id, 0), nuevas.get(usuario_id, [])
+                        eventos = [_evento_sse('notificacion', _formatear_notificacion(n), n['id']) for n in filas]
+                        if count != estado['count'] or eventos:
+                            eventos.append(_evento_sse('contador', {'count': count}))
+                        if filas:
+                            estado['ultimo_id'] = filas[-1]['id']
+                        estado['count'] = count
+                        self._publicar(usuario_id, eventos)
+            finally:
+                cursor.close()
+                conn.close()
+        self._contar('despachos')
+
+    def _publicar(self, usuario_id, eventos):
+        if not eventos:
+            return
+        with self._lock:
+            subs = list(self._suscriptores.get(usuario_id, ()))
+        for sub in subs:
+            for evento in eventos:
+                try:
+                    sub.cola.put_nowait(evento)
+                except queue.Full:
+                    # Pestaña que no consume: el siguiente contador la pone al día
+                    self._contar('descartados')
+        self._contar('eventos', len(eventos) * len(subs))
+
+    def metricas(self):
+        with self._lock:
+            return {
+                'max_suscriptores': _SSE_MAX_SUSCRIPTORES,
+                'suscriptores': sum(len(s) for s in self._suscriptores.values()),
+                'usuarios': len(self._suscriptores),
+                'activo': self._hilo is not None and self._hilo.is_alive(),
+                **self._metricas,
+            }
+
+_hub_notificaciones = _HubNotificaciones()
+
+def _oyente_notificaciones(claves):
+    usuarios = [int(c.split(':', 1)[1]) for c in claves if c.startswith('notificaciones:')]
+    if usuarios:
+        _hub_notificaciones.marcar(usuarios)
+
+_oyentes_invalidacion.append(_oyente_notificaciones)
+
+def detener_notificaciones_sse():
+    _hub_notificaciones.detener()
+
+def metricas_sse():
+    return _hub_notificaciones.metricas()
+
+def _stream_notificaciones(sub, inicial):
+    yield f"retry: 3000\n\n"
+    yield inicial
+    # Duración acotada: el navegador reconecta solo y el hilo no queda ocupado indefinidamente
+    fin = time.monotonic() + _SSE_DURACION_S
+    while not _hub_notificaciones.detenido():
+        restante = fin - time.monotonic()
+        if restante <= 0:
+            break
+        try:
+            evento = sub.cola.get(timeout=min(_SSE_LATIDO_S, restante))
+        except queue.Empty:
+            # Mantiene viva la conexión en proxies y detecta clientes desconectados
+            yield ": latido\n\n"
+            continue
+        if evento is None:
+            break
+        yield evento
+
+@app.route('/notificaciones/<int:usuario_id>/stream', methods=['GET'])
+def stream_notificaciones(usuario_id):
+    """Contador de no leídas y notificaciones nuevas como Server-Sent Events"""
+    if _SSE_MAX_SUSCRIPTORES <= 0:
+        return jsonify({'error': 'Notificaciones en tiempo real no disponibles'}), 503
+    # Alta antes de leer el estado inicial: lo que se despache desde ahora llega a esta pestaña,
+    # y el contador inicial ya incluye lo anterior
+    sub = _hub_notificaciones.suscribir(usuario_id)
+    if sub is None:
+        response = jsonify({'error': 'Demasiadas conexiones en tiempo real'})
+        response.status_code = 503
+        response.headers['Retry-After'] = '60'
+        return response
+    # Estado inicial en la conexión del request; se devuelve al pool antes de abrir el stream
     try:
-        count = contar_notificaciones_no_leidas(usuario_id)
-        return jsonify({'count': count})
-    except Exception as e:
-        print(f"❌ [ERROR] Error en contar_notificaciones_no_leidas_endpoint: {e}")
-        return jsonify({'error': 'Error al contar notificaciones'}), 500
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT COUNT(*) FROM notificaciones WHERE usuario_id = %s AND leida = FALSE", (usuario_id,))
+            count = cursor.fetchone()[0]
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM notificaciones WHERE usuario_id = %s", (usuario_id,))
+            ultimo_id = cursor.fetchone()[0]
+        finally:
+            cursor.close()
+            conn.close()
+    except Exception:
+        _hub_notificaciones.desuscribir(sub)
+        raise
+    _hub_notificaciones.estado_inicial(usuario_id, count, ultimo_id)
+    response = app.response_class(_stream_notificaciones(sub, _evento_sse('contador', {'count': count})),
+                                  mimetype='text/event-stream')
+    # También si el cliente se va antes de recibir el primer evento
+    response.call_on_close(lambda: _hub_notificaciones.desuscribir(sub))
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 # ===== ENDPOINT DE DEBUG =====
 
@@ -2664,6 +5150,7 @@ def debug_grupos_usuario(usuario_id):
 # ===== ENDPOINTS PARA TAREAS EN GRUPOS =====
 
 @app.route('/grupos/<int:grupo_id>/tareas', methods=['GET'])
+@condicional(lambda grupo_id: [clave_grupo(grupo_id)])
 def listar_tareas_grupo(grupo_id):
     """Obtener todas las tareas de un grupo"""
     try:
@@ -2677,13 +5164,30 @@ def listar_tareas_grupo(grupo_id):
         except Exception:
             offset = 0
 
+        cursor_param = request.args.get('cursor')
+        if cursor_param is not None:
+            try:
+                despues = decodificar_cursor(cursor_param) if cursor_param else None
+            except ValueError:
+                return jsonify({'error': 'Cursor inválido'}), 400
+            tareas, next_cursor = obtener_tareas_grupo_pagina(grupo_id, limit=limit, despues=despues)
+            caducar_etag_con(tareas)
+            return jsonify({'tareas': tareas, 'next_cursor': next_cursor})
+
         tareas = obtener_tareas_grupo(grupo_id, limit=limit, offset=offset)
+        caducar_etag_con(tareas)
         return jsonify(tareas)
     except Exception as e:
         print(f"❌ [ERROR] Error en listar_tareas_grupo: {e}")
         return jsonify({'error': 'Error al obtener tareas del grupo'}), 500
 
+def _firma_tarea_grupo(data, grupo_id):
+    asignados_ids = data.get('asignados_ids')
+    destino = sorted(asignados_ids) if asignados_ids and isinstance(asignados_ids, list) else data.get('asignado_a_id')
+    return f"/grupos/{grupo_id}/tareas:{data.get('usuario_id')}:{data.get('titulo')}:{data.get('descripcion', '')}:{destino}:{data.get('fecha_vencimiento')}"
+
 @app.route('/grupos/<int:grupo_id>/tareas', methods=['POST'])
+@idempotente(_firma_tarea_grupo)
 def crear_tarea_grupo(grupo_id):
     """Crear una nueva tarea en un grupo"""
     try:
@@ -2705,16 +5209,10 @@ def crear_tarea_grupo(grupo_id):
         
         # Si se usa asignación múltiple
         if asignados_ids and isinstance(asignados_ids, list):
-            # Idempotencia: firmar solicitud múltiple
-            try:
-                sig_multi = f"/grupos/{grupo_id}/tareas:{usuario_id}:{titulo}:{descripcion}:{sorted(asignados_ids)}:{fecha_vencimiento}"
-                if _is_duplicate_request(sig_multi):
-                    return jsonify({'mensaje': 'Solicitud ya procesada recientemente', 'tareas_creadas': 0})
-            except Exception:
-                pass
-            # Verificar que todos los usuarios asignados sean miembros del grupo
+            # Verificar que todos los usuarios asignados sean miembros del grupo (una consulta)
+            roles_asignados = obtener_roles_grupo(grupo_id, asignados_ids)
             for asignado_id in asignados_ids:
-                if not verificar_miembro_grupo(grupo_id, asignado_id):
+                if roles_asignados.get(int(asignado_id)) is None:
                     return jsonify({'error': f'El usuario {asignado_id} no es miembro del grupo'}), 403
             
             task_ids = crear_tarea_grupo_multiple(usuario_id, titulo, descripcion, grupo_id, asignados_ids, area_id, fecha_vencimiento)
@@ -2733,14 +5231,7 @@ def crear_tarea_grupo(grupo_id):
             # Si se asigna a alguien, verificar que sea miembro del grupo
             if asignado_a_id and not verificar_miembro_grupo(grupo_id, asignado_a_id):
                 return jsonify({'error': 'El usuario asignado no es miembro del grupo'}), 403
-            
-            # Idempotencia: firmar solicitud individual
-            try:
-                sig_single = f"/grupos/{grupo_id}/tareas:{usuario_id}:{titulo}:{descripcion}:{asignado_a_id}:{fecha_vencimiento}"
-                if _is_duplicate_request(sig_single):
-                    return jsonify({'mensaje': 'Solicitud ya procesada recientemente'}), 200
-            except Exception:
-                pass
+
 
             task_id = crear_tarea(usuario_id, titulo, descripcion, area_id, grupo_id, asignado_a_id, fecha_vencimiento)
             
@@ -2865,6 +5356,8 @@ def test_cambiar_rol(grupo_id, usuario_id, nuevo_rol):
         # Verificar que se actualizó correctamente
         filas_afectadas = cursor.rowcount
         print(f"📋 [TEST] Filas afectadas por el UPDATE: {filas_afectadas}")
+        invalidar_usuarios(usuario_id)
+        invalidar_roles(grupo_id, usuario_id)
         
         conn.commit()
         cursor.close()
@@ -2903,18 +5396,6 @@ def listar_miembros_detallados(grupo_id):
         
         print(f"📦 [DEBUG] Miembros encontrados: {len(miembros)}")
         
-        # Convertir fechas a string de forma más segura
-        for miembro in miembros:
-            if miembro['fecha_union']:
-                try:
-                    if isinstance(miembro['fecha_union'], datetime):
-                        miembro['fecha_union'] = miembro['fecha_union'].strftime('%Y-%m-%dT%H:%M:%SZ')
-                    else:
-                        miembro['fecha_union'] = str(miembro['fecha_union'])
-                except Exception as date_error:
-                    print(f"⚠️ [WARNING] Error al convertir fecha: {date_error}")
-                    miembro['fecha_union'] = str(miembro['fecha_union'])
-        
         cursor.close()
         conn.close()
         
@@ -2961,6 +5442,8 @@ def aceptar_invitacion_grupo(invitacion_id, usuario_id, area_id=None):
         
         try:
             cursor.execute(sql, (grupo_id, usuario_id, rol))
+            ajustar_miembros_grupo(grupo_id, 1)
+            invalidar_roles(grupo_id, usuario_id)
             print(f"✅ [DEBUG] Usuario {usuario_id} agregado como {rol} al grupo {grupo_id}")
         except Exception as e:
             print(f"❌ [DEBUG] Error al insertar miembro: {e}")
@@ -2980,6 +5463,8 @@ def aceptar_invitacion_grupo(invitacion_id, usuario_id, area_id=None):
         
         # Marcar invitación como aceptada
         cursor.execute("UPDATE invitaciones_grupo SET estado = 'aceptada', fecha_respuesta = UTC_TIMESTAMP() WHERE id = %s", (invitacion_id,))
+        # El nuevo miembro cambia el número de miembros que ven todos en su dashboard
+        invalidar_grupo(grupo_id)
         
         print(f"🔍 [DEBUG] Realizando commit...")
         conn.commit()
@@ -3022,6 +5507,7 @@ def rechazar_invitacion_grupo(invitacion_id, usuario_id):
         
         # Marcar invitación como rechazada
         cursor.execute("UPDATE invitaciones_grupo SET estado = 'rechazada', fecha_respuesta = UTC_TIMESTAMP() WHERE id = %s", (invitacion_id,))
+        invalidar_usuarios(usuario_id)
         
         conn.commit()
         cursor.close()
@@ -3126,18 +5612,10 @@ def obtener_todas_invitaciones_usuario(usuario_id):
 
 def notificar_aceptacion_invitacion(grupo_id, usuario_id, rol):
     """Crear notificación cuando se acepta una invitación"""
-    try:
-        # Obtener información del grupo
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT nombre FROM grupos WHERE id = %s", (grupo_id,))
-        grupo = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        
+    def construir():
+        grupo = _grupo_para_notificar(grupo_id)
         if not grupo:
-            return False
-        
+            return []
         titulo = f"Invitación aceptada"
         mensaje = f"Has aceptado la invitación al grupo '{grupo['nombre']}' como {rol}."
         datos = {
@@ -3146,26 +5624,16 @@ def notificar_aceptacion_invitacion(grupo_id, usuario_id, rol):
             'rol': rol,
             'tipo': 'grupo_invitacion_aceptada'
         }
-        
-        return crear_notificacion(usuario_id, 'grupo_invitacion_aceptada', titulo, mensaje, datos)
-    except Exception as e:
-        print(f"❌ [ERROR] Error al crear notificación de aceptación: {e}")
-        return None
+        return [(usuario_id, 'grupo_invitacion_aceptada', titulo, mensaje, datos)]
+    encolar_notificaciones(construir)
+    return True
 
 def notificar_rechazo_invitacion(grupo_id, usuario_id):
     """Crear notificación cuando se rechaza una invitación"""
-    try:
-        # Obtener información del grupo
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT nombre FROM grupos WHERE id = %s", (grupo_id,))
-        grupo = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        
+    def construir():
+        grupo = _grupo_para_notificar(grupo_id)
         if not grupo:
-            return False
-        
+            return []
         titulo = f"Invitación rechazada"
         mensaje = f"Has rechazado la invitación al grupo '{grupo['nombre']}'."
         datos = {
@@ -3173,12 +5641,9 @@ def notificar_rechazo_invitacion(grupo_id, usuario_id):
             'grupo_nombre': grupo['nombre'],
             'tipo': 'grupo_invitacion_rechazada'
         }
-        
-        return crear_notificacion(usuario_id, 'grupo_invitacion_rechazada', titulo, mensaje, datos)
-    except Exception as e:
-        print(f"❌ [ERROR] Error al crear notificación de rechazo: {e}")
-        return None
-
+        return [(usuario_id, 'grupo_invitacion_rechazada', titulo, mensaje, datos)]
+    encolar_notificaciones(construir)
+    return True
 @app.route('/invitaciones/<int:invitacion_id>/aceptar', methods=['PUT'])
 def aceptar_invitacion_endpoint(invitacion_id):
     """Aceptar una invitación a un grupo"""
@@ -3240,6 +5705,7 @@ def archivar_invitacion_endpoint(invitacion_id):
         
         # Cambiar estado a 'archivada'
         cursor.execute("UPDATE invitaciones_grupo SET estado = 'archivada' WHERE id = %s", (invitacion_id,))
+        invalidar_invitacion(invitacion_id)
         conn.commit()
         
         # Crear notificación para el usuario
@@ -3273,6 +5739,7 @@ def desarchivar_invitacion_endpoint(invitacion_id):
         
         # Cambiar estado a 'pendiente'
         cursor.execute("UPDATE invitaciones_grupo SET estado = 'pendiente' WHERE id = %s", (invitacion_id,))
+        invalidar_invitacion(invitacion_id)
         conn.commit()
         
         cursor.close()
@@ -3289,38 +5756,27 @@ def desarchivar_invitacion_endpoint(invitacion_id):
 
 def notificar_invitacion_archivada(invitacion_id):
     """Crear notificación cuando se archiva una invitación"""
-    try:
+    def construir():
         conn = get_db_connection()
         cursor = conn.cursor()
-        
-        # Obtener información de la invitación
-        cursor.execute("""
-            SELECT i.usuario_id, g.nombre as grupo_nombre, g.creador_id
-            FROM invitaciones_grupo i
-            JOIN grupos g ON i.grupo_id = g.id
-            WHERE i.id = %s
-        """, (invitacion_id,))
-        
-        invitacion = cursor.fetchone()
-        if invitacion:
-            usuario_id = invitacion[0]
-            grupo_nombre = invitacion[1]
-            
-            # Crear notificación
-            mensaje = f"Invitación al grupo '{grupo_nombre}' archivada para revisar más tarde"
+        try:
+            # Obtener información de la invitación
             cursor.execute("""
-                INSERT INTO notificaciones (usuario_id, tipo, mensaje, leida, fecha_creacion)
-                VALUES (%s, 'invitacion_archivada', %s, FALSE, UTC_TIMESTAMP())
-            """, (usuario_id, mensaje))
-            
-            conn.commit()
-            print(f"✅ [SUCCESS] Notificación creada para usuario {usuario_id}: Invitación archivada")
-        
-        cursor.close()
-        conn.close()
-        
-    except Exception as e:
-        print(f"❌ [ERROR] Error al crear notificación de invitación archivada: {e}")
+                SELECT i.usuario_id, g.nombre as grupo_nombre
+                FROM invitaciones_grupo i
+                JOIN grupos g ON i.grupo_id = g.id
+                WHERE i.id = %s
+            """, (invitacion_id,))
+            invitacion = cursor.fetchone()
+        finally:
+            cursor.close()
+            conn.close()
+        if not invitacion:
+            return []
+        usuario_id, grupo_nombre = invitacion
+        mensaje = f"Invitación al grupo '{grupo_nombre}' archivada para revisar más tarde"
+        return [(usuario_id, 'invitacion_archivada', "Invitación archivada", mensaje, None)]
+    encolar_notificaciones(construir)
 
 def limpiar_invitaciones_duplicadas():
     """Limpiar invitaciones de usuarios que ya son miembros del grupo"""
@@ -3522,35 +5978,14 @@ def get_task_evidence(task_id):
         return jsonify({'error': str(e)}), 500
 
 @app.route('/areas/<int:usuario_id>/archivadas', methods=['GET'])
+@condicional(lambda usuario_id, **_: [clave_usuario(usuario_id)])
 def listar_areas_archivadas(usuario_id):
     """Endpoint para obtener áreas archivadas del usuario"""
     try:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
-        # Consulta para áreas archivadas
-        query = """
-            SELECT 
-                a.id,
-                a.nombre,
-                a.descripcion,
-                a.color,
-                a.icono,
-                a.estado,
-                a.fecha_creacion,
-                COALESCE(COUNT(t.id), 0) as total_tareas,
-                COALESCE(SUM(CASE WHEN t.estado = 'completada' THEN 1 ELSE 0 END), 0) as tareas_completadas,
-                COALESCE(SUM(CASE WHEN t.estado = 'pendiente' THEN 1 ELSE 0 END), 0) as tareas_pendientes,
-                COALESCE(SUM(CASE WHEN t.estado = 'vencida' THEN 1 ELSE 0 END), 0) as tareas_vencidas
-            FROM areas a
-            LEFT JOIN tareas t ON a.id = t.area_id AND t.estado != 'eliminada'
-            WHERE a.usuario_id = %s AND a.estado = 'archivada'
-            GROUP BY a.id, a.nombre, a.descripcion, a.color, a.icono, a.estado, a.fecha_creacion
-            ORDER BY a.fecha_creacion DESC
-        """
-        
-        cursor.execute(query, [usuario_id])
-        areas = cursor.fetchall()
+        areas = obtener_areas_con_contadores(cursor, usuario_id, 'archivada')
         
         print(f"🔍 [DEBUG] Áreas archivadas para usuario {usuario_id}: {len(areas)}")
         for area in areas:
@@ -3565,137 +6000,504 @@ def listar_areas_archivadas(usuario_id):
         print(f"❌ Error en listar_areas_archivadas: {e}")
         return jsonify({'error': str(e)}), 500
 
+# ===== SINCRONIZACIÓN INCREMENTAL (/sync) =====
+# El cliente guarda un token opaco (usuario, versión de datos, hora de la BD) y en cada
+# sondeo recibe solo lo que cambió desde entonces:
+# - tareas y áreas por su columna actualizado_en (ON UPDATE), incluidas las eliminadas
+#   lógicamente (estado 'eliminada'); los borrados físicos de áreas dejan una lápida en
+#   la tabla eliminaciones.
+# - grupos: la lista completa (son pocos por usuario) solo si cambió algún grupo del
+#   usuario (grupos.actualizado_en, grupo_estadisticas.actualizado) o su versión de datos.
+# Si la versión del usuario no cambió, tareas y áreas no se consultan.
+_SYNC_MARGEN_S = int(os.getenv('SYNC_MARGEN_SEGUNDOS', '5'))
+_SYNC_RETENCION_DIAS = int(os.getenv('SYNC_RETENCION_DIAS', '30'))
+_metricas_sync = {'completas': 0, 'sin_cambios': 0, 'incrementales': 0, 'errores': 0}
+_sync_lock = threading.Lock()
+
+def _contar_sync(clave):
+    with _sync_lock:
+        _metricas_sync[clave] += 1
+
+def _token_sync(usuario_id, version, ahora):
+    datos = json.dumps({'u': int(usuario_id), 'v': version, 't': ahora.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3]})
+    return base64.urlsafe_b64encode(datos.encode()).decode().rstrip('=')
+
+def _leer_token_sync(token, usuario_id):
+    """(versión, hora) del token, o None si falta, no es válido o es de otro usuario."""
+    if not token:
+        return None
+    try:
+        datos = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        if int(datos['u']) != int(usuario_id):
+            return None
+        return datos.get('v'), datetime.strptime(datos['t'], '%Y-%m-%dT%H:%M:%S.%f')
+    except Exception:
+        return None
+
+def registrar_eliminaciones(entidad, sql_ids_usuario, params):
+    """Lápidas para borrados físicos: sql_ids_usuario devuelve (id, usuario_id) de lo que se borra.
+
+    Va en la transacción del borrado y sus errores se propagan: un borrado sin lápida
+    nunca llegaría a los clientes de /sync, así que falla con ella.
+    """
+    if _unidad_de_trabajo_actual() is None:
+        raise RuntimeError("registrar_eliminaciones requiere la unidad de trabajo del borrado")
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"INSERT INTO eliminaciones (entidad, entidad_id, usuario_id) SELECT %s, x.* FROM ({sql_ids_usuario}) x", (entidad, *params))
+    finally:
+        cursor.close()
+        conn.close()
+
+def purgar_eliminaciones():
+    """Borra lápidas más antiguas que la retención (un token más viejo recibe una sincronización completa)."""
+    with unidad_de_trabajo('purgar_eliminaciones'):
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            "DELETE FROM eliminaciones WHERE eliminado_en < UTC_TIMESTAMP(3) - INTERVAL %s DAY LIMIT 5000",
+            (_SYNC_RETENCION_DIAS,)
+        )
+        conn.commit()
+        cursor.close()
+        conn.close()
+
+_SQL_SYNC_TAREAS_TODAS = _SQL_TAREAS_USUARIO_SELECT + '''
+    WHERE t.estado != 'eliminada' AND (t.usuario_id = %s OR t.asignado_a_id = %s)
+    ORDER BY t.fecha_creacion DESC, t.id DESC
+'''
+
+def _tareas_sync(cursor, usuario_id, desde):
+    if desde is None:
+        cursor.execute(_SQL_SYNC_TAREAS_TODAS, (usuario_id, usuario_id))
+    else:
+        cursor.execute(_SQL_TAREAS_USUARIO_SELECT + '''
+            JOIN (
+                SELECT id FROM tareas WHERE usuario_id = %s AND actualizado_en >= %s
+                UNION
+                SELECT id FROM tareas WHERE asignado_a_id = %s AND actualizado_en >= %s
+            ) k ON k.id = t.id
+            ORDER BY t.fecha_creacion DESC, t.id DESC
+        ''', (usuario_id, desde, usuario_id, desde))
+    return cursor.fetchall()
+
+def _areas_sync(cursor, usuario_id, desde):
+    if desde is None:
+        cursor.execute("SELECT * FROM areas WHERE usuario_id = %s", (usuario_id,))
+        return cursor.fetchall(), []
+    cursor.execute("SELECT * FROM areas WHERE usuario_id = %s AND actualizado_en >= %s", (usuario_id, desde))
+    areas = cursor.fetchall()
+    cursor.execute(
+        "SELECT entidad_id FROM eliminaciones WHERE usuario_id = %s AND entidad = 'area' AND eliminado_en >= %s",
+        (usuario_id, desde)
+    )
+    return areas, [fila['entidad_id'] for fila in cursor.fetchall()]
+
+def _grupos_cambiados(cursor, usuario_id, desde):
+    cursor.execute('''
+        SELECT EXISTS(
+            SELECT 1 FROM miembros_grupo mg
+            JOIN grupos g ON g.id = mg.grupo_id
+            LEFT JOIN grupo_estadisticas ge ON ge.grupo_id = g.id
+            WHERE mg.usuario_id = %s AND (g.actualizado_en >= %s OR ge.actualizado >= %s)
+        ) AS cambiados
+    ''', (usuario_id, desde, desde))
+    return bool(cursor.fetchone()['cambiados'])
+
+def sincronizar_usuario(usuario_id, token=None):
+    """Cambios de tareas, áreas y grupos del usuario desde el token (todo si no hay token válido)."""
+    # El token fija una hora del primario: leer de una réplica con retraso saltaría filas para siempre
+    uow = _unidad_de_trabajo_actual()
+    if uow is not None:
+        uow.forzar_primario()
+    previo = _leer_token_sync(token, usuario_id)
+    versiones = obtener_versiones([clave_usuario(usuario_id)])
+    version = versiones[clave_usuario(usuario_id)] if versiones is not None else None
+
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("SELECT UTC_TIMESTAMP(3) AS ahora")
+        ahora = cursor.fetchone()['ahora']
+        desde = None
+        if previo is not None and previo[1] >= ahora - timedelta(days=_SYNC_RETENCION_DIAS):
+            # Margen para escrituras que confirmaron después de fijar su actualizado_en
+            desde = previo[1] - timedelta(seconds=_SYNC_MARGEN_S)
+
+        respuesta = {'completo': desde is None, 'cambios': True, 'tareas': [], 'areas': [], 'areas_eliminadas': [],
+                     'grupos': None, 'grupos_archivados': None}
+        try:
+            version_igual = desde is not None and version is not None and previo[0] == version
+            grupos_cambiados = desde is None or not version_igual or _grupos_cambiados(cursor, usuario_id, desde)
+            if not version_igual:
+                respuesta['tareas'] = _tareas_sync(cursor, usuario_id, desde)
+                respuesta['areas'], respuesta['areas_eliminadas'] = _areas_sync(cursor, usuario_id, desde)
+        except mysql.connector.Error as e:
+            if desde is None:
+                raise
+            # Esquema de sincronización sin aplicar: enviar todo
+            _contar_sync('errores')
+            logger.warning(f"[SYNC] Consulta incremental falló, se envía todo: {e}")
+            desde = None
+            respuesta['completo'] = True
+            grupos_cambiados = True
+            respuesta['tareas'] = _tareas_sync(cursor, usuario_id, None)
+            respuesta['areas'], respuesta['areas_eliminadas'] = _areas_sync(cursor, usuario_id, None)
+    finally:
+        cursor.close()
+        conn.close()
+
+    if grupos_cambiados:
+        grupos = obtener_grupos_usuario(usuario_id, incluir_archivados=True)
+        respuesta['grupos'] = [g for g in grupos if g['estado'] != 'archivado']
+        respuesta['grupos_archivados'] = [g for g in grupos if g['estado'] == 'archivado']
+
+    if respuesta['completo']:
+        _contar_sync('completas')
+    elif not (respuesta['tareas'] or respuesta['areas'] or respuesta['areas_eliminadas'] or grupos_cambiados):
+        respuesta['cambios'] = False
+        _contar_sync('sin_cambios')
+    else:
+        _contar_sync('incrementales')
+    respuesta['token'] = _token_sync(usuario_id, version, ahora)
+    return respuesta
+
+def metricas_sync():
+    with _sync_lock:
+        return dict(_metricas_sync)
+
+@app.route('/sync/<int:usuario_id>', methods=['GET'])
+def sincronizar(usuario_id):
+    """Sincronización incremental de los datos del usuario: ?since=<token> de la respuesta anterior"""
+    try:
+        return jsonify(sincronizar_usuario(usuario_id, request.args.get('since')))
+    except PoolSaturado:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Error en sincronizar usuario={usuario_id}: {e}")
+        return jsonify({'error': 'Error al sincronizar'}), 500
+
+# ===== DASHBOARD: CONSULTAS INDEPENDIENTES =====
+
+_DASHBOARD_SQL_TAREAS = '''
+    (
+        SELECT 
+            t.id, t.titulo, t.descripcion,
+            CASE 
+                WHEN t.estado = 'pendiente' AND t.fecha_vencimiento IS NOT NULL AND t.fecha_vencimiento < UTC_TIMESTAMP() THEN 'vencida'
+                ELSE t.estado
+            END AS estado,
+            t.fecha_creacion, t.fecha_vencimiento,
+            t.area_id, t.grupo_id, t.asignado_a_id,
+            a.nombre AS area_nombre, a.color AS area_color, a.icono AS area_icono,
+            g.nombre AS grupo_nombre, g.color AS grupo_color, g.icono AS grupo_icono,
+            u.nombre AS asignado_nombre, u.apellido AS asignado_apellido
+        FROM tareas t
+        LEFT JOIN areas a ON t.area_id = a.id
+        LEFT JOIN grupos g ON t.grupo_id = g.id
+        LEFT JOIN usuarios u ON t.asignado_a_id = u.id
+        WHERE t.usuario_id = %s AND t.estado != 'eliminada'
+        ORDER BY t.fecha_creacion DESC
+        LIMIT 100
+    )
+    UNION ALL
+    (
+        SELECT 
+            t.id, t.titulo, t.descripcion,
+            CASE 
+                WHEN t.estado = 'pendiente' AND t.fecha_vencimiento IS NOT NULL AND t.fecha_vencimiento < UTC_TIMESTAMP() THEN 'vencida'
+                ELSE t.estado
+            END AS estado,
+            t.fecha_creacion, t.fecha_vencimiento,
+            t.area_id, t.grupo_id, t.asignado_a_id,
+            a.nombre AS area_nombre, a.color AS area_color, a.icono AS area_icono,
+            g.nombre AS grupo_nombre, g.color AS grupo_color, g.icono AS grupo_icono,
+            u.nombre AS asignado_nombre, u.apellido AS asignado_apellido
+        FROM tareas t
+        LEFT JOIN areas a ON t.area_id = a.id
+        LEFT JOIN grupos g ON t.grupo_id = g.id
+        LEFT JOIN usuarios u ON t.asignado_a_id = u.id
+        WHERE t.asignado_a_id = %s AND t.estado != 'eliminada'
+        ORDER BY t.fecha_creacion DESC
+        LIMIT 100
+    )
+    ORDER BY fecha_creacion DESC
+    LIMIT 100
+'''
+
+_DASHBOARD_SQL_AREAS = '''
+    SELECT id, nombre, descripcion, color, icono, estado
+    FROM areas 
+    WHERE usuario_id = %s AND estado = 'activa'
+    ORDER BY nombre
+'''
+
+_DASHBOARD_SQL_GRUPOS = '''
+    SELECT 
+        g.id, g.nombre, g.descripcion, g.color, g.icono, g.estado,
+        COUNT(DISTINCT gm.usuario_id) AS num_miembros,
+        COALESCE(myu.rol, 'miembro') AS rol
+    FROM grupos g
+    JOIN miembros_grupo my ON my.grupo_id = g.id AND my.usuario_id = %s
+    LEFT JOIN miembros_grupo gm ON gm.grupo_id = g.id
+    LEFT JOIN (
+        SELECT grupo_id, rol FROM miembros_grupo WHERE usuario_id = %s
+    ) myu ON myu.grupo_id = g.id
+    WHERE g.estado = 'activo'
+    GROUP BY g.id, g.nombre, g.descripcion, g.color, g.icono, g.estado, myu.rol
+    ORDER BY g.nombre
+'''
+
+# Contadores en dos consultas (evitar OR) y sumar en Python
+_DASHBOARD_SQL_CONTADORES = '''
+    SELECT 
+        COUNT(CASE WHEN estado = 'pendiente' AND fecha_vencimiento >= UTC_DATE() AND fecha_vencimiento < UTC_DATE() + INTERVAL 1 DAY THEN 1 END) AS tareas_hoy,
+        COUNT(CASE 
+                WHEN estado = 'pendiente' AND (fecha_vencimiento IS NULL OR fecha_vencimiento >= UTC_TIMESTAMP()) THEN 1 
+            END) AS tareas_pendientes,
+        COUNT(CASE WHEN estado = 'completada' THEN 1 END) AS tareas_completadas,
+        COUNT(CASE 
+                WHEN estado = 'vencida' OR (estado = 'pendiente' AND fecha_vencimiento IS NOT NULL AND fecha_vencimiento < UTC_TIMESTAMP()) THEN 1 
+            END) AS tareas_vencidas
+    FROM tareas 
+    WHERE usuario_id = %s AND estado != 'eliminada'
+'''
+_DASHBOARD_SQL_CONTADORES_ASIGNADAS = _DASHBOARD_SQL_CONTADORES.replace('WHERE usuario_id = %s', 'WHERE asignado_a_id = %s')
+# Con contadores materializados: fila de contadores_usuario más lo que depende del reloj
+# (pendientes que vencen hoy o ya vencieron sin pasar aún a 'vencida'), un rango por índice
+_DASHBOARD_SQL_CONTADORES_FILA = '''
+    SELECT c.pendientes, c.completadas, c.vencidas, r.hoy, r.atrasadas
+    FROM contadores_usuario c
+    CROSS JOIN (
+        SELECT
+            COUNT(CASE WHEN fecha_vencimiento >= UTC_DATE() THEN 1 END) AS hoy,
+            COUNT(CASE WHEN fecha_vencimiento < UTC_TIMESTAMP() THEN 1 END) AS atrasadas
+        FROM (
+            SELECT fecha_vencimiento FROM tareas
+            WHERE usuario_id = %s AND estado = 'pendiente' AND fecha_vencimiento < UTC_DATE() + INTERVAL 1 DAY
+            UNION ALL
+            SELECT fecha_vencimiento FROM tareas
+            WHERE asignado_a_id = %s AND estado = 'pendiente' AND fecha_vencimiento < UTC_DATE() + INTERVAL 1 DAY
+        ) cercanas
+    ) r
+    WHERE c.usuario_id = %s
+'''
+
+def _consultas_contadores(usuario_id, materializados):
+    if materializados:
+        return [('contadores', _DASHBOARD_SQL_CONTADORES_FILA, (usuario_id, usuario_id, usuario_id), True)]
+    return [
+        ('contadores', _DASHBOARD_SQL_CONTADORES, (usuario_id,), True),
+        ('contadores_asignadas', _DASHBOARD_SQL_CONTADORES_ASIGNADAS, (usuario_id,), True),
+    ]
+
+def _contadores_dashboard(resultados, materializados):
+    if materializados:
+        fila = resultados['contadores']
+        atrasadas = fila['atrasadas'] or 0
+        return {
+            'tareas_hoy': fila['hoy'] or 0,
+            'tareas_pendientes': fila['pendientes'] - atrasadas,
+            'tareas_completadas': fila['completadas'],
+            'tareas_vencidas': fila['vencidas'] + atrasadas,
+        }
+    c1 = resultados['contadores'] or {}
+    c2 = resultados['contadores_asignadas'] or {}
+    return {
+        'tareas_hoy': (c1.get('tareas_hoy') or 0) + (c2.get('tareas_hoy') or 0),
+        'tareas_pendientes': (c1.get('tareas_pendientes') or 0) + (c2.get('tareas_pendientes') or 0),
+        'tareas_completadas': (c1.get('tareas_completadas') or 0) + (c2.get('tareas_completadas') or 0),
+        'tareas_vencidas': (c1.get('tareas_vencidas') or 0) + (c2.get('tareas_vencidas') or 0),
+    }
+
+# Modo paralelo: cada consulta en su propia conexión del pool, en un executor acotado
+_DASHBOARD_PARALELO = os.getenv('DASHBOARD_PARALELO', 'false').lower() in ('1', 'true', 'yes')
+_DASHBOARD_HILOS = int(os.getenv('DASHBOARD_PARALELO_HILOS', '8'))
+# Cupos del pool que deben quedar libres tras lanzar las consultas; si no, modo secuencial
+_DASHBOARD_RESERVA = int(os.getenv('DASHBOARD_PARALELO_RESERVA', '4'))
+_dashboard_executor = None
+_dashboard_lock = threading.Lock()
+_metricas_dashboard = {'paralelo': 0, 'secuencial': 0, 'secuencial_por_presion': 0, 'consultas_reintentadas': 0}
+
+def _contar_dashboard(clave, n=1):
+    with _dashboard_lock:
+        _metricas_dashboard[clave] += n
+
+def _executor_dashboard():
+    global _dashboard_executor
+    if _dashboard_executor is None:
+        with _dashboard_lock:
+            if _dashboard_executor is None:
+                _dashboard_executor = ThreadPoolExecutor(max_workers=_DASHBOARD_HILOS, thread_name_prefix='dashboard')
+    return _dashboard_executor
+
+def _ejecutar_consulta(cursor, consulta):
+    nombre, sql, params, una_fila = consulta
+    t0 = time.perf_counter()
+    cursor.execute(sql, params)
+    filas = cursor.fetchone() if una_fila else cursor.fetchall()
+    return filas, (time.perf_counter() - t0) * 1000
+
+def _ejecutar_consulta_aislada(consulta, prioridad, destino):
+    """Ejecuta una consulta de solo lectura en una conexión propia (hilo del executor)."""
+    # Espera corta: si no hay cupo la consulta se repite en la conexión del request
+    conn = _checkout_pool(prioridad, destino, espera_max_s=0.05)
+    try:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            return _ejecutar_consulta(cursor, consulta)
+        finally:
+            cursor.close()
+    finally:
+        try:
+            conn.rollback()
+        finally:
+            conn.close()
+
+def _paralelo_disponible(destino, n_consultas):
+    if not _DASHBOARD_PARALELO:
+        return False
+    pool = db_pool_replica if destino == DESTINO_REPLICA else db_pool
+    return pool is not None and pool.holgura() >= n_consultas + _DASHBOARD_RESERVA
+
+def ejecutar_consultas_lectura(consultas):
+    """Ejecuta consultas independientes [(nombre, sql, params, una_fila)].
+
+    Retorna ({nombre: filas}, {nombre: ms}, modo). En paralelo solo si el pool
+    tiene holgura; lo que falle en paralelo se repite en la conexión del request.
+    """
+    uow = _unidad_de_trabajo_actual()
+    prioridad = uow.prioridad if uow else PRIORIDAD_LECTURA
+    destino = uow.destino if uow else DESTINO_PRIMARIO
+    resultados, tiempos = {}, {}
+    pendientes = list(consultas)
+    if _paralelo_disponible(destino, len(consultas)):
+        modo = 'paralelo'
+        executor = _executor_dashboard()
+        futuros = [(c, executor.submit(_ejecutar_consulta_aislada, c, prioridad, destino)) for c in consultas]
+        pendientes = []
+        for consulta, futuro in futuros:
+            try:
+                resultados[consulta[0]], tiempos[consulta[0]] = futuro.result()
+            except Exception as e:
+                logger.warning(f"[DASHBOARD] Consulta '{consulta[0]}' en paralelo falló, se repite: {e}")
+                pendientes.append(consulta)
+        _contar_dashboard('paralelo')
+        if pendientes:
+            _contar_dashboard('consultas_reintentadas', len(pendientes))
+    else:
+        modo = 'secuencial'
+        _contar_dashboard('secuencial_por_presion' if _DASHBOARD_PARALELO else 'secuencial')
+    if pendientes:
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            for consulta in pendientes:
+                resultados[consulta[0]], tiempos[consulta[0]] = _ejecutar_consulta(cursor, consulta)
+        finally:
+            cursor.close()
+            conn.close()
+    return resultados, tiempos, modo
+
+def _server_timing(tiempos, total_ms, modo):
+    partes = [f"{nombre};dur={ms:.1f}" for nombre, ms in tiempos.items()]
+    partes.append(f'total;desc="{modo}";dur={total_ms:.1f}')
+    return ', '.join(partes)
+
+# Caché por usuario del JSON del dashboard, válida mientras no cambie la versión del usuario
+_DASHBOARD_CACHE_TTL = int(os.getenv('DASHBOARD_CACHE_TTL', '60'))
+_dashboard_cache = CacheLRU(int(os.getenv('DASHBOARD_CACHE_MAX', '5000')), _DASHBOARD_CACHE_TTL)
+_metricas_cache_dashboard = {'hits': 0, 'misses': 0, 'invalidaciones': 0, 'sin_version': 0}
+
+def _contar_cache_dashboard(clave):
+    with _dashboard_lock:
+        _metricas_cache_dashboard[clave] += 1
+
+def _invalidar_cache_dashboard(claves):
+    for clave in claves:
+        if clave.startswith('usuario:'):
+            _dashboard_cache.eliminar(int(clave.split(':', 1)[1]))
+            _contar_cache_dashboard('invalidaciones')
+
+_oyentes_invalidacion.append(_invalidar_cache_dashboard)
+
+def _ttl_dashboard(tareas):
+    """Segundos de validez: 'vencida' y tareas_hoy dependen de la hora, no solo de escrituras."""
+    ahora = datetime.utcnow()
+    manana = datetime(ahora.year, ahora.month, ahora.day) + timedelta(days=1)
+    ttl = min(_DASHBOARD_CACHE_TTL, (manana - ahora).total_seconds())
+    for tarea in tareas:
+        vence = tarea.get('fecha_vencimiento')
+        if tarea.get('estado') == 'pendiente' and isinstance(vence, datetime) and vence > ahora:
+            ttl = min(ttl, (vence - ahora).total_seconds())
+    return max(1.0, ttl)
+
+def metricas_dashboard():
+    with _dashboard_lock:
+        return {
+            'paralelo_habilitado': _DASHBOARD_PARALELO,
+            'hilos': _DASHBOARD_HILOS,
+            **_metricas_dashboard,
+            'cache': {'ttl_s': _DASHBOARD_CACHE_TTL, 'entradas': len(_dashboard_cache), **_metricas_cache_dashboard},
+        }
+
 @app.route('/dashboard/<int:usuario_id>', methods=['GET'])
 def obtener_dashboard_completo(usuario_id):
     """Endpoint unificado para obtener todos los datos del dashboard en una sola llamada"""
     try:
-        start_time = datetime.now()
-        logger.info(f"🔄 Iniciando carga del dashboard para usuario {usuario_id}")
-        
-        # Eliminar UPDATE masivo del hot path; calcular estado efectivo al vuelo
-        
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        # 1. Obtener tareas con una sola consulta optimizada
-        tareas_sql = '''
-            (
-                SELECT 
-                    t.id, t.titulo, t.descripcion,
-                    CASE 
-                        WHEN t.estado = 'pendiente' AND t.fecha_vencimiento IS NOT NULL AND t.fecha_vencimiento < UTC_TIMESTAMP() THEN 'vencida'
-                        ELSE t.estado
-                    END AS estado,
-                    t.fecha_creacion, t.fecha_vencimiento,
-                    t.area_id, t.grupo_id, t.asignado_a_id,
-                    a.nombre AS area_nombre, a.color AS area_color, a.icono AS area_icono,
-                    g.nombre AS grupo_nombre, g.color AS grupo_color, g.icono AS grupo_icono,
-                    u.nombre AS asignado_nombre, u.apellido AS asignado_apellido
-                FROM tareas t
-                LEFT JOIN areas a ON t.area_id = a.id
-                LEFT JOIN grupos g ON t.grupo_id = g.id
-                LEFT JOIN usuarios u ON t.asignado_a_id = u.id
-                WHERE t.usuario_id = %s AND t.estado != 'eliminada'
-                ORDER BY t.fecha_creacion DESC
-                LIMIT 100
-            )
-            UNION ALL
-            (
-                SELECT 
-                    t.id, t.titulo, t.descripcion,
-                    CASE 
-                        WHEN t.estado = 'pendiente' AND t.fecha_vencimiento IS NOT NULL AND t.fecha_vencimiento < UTC_TIMESTAMP() THEN 'vencida'
-                        ELSE t.estado
-                    END AS estado,
-                    t.fecha_creacion, t.fecha_vencimiento,
-                    t.area_id, t.grupo_id, t.asignado_a_id,
-                    a.nombre AS area_nombre, a.color AS area_color, a.icono AS area_icono,
-                    g.nombre AS grupo_nombre, g.color AS grupo_color, g.icono AS grupo_icono,
-                    u.nombre AS asignado_nombre, u.apellido AS asignado_apellido
-                FROM tareas t
-                LEFT JOIN areas a ON t.area_id = a.id
-                LEFT JOIN grupos g ON t.grupo_id = g.id
-                LEFT JOIN usuarios u ON t.asignado_a_id = u.id
-                WHERE t.asignado_a_id = %s AND t.estado != 'eliminada'
-                ORDER BY t.fecha_creacion DESC
-                LIMIT 100
-            )
-            ORDER BY fecha_creacion DESC
-            LIMIT 100
-        '''
-        cursor.execute(tareas_sql, (usuario_id, usuario_id))
-        tareas = cursor.fetchall()
-        
-        # 2. Obtener áreas activas
-        areas_sql = '''
-            SELECT id, nombre, descripcion, color, icono, estado
-            FROM areas 
-            WHERE usuario_id = %s AND estado = 'activa'
-            ORDER BY nombre
-        '''
-        cursor.execute(areas_sql, (usuario_id,))
-        areas = cursor.fetchall()
+        start_time = time.perf_counter()
         
-        # 3. Obtener grupos con estadísticas básicas
-        grupos_sql = '''
-            SELECT 
-                g.id, g.nombre, g.descripcion, g.color, g.icono, g.estado,
-                COUNT(DISTINCT gm.usuario_id) AS num_miembros,
-                COALESCE(myu.rol, 'miembro') AS rol
-            FROM grupos g
-            JOIN miembros_grupo my ON my.grupo_id = g.id AND my.usuario_id = %s
-            LEFT JOIN miembros_grupo gm ON gm.grupo_id = g.id
-            LEFT JOIN (
-                SELECT grupo_id, rol FROM miembros_grupo WHERE usuario_id = %s
-            ) myu ON myu.grupo_id = g.id
-            WHERE g.estado = 'activo'
-            GROUP BY g.id, g.nombre, g.descripcion, g.color, g.icono, g.estado, myu.rol
-            ORDER BY g.nombre
-        '''
-        cursor.execute(grupos_sql, (usuario_id, usuario_id))
-        grupos = cursor.fetchall()
-        
-        # 4. Calcular contadores de tareas
-        # Contadores en dos consultas (evitar OR) y sumar en Python
-        cont_sql = '''
-            SELECT 
-                COUNT(CASE WHEN estado = 'pendiente' AND DATE(fecha_vencimiento) = UTC_DATE() THEN 1 END) AS tareas_hoy,
-                COUNT(CASE 
-                        WHEN estado = 'pendiente' AND (fecha_vencimiento IS NULL OR fecha_vencimiento >= UTC_TIMESTAMP()) THEN 1 
-                    END) AS tareas_pendientes,
-                COUNT(CASE WHEN estado = 'completada' THEN 1 END) AS tareas_completadas,
-                COUNT(CASE 
-                        WHEN estado = 'vencida' OR (estado = 'pendiente' AND fecha_vencimiento IS NOT NULL AND fecha_vencimiento < UTC_TIMESTAMP()) THEN 1 
-                    END) AS tareas_vencidas
-            FROM tareas 
-            WHERE usuario_id = %s AND estado != 'eliminada'
-        '''
-        cursor.execute(cont_sql, (usuario_id,))
-        c1 = cursor.fetchone() or {}
-        cont_asig_sql = cont_sql.replace('WHERE usuario_id = %s', 'WHERE asignado_a_id = %s')
-        cursor.execute(cont_asig_sql, (usuario_id,))
-        c2 = cursor.fetchone() or {}
-        contadores = {
-            'tareas_hoy': (c1.get('tareas_hoy') or 0) + (c2.get('tareas_hoy') or 0),
-            'tareas_pendientes': (c1.get('tareas_pendientes') or 0) + (c2.get('tareas_pendientes') or 0),
-            'tareas_completadas': (c1.get('tareas_completadas') or 0) + (c2.get('tareas_completadas') or 0),
-            'tareas_vencidas': (c1.get('tareas_vencidas') or 0) + (c2.get('tareas_vencidas') or 0),
-        }
+        version = None
+        if _DASHBOARD_CACHE_TTL > 0:
+            versiones = obtener_versiones([clave_usuario(usuario_id)])
+            if versiones is None:
+                _contar_cache_dashboard('sin_version')
+            else:
+                version = versiones[clave_usuario(usuario_id)]
+                en_cache = _dashboard_cache.obtener(usuario_id)
+                if en_cache is not None and en_cache[0] == version:
+                    _contar_cache_dashboard('hits')
+                    response = app.response_class(en_cache[1], mimetype='application/json')
+                    response.headers['X-Cache'] = 'HIT'
+                    response.headers['Server-Timing'] = _server_timing({}, (time.perf_counter() - start_time) * 1000, 'cache')
+                    return response
+                _contar_cache_dashboard('misses')
         
-        cursor.close()
-        conn.close()
+        logger.info(f"🔄 Iniciando carga del dashboard para usuario {usuario_id}")
         
-        # Procesar fechas de tareas
-        for tarea in tareas:
-            if tarea.get('fecha_vencimiento'):
-                if isinstance(tarea['fecha_vencimiento'], datetime):
-                    tarea['fecha_vencimiento'] = tarea['fecha_vencimiento'].strftime('%Y-%m-%dT%H:%M:%SZ')
-                elif isinstance(tarea['fecha_vencimiento'], str) and 'T' in tarea['fecha_vencimiento']:
-                    tarea['fecha_vencimiento'] = tarea['fecha_vencimiento']
-            
-            if tarea.get('fecha_creacion'):
-                if isinstance(tarea['fecha_creacion'], datetime):
-                    tarea['fecha_creacion'] = tarea['fecha_creacion'].strftime('%Y-%m-%dT%H:%M:%SZ')
+        # Eliminar UPDATE masivo del hot path; calcular estado efectivo al vuelo
+        # Consultas independientes: tareas, áreas, grupos y contadores
+        consultas = [
+            ('tareas', _DASHBOARD_SQL_TAREAS, (usuario_id, usuario_id), False),
+            ('areas', _DASHBOARD_SQL_AREAS, (usuario_id,), False),
+            ('grupos', _DASHBOARD_SQL_GRUPOS, (usuario_id, usuario_id), False),
+        ]
+        materializados = _CONTADORES_MATERIALIZADOS
+        try:
+            resultados, tiempos, modo = ejecutar_consultas_lectura(consultas + _consultas_contadores(usuario_id, materializados))
+        except mysql.connector.Error as e:
+            if not materializados:
+                raise
+            # Sin tabla de contadores (esquema sin aplicar): agregación sobre tareas
+            _contar_contadores('errores')
+            logger.warning(f"[CONTADORES] Lectura de contadores falló, se agrega sobre tareas: {e}")
+            materializados = False
+            resultados, tiempos, modo = ejecutar_consultas_lectura(consultas + _consultas_contadores(usuario_id, False))
+        if materializados:
+            _contar_contadores('lecturas')
+            if resultados['contadores'] is None:
+                # Usuario sin fila todavía (pendiente de reconciliar)
+                _contar_contadores('sin_fila')
+                materializados = False
+                extra, tiempos_extra, _ = ejecutar_consultas_lectura(_consultas_contadores(usuario_id, False))
+                resultados.update(extra)
+                tiempos.update(tiempos_extra)
+        tareas = resultados['tareas']
+        areas = resultados['areas']
+        grupos = resultados['grupos']
+        ttl_cache = _ttl_dashboard(tareas)
+        contadores = _contadores_dashboard(resultados, materializados)
         
         # Preparar respuesta
         dashboard_data = {
@@ -3711,16 +6513,176 @@ def obtener_dashboard_completo(usuario_id):
             'timestamp': datetime.now().isoformat()
         }
         
-        end_time = datetime.now()
-        tiempo_total = (end_time - start_time).total_seconds()
-        logger.info(f"✅ Dashboard cargado en {tiempo_total:.2f}s para usuario {usuario_id}")
+        tiempo_total_ms = (time.perf_counter() - start_time) * 1000
+        logger.info(f"✅ Dashboard cargado en {tiempo_total_ms / 1000:.2f}s ({modo}) para usuario {usuario_id}")
         
-        return jsonify(dashboard_data)
+        cuerpo = app.json.dumps_bytes(dashboard_data)
+        if version is not None:
+            _dashboard_cache.guardar(usuario_id, (version, cuerpo), ttl_cache)
+        response = app.response_class(cuerpo, mimetype='application/json')
+        response.headers['X-Cache'] = 'MISS'
+        response.headers['Server-Timing'] = _server_timing(tiempos, tiempo_total_ms, modo)
+        return response
         
     except Exception as e:
         logger.error(f"❌ Error al cargar dashboard para usuario {usuario_id}: {e}")
         return jsonify({'error': 'Error interno del servidor'}), 500
 
+# ===== BOOTSTRAP: LISTADOS INICIALES EN UNA LLAMADA =====
+# Sustituye las cuatro peticiones de arranque del frontend (tareas, áreas, grupos,
+# grupos archivados + invitaciones) por una: una sola conexión del request, o consultas
+# en paralelo si DASHBOARD_PARALELO lo permite. ETag fuerte sobre el cuerpo (If-None-Match
+# -> 304) y, en X-Sync-Token, el token de /sync para que el cliente siga de forma incremental.
+
+def obtener_bootstrap_usuario(usuario_id):
+    """({tareas, areas, grupos, grupos_archivados, invitaciones, token}, tiempos, modo)."""
+    # Mismo motivo que en /sync: el token debe corresponder a lo leído, no a una réplica atrasada
+    uow = _unidad_de_trabajo_actual()
+    if uow is not None:
+        uow.forzar_primario()
+    versiones = obtener_versiones([clave_usuario(usuario_id)])
+    version = versiones[clave_usuario(usuario_id)] if versiones is not None else None
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        # Hora antes de leer: lo que cambie durante la carga lo trae el siguiente /sync
+        cursor.execute("SELECT UTC_TIMESTAMP(3) AS ahora")
+        ahora = cursor.fetchone()['ahora']
+    finally:
+        cursor.close()
+        conn.close()
+
+    resultados, tiempos, modo = ejecutar_consultas_lectura([
+        ('tareas', _SQL_SYNC_TAREAS_TODAS, (usuario_id, usuario_id), False),
+        ('areas', "SELECT * FROM areas WHERE usuario_id = %s", (usuario_id,), False),
+    ])
+    t0 = time.perf_counter()
+    grupos = obtener_grupos_usuario(usuario_id, incluir_archivados=True)
+    tiempos['grupos'] = (time.perf_counter() - t0) * 1000
+    t0 = time.perf_counter()
+    invitaciones = obtener_invitaciones_pendientes_usuario(usuario_id)
+    tiempos['invitaciones'] = (time.perf_counter() - t0) * 1000
+    datos = {
+        'tareas': resultados['tareas'],
+        'areas': resultados['areas'],
+        'grupos': [g for g in grupos if g['estado'] != 'archivado'],
+        'grupos_archivados': [g for g in grupos if g['estado'] == 'archivado'],
+        'invitaciones': invitaciones,
+        'token': _token_sync(usuario_id, version, ahora),
+    }
+    return datos, tiempos, modo
+
+@app.route('/bootstrap/<int:usuario_id>', methods=['GET'])
+def bootstrap_usuario(usuario_id):
+    """Tareas, áreas, grupos (activos y archivados) e invitaciones del usuario en una respuesta"""
+    try:
+        start_time = time.perf_counter()
+        datos, tiempos, modo = obtener_bootstrap_usuario(usuario_id)
+        token = datos.pop('token')
+        cuerpo = app.json.dumps_bytes(datos)
+        etag = hashlib.sha256(cuerpo).hexdigest()[:32]
+        tiempo_total_ms = (time.perf_counter() - start_time) * 1000
+        if _etag_coincide(etag):
+            response = app.response_class(status=304)
+        else:
+            response = app.response_class(cuerpo, mimetype='application/json')
+        response.set_etag(etag)
+        # En cabecera y fuera del ETag: lleva la hora y también hace falta con un 304
+        response.headers['X-Sync-Token'] = token
+        response.headers['Server-Timing'] = _server_timing(tiempos, tiempo_total_ms, modo)
+        return response
+    except PoolSaturado:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Error en bootstrap usuario={usuario_id}: {e}")
+        return jsonify({'error': 'Error al cargar los datos iniciales'}), 500
+
+# ===== CICLO DE VIDA DEL WORKER (GUNICORN) =====
+
+_arranque = {'pid': None, 'calentado': False, 'pool_calentado': False, 'calentamiento_ms': None, 'primer_request_ms': None}
+_arranque_t0 = time.monotonic()
+
+def preparar_worker():
+    """Llamado en post_fork: descarta estado heredado del master y calienta el worker.
+
+    Con preload_app el módulo se importa en el master, que no arranca hilos (el barrido, el
+    hub SSE, la cola y el executor se crean en el primer uso), así que ningún lock puede estar
+    tomado al hacer fork. Solo se descarta lo que es de cada proceso: conexiones, hilos y
+    las cachés y mapas en memoria.
+    """
+    global db_pool, db_pool_replica, _arranque_t0
+    global _dashboard_executor, _barrido_hilo, _barrido_pid, _hub_notificaciones, _cola_notificaciones
+    # No cerrar las conexiones heredadas: el COM_QUIT cerraría la sesión del padre
+    db_pool = None
+    db_pool_replica = None
+    # Los hilos no sobreviven al fork: se recrean en el primer uso
+    _dashboard_executor = None
+    _barrido_hilo = None
+    _barrido_pid = None
+    _hub_notificaciones = _HubNotificaciones()
+    _cola_notificaciones = _ColaNotificaciones()
+    for cache in (_usuarios_cache, _roles_cache, _dashboard_cache):
+        cache.limpiar()
+    _afinidad_primario.clear()
+    if isinstance(_idempotencia, _IdempotenciaMemoria):
+        _idempotencia.limpiar()
+    _arranque_t0 = time.monotonic()
+    _arranque.update(pid=os.getpid(), calentado=False, pool_calentado=False, calentamiento_ms=None, primer_request_ms=None)
+    calentar_worker()
+    iniciar_barrido_vencidas()
+
+def _calentar_pool(destino):
+    """Crea el pool del destino y ejecuta un SELECT 1 por cada conexión física."""
+    pool = _obtener_pool(destino)
+    conexiones = []
+    try:
+        for _ in range(pool.pool_size):
+            conexiones.append(_checkout_pool(PRIORIDAD_ADMIN, destino))
+        for conn in conexiones:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            cursor.close()
+    finally:
+        for conn in conexiones:
+            conn.close()
+
+def calentar_worker():
+    """Deja listo el worker antes de su primera petición: pools, rutas, JSON y fechas."""
+    t0 = time.perf_counter()
+    try:
+        _calentar_pool(DESTINO_PRIMARIO)
+        if REPLICA_CONFIGURADA:
+            _calentar_pool(DESTINO_REPLICA)
+        _arranque['pool_calentado'] = True
+    except Exception as e:
+        # Sin base de datos al arrancar el worker igual atiende; el pool se crea en el primer uso
+        logger.warning(f"[BOOT] No se pudo calentar el pool (pid={os.getpid()}): {e}")
+    # Mapa de rutas de Werkzeug (se compila en el primer match), strptime y proveedor JSON
+    adaptador = app.url_map.bind('localhost')
+    for ruta in ('/dashboard/1', '/tareas/1', '/notificaciones/1', '/debug/health'):
+        try:
+            adaptador.match(ruta)
+        except Exception:
+            pass
+    _normalize_due_date_str('2000-01-01 00:00')
+    _normalize_due_date_str('2000-01-01 00:00:00')
+    _normalize_due_date_str('2000-01-01T00:00:00Z')
+    with app.app_context():
+        jsonify({'fecha': datetime.now(timezone.utc), 'n': 1})
+    _arranque['calentado'] = True
+    _arranque['calentamiento_ms'] = round((time.perf_counter() - t0) * 1000, 1)
+    logger.info(f"[BOOT] Worker {os.getpid()} calentado en {_arranque['calentamiento_ms']}ms")
+
+# Milisegundos desde el fork (o la importación) hasta que llega la primera petición
+@app.before_request
+def _medir_primer_request():
+    if _arranque['primer_request_ms'] is None:
+        _arranque['primer_request_ms'] = round((time.monotonic() - _arranque_t0) * 1000, 1)
+
+def metricas_arranque():
+    return dict(_arranque)
+
 # ===== ENDPOINT DE SALUD =====
 
 @app.route('/debug/health', methods=['GET'])
@@ -3742,6 +6704,7 @@ def health_check():
             'version': '1.0.0',
             'environment': ENV,
             'database': 'connected',
+            'pool': metricas_pool(),
             'python_version': '3.13.7',
             'endpoints': {
                 'usuarios': '/usuarios',
@@ -3761,8 +6724,31 @@ def health_check():
             'status': 'unhealthy',
             'timestamp': datetime.now(timezone.utc).isoformat(),
             'error': str(e),
-            'database': 'disconnected'
+            'database': 'disconnected',
+            'pool': metricas_pool()
         }), 500
 
+@app.route('/debug/metrics', methods=['GET'])
+def debug_metrics():
+    """Métricas en proceso (por worker) para dimensionar MYSQL_POOL_SIZE"""
+    return jsonify({
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'pid': os.getpid(),
+        'pool': metricas_pool(),
+        'enrutamiento': metricas_enrutamiento(),
+        'dashboard': metricas_dashboard(),
+        'roles': metricas_roles(),
+        'usuarios': metricas_usuarios(),
+        'idempotencia': metricas_idempotencia(),
+        'contadores': metricas_contadores(),
+        'barrido_vencidas': metricas_barrido(),
+        'sync': metricas_sync(),
+        'etag': metricas_etag(),
+        'sse': metricas_sse(),
+        'archivo_notificaciones': metricas_archivo_notificaciones(),
+        'cola_notificaciones': metricas_cola_notificaciones(),
+        'arranque': metricas_arranque(),
+    })
+
 if __name__ == '__main__':
     app.run(debug=False, port=8000, host='0.0.0.0') 
\ No newline at end of file
@@ -0,0 +1,45 @@
+"""
+Configuración de gunicorn para el backend de Astren.
+
+Uso (desde backend/):
+  gunicorn -c gunicorn.conf.py app:app
+
+Con preload_app el master importa la app una vez (arranque más rápido y memoria
+compartida); cada worker descarta en post_fork el estado heredado, crea su propio
+pool MySQL y lo calienta antes de aceptar su primera petición.
+"""
+
+import os
+import time
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+# Cada stream SSE abierto (/notificaciones/<id>/stream) ocupa un hilo mientras dura, casi siempre
+# esperando en su cola: se añaden tantos hilos como streams admite el backend (SSE_MAX_SUSCRIPTORES),
+# así GUNICORN_THREADS queda entero para las peticiones normales. Es el límite de streams del
+# worker, no un máximo de hilos: un hilo por pestaña abierta (ver SSE_MAX_SUSCRIPTORES en env)
+threads = int(os.getenv('GUNICORN_THREADS', '4')) + int(os.getenv('SSE_MAX_SUSCRIPTORES', '100'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes')
+accesslog = '-'
+errorlog = '-'
+
+_t0 = time.monotonic()
+
+
+def when_ready(server):
+    server.log.info(f"[BOOT] Master listo en {(time.monotonic() - _t0) * 1000:.0f}ms (preload={preload_app})")
+
+
+def post_fork(server, worker):
+    import app as astren
+    astren.preparar_worker()
+    server.log.info(f"[BOOT] Worker {worker.pid} listo: {astren.metricas_arranque()}")
+
+
+def worker_exit(server, worker):
+    import app as astren
+    astren.detener_barrido_vencidas()
+    astren.detener_notificaciones_sse()
+    # Escribir las notificaciones encoladas antes de salir (la cola está en memoria)
+    astren.detener_cola_notificaciones()
@@ -32,7 +32,11 @@ const CONFIG = {
         NOTIFICATIONS: '/notificaciones',
         
         // Invitaciones
-        INVITATIONS: '/invitaciones'
+        INVITATIONS: '/invitaciones',
+
+        // Carga inicial y sincronización incremental
+        BOOTSTRAP: '/bootstrap',
+        SYNC: '/sync'
     },
     
     // Configuración de la aplicación
@@ -69,6 +73,34 @@ function buildApiUrl(endpoint, params = '') {
     return `${CONFIG.API_BASE_URL}${endpoint}${params}`;
 }
 
+// Read-your-writes con réplica: tras una escritura el backend responde X-Primario-Hasta
+// y, mientras no expire, se devuelve en cada petición para que cualquier worker lea del primario
+(function () {
+    if (typeof window === 'undefined' || !window.fetch) return;
+    const CABECERA = 'X-Primario-Hasta';
+    const CLAVE = 'astren_primario_hasta';
+    const fetchOriginal = window.fetch.bind(window);
+    window.fetch = async function (recurso, opciones = {}) {
+        const url = typeof recurso === 'string' ? recurso : (recurso && recurso.url) || '';
+        if (!url.startsWith(CONFIG.API_BASE_URL)) {
+            return fetchOriginal(recurso, opciones);
+        }
+        // El reloj del cliente puede ir desfasado: se reenvía un rato y el backend decide si sigue vigente
+        const guardado = JSON.parse(sessionStorage.getItem(CLAVE) || 'null');
+        if (guardado && Date.now() - guardado.recibido < 60000) {
+            const headers = new Headers(opciones.headers || (recurso instanceof Request ? recurso.headers : undefined));
+            headers.set(CABECERA, guardado.valor);
+            opciones = { ...opciones, headers };
+        }
+        const response = await fetchOriginal(recurso, opciones);
+        const nuevo = response.headers.get(CABECERA);
+        if (nuevo) {
+            sessionStorage.setItem(CLAVE, JSON.stringify({ valor: nuevo, recibido: Date.now() }));
+        }
+        return response;
+    };
+})();
+
 // Helper unificado para obtener el userId del usuario actual de forma robusta
 function getAstrenUserId() {
     try {
@@ -91,8 +123,112 @@ function getAstrenUserId() {
     return null;
 }
 
-// Bootstrap: descargar todos los datos del usuario y guardarlos en localStorage
+// Bootstrap: mantener en localStorage los datos del usuario. La primera carga (o force) usa
+// /bootstrap, una sola petición con ETag; después /sync con el token de la sincronización
+// anterior descarga solo lo que cambió.
 let _bootstrapPromise = null;
+
+function _mapTask(t) {
+    return {
+        ...t,
+        status: t.estado === 'pendiente' ? 'pending' :
+                t.estado === 'completada' ? 'completed' :
+                t.estado === 'vencida' ? 'overdue' : t.estado,
+        title: t.titulo || t.title,
+        dueDate: t.fecha_vencimiento || t.dueDate
+    };
+}
+
+function _readCache(key) {
+    try { return JSON.parse(localStorage.getItem(key) || 'null'); } catch (_) { return null; }
+}
+
+function _writeCache(key, value) {
+    try { localStorage.setItem(key, JSON.stringify(value)); } catch (_) {}
+}
+
+// Inserta o reemplaza por id; quita los ids de `removed`
+function _mergeById(list, changes, removed = []) {
+    const byId = new Map((list || []).map(x => [String(x.id), x]));
+    changes.forEach(x => byId.set(String(x.id), x));
+    removed.forEach(id => byId.delete(String(id)));
+    return Array.from(byId.values());
+}
+
+function _applySync(data) {
+    const tasks = data.tareas.map(_mapTask);
+    if (data.completo) {
+        _writeCache('astren_tasks', tasks);
+        _writeCache('astren_areas', data.areas);
+    } else {
+        if (tasks.length) {
+            const deleted = tasks.filter(t => t.estado === 'eliminada').map(t => t.id);
+            const merged = _mergeById(_readCache('astren_tasks'), tasks.filter(t => t.estado !== 'eliminada'), deleted);
+            merged.sort((a, b) => new Date(b.fecha_creacion) - new Date(a.fecha_creacion) || b.id - a.id);
+            _writeCache('astren_tasks', merged);
+        }
+        if (data.areas.length || data.areas_eliminadas.length) {
+            _writeCache('astren_areas', _mergeById(_readCache('astren_areas'), data.areas, data.areas_eliminadas));
+        }
+    }
+    // Los grupos llegan completos cuando cambió alguno (null: sin cambios)
+    if (data.grupos) _writeCache('astren_groups', data.grupos);
+    if (data.grupos_archivados) _writeCache('astren_groups_archived', data.grupos_archivados);
+    if (data.token) {
+        try { localStorage.setItem('astren_sync_token', data.token); } catch (_) {}
+    }
+}
+
+// Carga completa en una petición; con 304 el cache local sigue vigente
+function _bootstrapSingle(userId, headers, force) {
+    const etag = !force && localStorage.getItem('astren_tasks') ? localStorage.getItem('astren_bootstrap_etag') : null;
+    const options = etag ? { ...headers, headers: { 'If-None-Match': etag } } : headers;
+    return fetch(buildApiUrl(CONFIG.API_ENDPOINTS.BOOTSTRAP, `/${userId}`), options)
+        .then(async r => {
+            if (r.status !== 304) {
+                if (!r.ok) throw new Error(`bootstrap ${r.status}`);
+                const data = await r.json();
+                _applySync({ ...data, completo: true, areas_eliminadas: [], token: null });
+            }
+            try {
+                const newEtag = r.headers.get('ETag');
+                if (newEtag) localStorage.setItem('astren_bootstrap_etag', newEtag);
+                localStorage.setItem('astren_sync_token', r.headers.get('X-Sync-Token') || '');
+            } catch (_) {}
+        });
+}
+
+// Descarga completa por los endpoints de listado (si /bootstrap o /sync no están disponibles)
+function _bootstrapFull(userId, headers) {
+    return Promise.all([
+        // Tareas
+        fetch(buildApiUrl(CONFIG.API_ENDPOINTS.TASKS, `/${userId}`), headers)
+            .then(r => r.ok ? r.json() : [])
+            .then(list => list.map(_mapTask))
+            .then(tasks => _writeCache('astren_tasks', tasks)),
+
+        // Áreas (lista simple que usa el dashboard)
+        fetch(buildApiUrl(CONFIG.API_ENDPOINTS.AREAS, `/${userId}`), headers)
+            .then(r => r.ok ? r.json() : [])
+            .then(data => Array.isArray(data) ? data : (data.areas || []))
+            .then(areas => _writeCache('astren_areas', areas)),
+
+        // Grupos (lista simple que usa el dashboard)
+        fetch(buildApiUrl(CONFIG.API_ENDPOINTS.GROUPS, `/${userId}`), headers)
+            .then(r => r.ok ? r.json() : { grupos: [] })
+            .then(data => data.grupos || [])
+            .then(groups => _writeCache('astren_groups', groups)),
+
+        // Grupos archivados (si existe)
+        fetch(buildApiUrl(CONFIG.API_ENDPOINTS.GROUPS, `/${userId}/archivados`), headers)
+            .then(r => r.ok ? r.json() : [])
+            .then(groupsArchived => _writeCache('astren_groups_archived', groupsArchived))
+            .catch(() => null)
+    ]).then(() => {
+        try { localStorage.removeItem('astren_sync_token'); } catch (_) {}
+    });
+}
+
 async function bootstrapUserData(force = false) {
     try {
         if (_bootstrapPromise && !force) return _bootstrapPromise;
@@ -100,43 +236,24 @@ async function bootstrapUserData(force = false) {
         if (!userId) return null;
 
         const headers = { cache: 'no-store' };
-        _bootstrapPromise = Promise.all([
-            // Tareas
-            fetch(buildApiUrl(CONFIG.API_ENDPOINTS.TASKS, `/${userId}`), headers)
-                .then(r => r.ok ? r.json() : [])
-                .then(list => list.map(t => ({
-                    ...t,
-                    status: t.estado === 'pendiente' ? 'pending' :
-                            t.estado === 'completada' ? 'completed' :
-                            t.estado === 'vencida' ? 'overdue' : t.estado,
-                    title: t.titulo || t.title,
-                    dueDate: t.fecha_vencimiento || t.dueDate
-                })))
-                .then(tasks => { try { localStorage.setItem('astren_tasks', JSON.stringify(tasks)); } catch(_) {} }),
-
-            // Áreas (lista simple que usa el dashboard)
-            fetch(buildApiUrl(CONFIG.API_ENDPOINTS.AREAS, `/${userId}`), headers)
-                .then(r => r.ok ? r.json() : [])
-                .then(data => Array.isArray(data) ? data : (data.areas || []))
-                .then(areas => { try { localStorage.setItem('astren_areas', JSON.stringify(areas)); } catch(_) {} }),
-
-            // Grupos (lista simple que usa el dashboard)
-            fetch(buildApiUrl(CONFIG.API_ENDPOINTS.GROUPS, `/${userId}`), headers)
-                .then(r => r.ok ? r.json() : { grupos: [] })
-                .then(data => data.grupos || [])
-                .then(groups => { try { localStorage.setItem('astren_groups', JSON.stringify(groups)); } catch(_) {} }),
-
-            // Grupos archivados (si existe)
-            fetch(buildApiUrl(CONFIG.API_ENDPOINTS.GROUPS, `/${userId}/archivados`), headers)
-                .then(r => r.ok ? r.json() : [])
-                .then(groupsArchived => { try { localStorage.setItem('astren_groups_archived', JSON.stringify(groupsArchived)); } catch(_) {} })
-                .catch(() => null)
-        ]).then(() => {
-            try { localStorage.setItem('astren_bootstrap_ts', Date.now().toString()); } catch(_) {}
-            return true;
-        }).finally(() => {
-            _bootstrapPromise = null;
-        });
+        // Sin cache local de tareas no sirve un delta: pedir todo
+        const token = !force && localStorage.getItem('astren_tasks') ? localStorage.getItem('astren_sync_token') : null;
+        const load = token
+            ? fetch(buildApiUrl(CONFIG.API_ENDPOINTS.SYNC, `/${userId}?since=${encodeURIComponent(token)}`), headers)
+                .then(r => {
+                    if (!r.ok) throw new Error(`sync ${r.status}`);
+                    return r.json();
+                })
+                .then(_applySync)
+            : _bootstrapSingle(userId, headers, force);
+        _bootstrapPromise = load
+            .catch(() => _bootstrapFull(userId, headers))
+            .then(() => {
+                try { localStorage.setItem('astren_bootstrap_ts', Date.now().toString()); } catch(_) {}
+                return true;
+            }).finally(() => {
+                _bootstrapPromise = null;
+            });
 
         return _bootstrapPromise;
     } catch (e) {
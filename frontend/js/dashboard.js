@@ -664,7 +664,7 @@ function fetchDashboardTasks() {
         console.warn('❌ No hay usuario autenticado; devolviendo lista de tareas vacía');
         return Promise.resolve([]);
     }
-    _dashboardTasksPromise = fetch(buildApiUrl(CONFIG.API_ENDPOINTS.TASKS, `/${usuario_id}`), { cache: 'no-store' })
+    _dashboardTasksPromise = fetch(buildApiUrl(CONFIG.API_ENDPOINTS.TASKS, `/${usuario_id}`), { cache: 'no-cache' })
         .then(response => {
             if (!response.ok) throw new Error('Error al cargar tareas del dashboard');
             return response.json();
@@ -1697,7 +1697,7 @@ function populateAreaSelects() {
     }
 
     // Cargar áreas del usuario
-            fetch(buildApiUrl(CONFIG.API_ENDPOINTS.AREAS, `/${userId}`), { cache: 'no-store' })
+            fetch(buildApiUrl(CONFIG.API_ENDPOINTS.AREAS, `/${userId}`), { cache: 'no-cache' })
         .then(response => response.json())
         .then(data => {
             // El backend devuelve un array directo
@@ -1734,7 +1734,7 @@ async function loadDashboardAreas() {
         }
 
         console.log('📡 Cargando áreas para usuario:', userId);
-                    const response = await fetch(buildApiUrl(CONFIG.API_ENDPOINTS.AREAS, `/${userId}`), { cache: 'no-store' });
+                    const response = await fetch(buildApiUrl(CONFIG.API_ENDPOINTS.AREAS, `/${userId}`), { cache: 'no-cache' });
         if (response.ok) {
             const data = await response.json();
             Logger.debug('Datos completos del backend', data, 'API');
@@ -1770,7 +1770,7 @@ async function loadDashboardGroups() {
         }
 
         console.log('📡 Cargando grupos para usuario:', userId);
-                    const response = await fetch(buildApiUrl(CONFIG.API_ENDPOINTS.GROUPS, `/${userId}`), { cache: 'no-store' });
+                    const response = await fetch(buildApiUrl(CONFIG.API_ENDPOINTS.GROUPS, `/${userId}`), { cache: 'no-cache' });
         if (response.ok) {
             const data = await response.json();
             const groups = data.grupos || [];
@@ -3,8 +3,13 @@ class NotificationManager {
     constructor() {
         this.userId = this.getUserId();
         this.notifications = [];
+        this.nextCursor = null;
+        this.loadingMore = false;
         this.unreadCount = 0;
+        this.pageSize = 50;
         this.pollingInterval = null;
+        this.eventSource = null;
+        this.streamUnavailable = false;
         this.init();
     }
 
@@ -48,24 +53,47 @@ class NotificationManager {
     async loadNotifications() {
         try {
             Logger.info('Cargando notificaciones', null, 'API');
-            const response = await fetch(buildApiUrl(CONFIG.API_ENDPOINTS.NOTIFICATIONS, `/${this.userId}`));
+            // Primera página; el resto se pide al hacer scroll en el panel
+            const response = await fetch(buildApiUrl(CONFIG.API_ENDPOINTS.NOTIFICATIONS, `/${this.userId}?cursor=&limit=${this.pageSize}`));
             
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
             }
             
-            this.notifications = await response.json();
+            const page = await response.json();
+            this.notifications = page.notificaciones;
+            this.nextCursor = page.next_cursor;
             Logger.info(`Notificaciones cargadas: ${this.notifications.length}`, null, 'API');
             
-            // Contar no leídas
-            this.unreadCount = this.notifications.filter(n => !n.leida).length;
-            this.updateNotificationBadge();
+            // Con paginación la lista no tiene todas las no leídas: el contador viene del servidor
+            await this.loadUnreadCount();
             
         } catch (error) {
             Logger.error('Error al cargar notificaciones', error, 'API');
         }
     }
 
+    async loadMoreNotifications() {
+        if (!this.nextCursor || this.loadingMore) return;
+        this.loadingMore = true;
+        try {
+            const cursor = encodeURIComponent(this.nextCursor);
+            const response = await fetch(buildApiUrl(CONFIG.API_ENDPOINTS.NOTIFICATIONS, `/${this.userId}?cursor=${cursor}&limit=${this.pageSize}`));
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            const page = await response.json();
+            const known = new Set(this.notifications.map(n => n.id));
+            this.notifications.push(...page.notificaciones.filter(n => !known.has(n.id)));
+            this.nextCursor = page.next_cursor;
+            this.renderNotifications();
+        } catch (error) {
+            Logger.error('Error al cargar más notificaciones', error, 'API');
+        } finally {
+            this.loadingMore = false;
+        }
+    }
+
     async loadUnreadCount() {
         try {
             const response = await fetch(buildApiUrl(CONFIG.API_ENDPOINTS.NOTIFICATIONS, `/${this.userId}/contar-no-leidas`));
@@ -125,6 +153,9 @@ class NotificationManager {
                     <button class="notification-action" id="markAllReadBtn" title="Marcar todas como leídas">
                         <i class="fas fa-check-double"></i>
                     </button>
+                    <button class="notification-action" id="deleteReadBtn" title="Eliminar leídas">
+                        <i class="fas fa-broom"></i>
+                    </button>
                     <button class="notification-action" id="closeNotificationPanel" title="Cerrar">
                         <i class="fas fa-times"></i>
                     </button>
@@ -144,6 +175,7 @@ class NotificationManager {
         // Event listeners
         const closeBtn = panel.querySelector('#closeNotificationPanel');
         const markAllReadBtn = panel.querySelector('#markAllReadBtn');
+        const deleteReadBtn = panel.querySelector('#deleteReadBtn');
 
         if (closeBtn) {
             closeBtn.addEventListener('click', () => this.hideNotificationPanel());
@@ -153,6 +185,20 @@ class NotificationManager {
             markAllReadBtn.addEventListener('click', () => this.markAllAsRead());
         }
 
+        if (deleteReadBtn) {
+            deleteReadBtn.addEventListener('click', () => this.deleteReadNotifications());
+        }
+
+        // Scroll infinito: siguiente página al acercarse al final de la lista
+        const notificationList = panel.querySelector('#notificationList');
+        if (notificationList) {
+            notificationList.addEventListener('scroll', () => {
+                if (notificationList.scrollTop + notificationList.clientHeight >= notificationList.scrollHeight - 100) {
+                    this.loadMoreNotifications();
+                }
+            });
+        }
+
         // Click fuera para cerrar
         document.addEventListener('click', (e) => {
             if (!panel.contains(e.target) && !e.target.closest('.header__notification')) {
@@ -288,23 +334,33 @@ class NotificationManager {
         }
     }
 
+    // Operación en lote: una petición por interacción; el servidor devuelve el contador actualizado
+    async bulkAction(action, body) {
+        const response = await fetch(buildApiUrl(CONFIG.API_ENDPOINTS.NOTIFICATIONS, `/${this.userId}/${action}-lote`), {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(body)
+        });
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        const result = await response.json();
+        this.unreadCount = result.no_leidas;
+        return result;
+    }
+
     async markAsRead(notificationId) {
         try {
-            const response = await fetch(buildApiUrl(CONFIG.API_ENDPOINTS.NOTIFICATIONS, `/${notificationId}/leer`), {
-                method: 'PUT'
-            });
+            await this.bulkAction('leer', { ids: [notificationId] });
 
-            if (response.ok) {
-                // Actualizar estado local
-                const notification = this.notifications.find(n => n.id === notificationId);
-                if (notification) {
-                    notification.leida = true;
-                }
-                
-                this.unreadCount = Math.max(0, this.unreadCount - 1);
-                this.updateNotificationBadge();
-                this.renderNotifications();
+            // Actualizar estado local
+            const notification = this.notifications.find(n => n.id === notificationId);
+            if (notification) {
+                notification.leida = true;
             }
+            
+            this.updateNotificationBadge();
+            this.renderNotifications();
         } catch (error) {
             console.error('❌ Error al marcar notificación como leída:', error);
         }
@@ -312,17 +368,12 @@ class NotificationManager {
 
     async markAllAsRead() {
         try {
-            const response = await fetch(buildApiUrl(CONFIG.API_ENDPOINTS.NOTIFICATIONS, `/${this.userId}/leer-todas`), {
-                method: 'PUT'
-            });
+            await this.bulkAction('leer', {});
 
-            if (response.ok) {
-                // Actualizar estado local
-                this.notifications.forEach(n => n.leida = true);
-                this.unreadCount = 0;
-                this.updateNotificationBadge();
+            // Actualizar estado local
+            this.notifications.forEach(n => n.leida = true);
+            this.updateNotificationBadge();
             this.renderNotifications();
-            }
         } catch (error) {
             console.error('❌ Error al marcar todas las notificaciones como leídas:', error);
         }
@@ -334,26 +385,33 @@ class NotificationManager {
         }
 
         try {
-            const response = await fetch(buildApiUrl(CONFIG.API_ENDPOINTS.NOTIFICATIONS, `/${notificationId}`), {
-                method: 'DELETE'
-            });
+            await this.bulkAction('eliminar', { ids: [notificationId] });
 
-            if (response.ok) {
-                // Remover de la lista local
-                const notification = this.notifications.find(n => n.id === notificationId);
-                if (notification && !notification.leida) {
-                    this.unreadCount = Math.max(0, this.unreadCount - 1);
-                }
-                
-                this.notifications = this.notifications.filter(n => n.id !== notificationId);
-                this.updateNotificationBadge();
-                this.renderNotifications();
-            }
+            // Remover de la lista local
+            this.notifications = this.notifications.filter(n => n.id !== notificationId);
+            this.updateNotificationBadge();
+            this.renderNotifications();
         } catch (error) {
             console.error('❌ Error al eliminar notificación:', error);
         }
     }
 
+    async deleteReadNotifications() {
+        if (!confirm('¿Eliminar todas las notificaciones leídas?')) {
+            return;
+        }
+
+        try {
+            await this.bulkAction('eliminar', { solo_leidas: true });
+
+            this.notifications = this.notifications.filter(n => !n.leida);
+            this.updateNotificationBadge();
+            this.renderNotifications();
+        } catch (error) {
+            console.error('❌ Error al eliminar notificaciones leídas:', error);
+        }
+    }
+
     getNotificationIcon(tipo) {
         const icons = {
             'grupo_invitacion': 'fa-user-plus',
@@ -381,13 +439,58 @@ class NotificationManager {
     }
 
     startPolling() {
+        // Tiempo real por SSE; si el navegador no lo soporta o el servidor lo rechaza, sondeo
+        if (typeof EventSource !== 'undefined' && !this.eventSource && !this.streamUnavailable) {
+            this.startStream();
+            return;
+        }
+        this.startIntervalPolling();
+    }
+
+    startIntervalPolling() {
+        if (this.pollingInterval) return;
         // Actualizar notificaciones cada 30 segundos
         this.pollingInterval = setInterval(() => {
             this.loadUnreadCount();
         }, 30000);
     }
 
+    startStream() {
+        const source = new EventSource(buildApiUrl(CONFIG.API_ENDPOINTS.NOTIFICATIONS, `/${this.userId}/stream`));
+        this.eventSource = source;
+        let connectedBefore = false;
+
+        source.addEventListener('open', () => {
+            // Al reconectar pueden haberse perdido eventos: recargar la lista (304 si no cambió)
+            if (connectedBefore) this.loadNotifications();
+            connectedBefore = true;
+        });
+        source.addEventListener('contador', (event) => {
+            this.unreadCount = JSON.parse(event.data).count;
+            this.updateNotificationBadge();
+        });
+        source.addEventListener('notificacion', (event) => {
+            const notification = JSON.parse(event.data);
+            if (this.notifications.some(n => n.id === notification.id)) return;
+            this.notifications.unshift(notification);
+            const panel = document.getElementById('notificationPanel');
+            if (panel && panel.style.display === 'block') this.renderNotifications();
+        });
+        source.onerror = () => {
+            // CLOSED: respuesta distinta de 200 (p. ej. 503 sin hueco); EventSource no reintenta
+            if (source.readyState === EventSource.CLOSED) {
+                this.eventSource = null;
+                this.streamUnavailable = true;
+                this.startIntervalPolling();
+            }
+        };
+    }
+
     stopPolling() {
+        if (this.eventSource) {
+            this.eventSource.close();
+            this.eventSource = null;
+        }
         if (this.pollingInterval) {
             clearInterval(this.pollingInterval);
             this.pollingInterval = null;
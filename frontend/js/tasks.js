@@ -109,7 +109,7 @@ class TasksManager {
         // Crear una nueva promesa para la carga de tareas
         const userId = this.getUserId();
         const url = buildApiUrl(CONFIG.API_ENDPOINTS.TASKS, `/${userId}?limit=100&offset=0`);
-        this._loadTasksPromise = fetch(url, { cache: 'no-store' })
+        this._loadTasksPromise = fetch(url, { cache: 'no-cache' })
             .then(response => {
                 // Verificar si la respuesta es válida
                 if (!response.ok) {
@@ -2250,7 +2250,7 @@ async function populateTaskAreaSelect() {
     try {
         const url = buildApiUrl(CONFIG.API_ENDPOINTS.AREAS, `/${usuario_id}`);
         console.log('URL fetch:', url);
-        const response = await fetch(url, { cache: 'no-store' });
+        const response = await fetch(url, { cache: 'no-cache' });
         if (response.ok) {
             let areas = await response.json();
             // Filtrar solo áreas activas
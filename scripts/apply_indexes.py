@@ -32,7 +32,25 @@ INDEXES: List[IndexDef] = [
     ("tareas", "idx_tareas_asignado_estado_fecha", "(asignado_a_id, estado, fecha_creacion)"),
     ("tareas", "idx_tareas_grupo_estado_fecha", "(grupo_id, estado, fecha_creacion)"),
     ("tareas", "idx_tareas_area_estado", "(area_id, estado)"),
+    # Pendientes por vencimiento (parte del dashboard que depende del reloj)
+    ("tareas", "idx_tareas_usuario_estado_venc", "(usuario_id, estado, fecha_vencimiento)"),
+    ("tareas", "idx_tareas_asignado_estado_venc", "(asignado_a_id, estado, fecha_vencimiento)"),
+    ("tareas", "idx_tareas_grupo_estado_venc", "(grupo_id, estado, fecha_vencimiento)"),
+    # Barrido de vencidas: pendientes por fecha de vencimiento
+    ("tareas", "idx_tareas_estado_venc", "(estado, fecha_vencimiento)"),
+    # Paginación por cursor (fecha_creacion, id) en listados de tareas
+    ("tareas", "idx_tareas_usuario_creacion_id", "(usuario_id, fecha_creacion, id)"),
+    ("tareas", "idx_tareas_asignado_creacion_id", "(asignado_a_id, fecha_creacion, id)"),
+    ("tareas", "idx_tareas_grupo_creacion_id", "(grupo_id, fecha_creacion, id)"),
+    # Sincronización incremental (/sync): cambios por usuario desde una marca de tiempo
+    ("tareas", "idx_tareas_usuario_actualizado", "(usuario_id, actualizado_en)"),
+    ("tareas", "idx_tareas_asignado_actualizado", "(asignado_a_id, actualizado_en)"),
+    ("areas", "idx_areas_usuario_actualizado", "(usuario_id, actualizado_en)"),
     ("notificaciones", "idx_notif_usuario_leida", "(usuario_id, leida)"),
+    # Notificaciones paginadas por cursor (todas / solo no leídas) y archivo de leídas antiguas
+    ("notificaciones", "idx_notif_usuario_creacion_id", "(usuario_id, fecha_creacion, id)"),
+    ("notificaciones", "idx_notif_usuario_leida_creacion", "(usuario_id, leida, fecha_creacion, id)"),
+    ("notificaciones", "idx_notif_leida_fecha", "(leida, fecha_creacion)"),
     # miembros_grupo ya tiene PK (grupo_id, usuario_id); añadimos el inverso
     ("miembros_grupo", "idx_mg_usuario_grupo", "(usuario_id, grupo_id)"),
     # Opcionales útiles
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Aplica las tablas y columnas auxiliares que usa el backend de Astren (local y nube).
+
+Uso:
+  - Con archivo de entorno:
+      python scripts/apply_schema.py --env-file backend/env.production
+  - Con parámetros explícitos:
+      python scripts/apply_schema.py --host localhost --user root --password YOUR_PASSWORD --database astren --port 3306
+
+Seguro: solo crea lo que no existe (verifica en information_schema).
+"""
+
+import argparse
+from typing import List, Tuple
+
+from apply_indexes import connect_mysql, load_env, resolve_config
+
+
+TableDef = Tuple[str, str]  # (table_name, create_sql)
+ColumnDef = Tuple[str, str, str]  # (table_name, column_name, definition)
+
+
+TABLES: List[TableDef] = [
+    # Versión por clave ('usuario:<id>', ...) para cachés e invalidación entre workers
+    ("versiones_datos", """
+        CREATE TABLE versiones_datos (
+            clave VARCHAR(64) NOT NULL PRIMARY KEY,
+            version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+            actualizado TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB
+    """),
+    # Respuestas de escrituras idempotentes (Idempotency-Key o firma del contenido)
+    ("idempotencia", """
+        CREATE TABLE idempotencia (
+            clave CHAR(64) NOT NULL PRIMARY KEY,
+            huella CHAR(64) NOT NULL,
+            estado ENUM('en_curso', 'completa') NOT NULL,
+            status SMALLINT NULL,
+            cuerpo MEDIUMBLOB NULL,
+            tipo VARCHAR(100) NULL,
+            expira DATETIME(3) NOT NULL,
+            INDEX idx_idempotencia_expira (expira)
+        ) ENGINE=InnoDB
+    """),
+    # Tareas por estado de cada usuario (como creador o asignado); mantenidos por la app
+    # con deltas y reparados por scripts/reconciliar_contadores.py
+    ("contadores_usuario", """
+        CREATE TABLE contadores_usuario (
+            usuario_id INT NOT NULL PRIMARY KEY,
+            pendientes INT NOT NULL DEFAULT 0,
+            completadas INT NOT NULL DEFAULT 0,
+            vencidas INT NOT NULL DEFAULT 0,
+            actualizado TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB
+    """),
+    # Tareas por estado de cada área
+    ("contadores_area", """
+        CREATE TABLE contadores_area (
+            area_id INT NOT NULL PRIMARY KEY,
+            pendientes INT NOT NULL DEFAULT 0,
+            completadas INT NOT NULL DEFAULT 0,
+            vencidas INT NOT NULL DEFAULT 0,
+            actualizado TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB
+    """),
+    # Tareas por estado y número de miembros de cada grupo (listados de grupos)
+    ("grupo_estadisticas", """
+        CREATE TABLE grupo_estadisticas (
+            grupo_id INT NOT NULL PRIMARY KEY,
+            miembros INT NOT NULL DEFAULT 0,
+            pendientes INT NOT NULL DEFAULT 0,
+            completadas INT NOT NULL DEFAULT 0,
+            vencidas INT NOT NULL DEFAULT 0,
+            actualizado TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB
+    """),
+    # Lápidas de borrados físicos para /sync (las tareas se eliminan lógicamente)
+    ("eliminaciones", """
+        CREATE TABLE eliminaciones (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            entidad VARCHAR(20) NOT NULL,
+            entidad_id INT NOT NULL,
+            usuario_id INT NOT NULL,
+            eliminado_en TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+            INDEX idx_eliminaciones_usuario (usuario_id, eliminado_en),
+            INDEX idx_eliminaciones_fecha (eliminado_en)
+        ) ENGINE=InnoDB
+    """),
+    # Notificaciones leídas antiguas que archiva la app (NOTIFICACIONES_RETENCION_DIAS);
+    # misma estructura que notificaciones
+    ("notificaciones_archivo", "CREATE TABLE notificaciones_archivo LIKE notificaciones"),
+]
+
+
+# Marca de última modificación mantenida por MySQL, para la sincronización incremental (/sync)
+_ACTUALIZADO_EN = "TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3) ON UPDATE CURRENT_TIMESTAMP(3)"
+
+COLUMNS: List[ColumnDef] = [
+    ("tareas", "actualizado_en", _ACTUALIZADO_EN),
+    ("areas", "actualizado_en", _ACTUALIZADO_EN),
+    ("grupos", "actualizado_en", _ACTUALIZADO_EN),
+]
+
+
+def table_exists(cursor, db_name: str, table: str) -> bool:
+    cursor.execute(
+        """
+        SELECT 1
+        FROM information_schema.tables
+        WHERE table_schema = %s AND table_name = %s
+        LIMIT 1
+        """,
+        (db_name, table),
+    )
+    return cursor.fetchone() is not None
+
+
+def ensure_table(cursor, db_name: str, table: str, ddl: str) -> bool:
+    if table_exists(cursor, db_name, table):
+        print(f"[=] Tabla ya existe: {table}")
+        return False
+    print(f"[+] Creando tabla: {table}")
+    cursor.execute(ddl)
+    return True
+
+
+def column_exists(cursor, db_name: str, table: str, column: str) -> bool:
+    cursor.execute(
+        """
+        SELECT 1
+        FROM information_schema.columns
+        WHERE table_schema = %s AND table_name = %s AND column_name = %s
+        LIMIT 1
+        """,
+        (db_name, table, column),
+    )
+    return cursor.fetchone() is not None
+
+
+def ensure_column(cursor, db_name: str, table: str, column: str, definition: str) -> bool:
+    if column_exists(cursor, db_name, table, column):
+        print(f"[=] Columna ya existe: {table}.{column}")
+        return False
+    print(f"[+] Añadiendo columna: {table}.{column}")
+    cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aplica tablas auxiliares MySQL para Astren")
+    parser.add_argument("--env-file", dest="env_file", default=None, help="Ruta a archivo .env a cargar")
+    parser.add_argument("--host", dest="host", default=None)
+    parser.add_argument("--user", dest="user", default=None)
+    parser.add_argument("--password", dest="password", default=None)
+    parser.add_argument("--database", dest="database", default=None)
+    parser.add_argument("--port", dest="port", default=None)
+    args = parser.parse_args()
+
+    load_env(args.env_file)
+    cfg = resolve_config(args)
+    print("[INFO] Conectando:", {k: ("****" if k == "password" else v) for k, v in cfg.items()})
+
+    conn = connect_mysql(**cfg)
+    cursor = conn.cursor()
+
+    created = 0
+    for tbl, ddl in TABLES:
+        try:
+            if ensure_table(cursor, cfg["database"], tbl, ddl):
+                created += 1
+        except Exception as e:
+            print(f"[ERROR] No se pudo crear {tbl}: {e}")
+
+    added = 0
+    for tbl, col, definition in COLUMNS:
+        try:
+            if ensure_column(cursor, cfg["database"], tbl, col, definition):
+                added += 1
+        except Exception as e:
+            print(f"[ERROR] No se pudo añadir {tbl}.{col}: {e}")
+
+    conn.commit()
+    cursor.close()
+    conn.close()
+    print(f"[DONE] Tablas creadas: {created}, columnas añadidas: {added}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tiempo hasta la primera petición de un backend recién arrancado con gunicorn.
+
+- antes:   gunicorn sin configuración; cada worker crea el pool en su primera petición
+- despues: gunicorn -c gunicorn.conf.py; preload + pool creado y calentado en post_fork
+
+Para cada modo se lanza gunicorn, se mide el tiempo desde el arranque hasta la
+primera respuesta 200 de la ruta indicada y la latencia de las primeras peticiones
+(una por worker como mínimo), y se detiene el servidor.
+
+Uso:
+  python scripts/bench_arranque.py --workers 2 --repeticiones 3
+"""
+
+import argparse
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+
+
+def _get(url: str, timeout: float = 10.0) -> int:
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as resp:
+            resp.read()
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def medir_arranque(modo: str, puerto: int, workers: int, ruta: str, peticiones: int) -> dict:
+    comando = [sys.executable, "-m", "gunicorn", "-w", str(workers), "-b", f"127.0.0.1:{puerto}"]
+    if modo == "despues":
+        comando += ["-c", "gunicorn.conf.py"]
+    comando.append("app:app")
+    env = dict(os.environ, PORT=str(puerto), WEB_CONCURRENCY=str(workers))
+
+    url = f"http://127.0.0.1:{puerto}{ruta}"
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(comando, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        listo = None
+        while listo is None:
+            if proc.poll() is not None:
+                raise RuntimeError(f"gunicorn terminó al arrancar ({modo}), código {proc.returncode}")
+            try:
+                if _get(url, timeout=2.0) == 200:
+                    listo = time.perf_counter() - t0
+            except (urllib.error.URLError, ConnectionError, OSError):
+                time.sleep(0.02)
+            if time.perf_counter() - t0 > 60:
+                raise RuntimeError(f"Sin respuesta 200 de {url} en 60s ({modo})")
+
+        latencias = []
+        for _ in range(peticiones):
+            t = time.perf_counter()
+            _get(url)
+            latencias.append((time.perf_counter() - t) * 1000)
+        return {"listo_ms": listo * 1000, "primeras_ms": latencias}
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo hasta la primera petición (antes/después del calentamiento)")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--ruta", default="/debug/health", help="Ruta que toca la base de datos")
+    parser.add_argument("--peticiones", type=int, default=None, help="Peticiones tras el arranque (por defecto 4 por worker)")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+    peticiones = args.peticiones or args.workers * 4
+
+    print(f"[INFO] backend={os.path.normpath(BACKEND_DIR)} workers={args.workers} ruta={args.ruta}")
+    for modo in ("antes", "despues"):
+        listos, maximos = [], []
+        for _ in range(args.repeticiones):
+            r = medir_arranque(modo, args.puerto, args.workers, args.ruta, peticiones)
+            listos.append(r["listo_ms"])
+            maximos.append(max(r["primeras_ms"]))
+        print(f"{modo:<8} primera_respuesta={statistics.median(listos):.0f}ms "
+              f"peor_latencia_inicial={statistics.median(maximos):.1f}ms (mediana de {args.repeticiones})")
+
+
+if __name__ == "__main__":
+    main()
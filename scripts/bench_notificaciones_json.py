@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Serialización de la lista de notificaciones: parsear datos_adicionales vs. incrustarlo tal cual.
+
+Genera N filas con la forma que devuelve MySQL para `notificaciones` (datos_adicionales
+como texto JSON) y mide, para la lista completa:
+
+- antes:   json.loads de cada datos_adicionales + orjson.dumps de la respuesta
+- despues: orjson.Fragment con el texto guardado + orjson.dumps (sin parsear)
+
+Se informa la mediana de CPU por serialización y el pico de memoria asignada (tracemalloc),
+y se comprueba que ambas respuestas son equivalentes. No necesita base de datos.
+
+Uso:
+  python scripts/bench_notificaciones_json.py --notificaciones 5000
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import orjson
+
+TIPOS = ("tarea_asignada", "grupo_invitacion", "grupo_removido", "grupo_invitacion_aceptada")
+
+
+def generar_filas(n: int):
+    inicio = datetime(2024, 1, 1)
+    filas = []
+    for i in range(n):
+        tipo = random.choice(TIPOS)
+        datos = {
+            "tarea_id": random.randint(1, 10 ** 6),
+            "grupo_id": random.randint(1, 10 ** 4),
+            "grupo_nombre": f"Grupo {i % 300}",
+            "titulo_tarea": f"Revisar entrega {i}",
+            "rol": random.choice(("miembro", "lider", "administrador")),
+            "tipo": tipo,
+        }
+        filas.append({
+            "id": n - i,
+            "tipo": tipo,
+            "titulo": "Nueva tarea asignada",
+            "mensaje": f"Te han asignado la tarea 'Revisar entrega {i}' en el grupo 'Grupo {i % 300}'.",
+            "datos_adicionales": orjson.dumps(datos).decode(),
+            "leida": i % 3 == 0,
+            "fecha_creacion": (inicio + timedelta(minutes=i)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        })
+    return filas
+
+
+def respuesta_antes(filas):
+    salida = []
+    for fila in filas:
+        notif = dict(fila)
+        notif["datos_adicionales"] = json.loads(notif["datos_adicionales"])
+        salida.append(notif)
+    return orjson.dumps(salida)
+
+
+def respuesta_despues(filas):
+    salida = []
+    for fila in filas:
+        notif = dict(fila)
+        notif["datos_adicionales"] = orjson.Fragment(notif["datos_adicionales"])
+        salida.append(notif)
+    return orjson.dumps(salida)
+
+
+def medir(funcion, filas, repeticiones: int):
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.process_time()
+        funcion(filas)
+        tiempos.append((time.process_time() - t0) * 1000)
+    tracemalloc.start()
+    cuerpo = funcion(filas)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(tiempos), pico, len(cuerpo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serialización de notificaciones: json.loads vs. orjson.Fragment")
+    parser.add_argument("--notificaciones", type=int, default=5000)
+    parser.add_argument("--repeticiones", type=int, default=50)
+    args = parser.parse_args()
+
+    filas = generar_filas(args.notificaciones)
+    assert orjson.loads(respuesta_antes(filas)) == orjson.loads(respuesta_despues(filas)), "las respuestas difieren"
+    print(f"[INFO] {args.notificaciones} notificaciones, {args.repeticiones} repeticiones")
+
+    print(f"{'modo':>8} {'cpu_ms':>8} {'pico_kb':>9} {'bytes':>9}")
+    resultados = {}
+    for modo, funcion in (("antes", respuesta_antes), ("despues", respuesta_despues)):
+        cpu_ms, pico, tam = medir(funcion, filas, args.repeticiones)
+        resultados[modo] = (cpu_ms, pico)
+        print(f"{modo:>8} {cpu_ms:>8.2f} {pico / 1024:>9.0f} {tam:>9}")
+    (cpu_a, pico_a), (cpu_d, pico_d) = resultados["antes"], resultados["despues"]
+    print(f"[INFO] CPU x{cpu_a / max(cpu_d, 1e-9):.1f} menos, memoria pico x{pico_a / max(pico_d, 1):.1f} menos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Paginación de tareas: LIMIT/OFFSET vs. cursor (fecha_creacion, id).
+
+Crea una tabla temporal `bench_tareas` (columnas de `tareas` que intervienen en el
+listado, con el índice (usuario_id, fecha_creacion, id)) con N tareas de un mismo
+usuario y mide, para páginas a distintas profundidades:
+
+- offset:  ... ORDER BY fecha_creacion DESC, id DESC LIMIT n OFFSET k
+- cursor:  ... AND (fecha_creacion < f OR (fecha_creacion = f AND id < i)) ... LIMIT n
+
+Con OFFSET la latencia crece con k (se leen y descartan k filas); con cursor es constante.
+La tabla se elimina al terminar salvo --conservar.
+
+Uso:
+  python scripts/bench_paginacion.py --env-file backend/env.local --tareas 150000
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from apply_indexes import connect_mysql, load_env, resolve_config
+
+TABLA = "bench_tareas"
+USUARIO = 1
+
+
+def crear_tabla(conn, n: int):
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS {TABLA}")
+    cursor.execute(f"""
+        CREATE TABLE {TABLA} (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            usuario_id INT NOT NULL,
+            titulo VARCHAR(255) NOT NULL,
+            descripcion TEXT NULL,
+            estado VARCHAR(20) NOT NULL DEFAULT 'pendiente',
+            fecha_creacion DATETIME NOT NULL,
+            fecha_vencimiento DATETIME NULL,
+            INDEX idx_bench_usuario_creacion_id (usuario_id, fecha_creacion, id)
+        ) ENGINE=InnoDB
+    """)
+    inicio = datetime(2020, 1, 1)
+    lote = []
+    for i in range(n):
+        # Varias tareas por segundo: el desempate por id importa
+        creada = inicio + timedelta(seconds=i // 3)
+        estado = "eliminada" if i % 50 == 0 else random.choice(("pendiente", "completada", "vencida"))
+        lote.append((USUARIO, f"Tarea {i}", "x" * 80, estado, creada, creada + timedelta(days=7)))
+        if len(lote) == 5000:
+            cursor.executemany(
+                f"INSERT INTO {TABLA} (usuario_id, titulo, descripcion, estado, fecha_creacion, fecha_vencimiento) "
+                "VALUES (%s, %s, %s, %s, %s, %s)", lote)
+            lote = []
+    if lote:
+        cursor.executemany(
+            f"INSERT INTO {TABLA} (usuario_id, titulo, descripcion, estado, fecha_creacion, fecha_vencimiento) "
+            "VALUES (%s, %s, %s, %s, %s, %s)", lote)
+    conn.commit()
+    cursor.execute(f"ANALYZE TABLE {TABLA}")
+    cursor.fetchall()
+    cursor.close()
+
+
+def pagina_offset(conn, offset: int, limite: int):
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT id, titulo, descripcion, estado, fecha_creacion, fecha_vencimiento FROM {TABLA}
+        WHERE usuario_id = %s AND estado != 'eliminada'
+        ORDER BY fecha_creacion DESC, id DESC
+        LIMIT %s OFFSET %s
+    """, (USUARIO, limite, offset))
+    filas = cursor.fetchall()
+    cursor.close()
+    return filas
+
+
+def pagina_cursor(conn, despues, limite: int):
+    fecha, tarea_id = despues
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT id, titulo, descripcion, estado, fecha_creacion, fecha_vencimiento FROM {TABLA}
+        WHERE usuario_id = %s AND estado != 'eliminada'
+          AND (fecha_creacion < %s OR (fecha_creacion = %s AND id < %s))
+        ORDER BY fecha_creacion DESC, id DESC
+        LIMIT %s
+    """, (USUARIO, fecha, fecha, tarea_id, limite))
+    filas = cursor.fetchall()
+    cursor.close()
+    return filas
+
+
+def medir(funcion, repeticiones: int):
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paginación de tareas: OFFSET vs. cursor")
+    parser.add_argument("--env-file", dest="env_file", default=None, help="Ruta a archivo .env a cargar")
+    parser.add_argument("--host", dest="host", default=None)
+    parser.add_argument("--user", dest="user", default=None)
+    parser.add_argument("--password", dest="password", default=None)
+    parser.add_argument("--database", dest="database", default=None)
+    parser.add_argument("--port", dest="port", default=None)
+    parser.add_argument("--tareas", type=int, default=150000)
+    parser.add_argument("--limite", type=int, default=50, help="Filas por página")
+    parser.add_argument("--profundidades", default="0,1000,10000,50000,100000")
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--conservar", action="store_true", help="No borrar la tabla al terminar")
+    args = parser.parse_args()
+
+    load_env(args.env_file)
+    cfg = resolve_config(args)
+    print("[INFO] Conectando:", {k: ("****" if k == "password" else v) for k, v in cfg.items()})
+    conn = connect_mysql(**cfg)
+
+    try:
+        t0 = time.perf_counter()
+        crear_tabla(conn, args.tareas)
+        print(f"[INFO] {args.tareas} tareas sintéticas en {time.perf_counter() - t0:.1f}s")
+
+        print(f"{'profundidad':>12} {'offset_ms':>10} {'cursor_ms':>10}")
+        for profundidad in (int(p) for p in args.profundidades.split(",")):
+            # El cursor de esa profundidad es la última fila de la página anterior
+            if profundidad == 0:
+                despues = (datetime(9999, 12, 31), 2 ** 31 - 1)
+            else:
+                previa = pagina_offset(conn, profundidad - 1, 1)
+                if not previa:
+                    print(f"{profundidad:>12} (más allá del final)")
+                    continue
+                despues = (previa[0][4], previa[0][0])
+            assert [f[0] for f in pagina_offset(conn, profundidad, args.limite)] == \
+                [f[0] for f in pagina_cursor(conn, despues, args.limite)], "offset y cursor difieren"
+            ms_offset = medir(lambda: pagina_offset(conn, profundidad, args.limite), args.repeticiones)
+            ms_cursor = medir(lambda: pagina_cursor(conn, despues, args.limite), args.repeticiones)
+            print(f"{profundidad:>12} {ms_offset:>10.2f} {ms_cursor:>10.2f}")
+    finally:
+        if not args.conservar:
+            cursor = conn.cursor()
+            cursor.execute(f"DROP TABLE IF EXISTS {TABLA}")
+            cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
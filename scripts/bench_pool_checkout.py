@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark de checkout del pool MySQL: antes vs. después de configurar la sesión por conexión física.
+
+- antes:   pool con reset de sesión + `SET time_zone` en cada checkout (comportamiento anterior)
+- despues: time_zone/charset/sql_mode aplicados al crear la conexión, sin reset al devolverla
+
+Cada iteración simula la llamada de un helper: checkout, `SELECT 1`, devolución al pool.
+
+Uso:
+  python scripts/bench_pool_checkout.py --env-file backend/env.local --iteraciones 2000
+"""
+
+import argparse
+import statistics
+import time
+
+from mysql.connector import pooling
+
+from apply_indexes import load_env, resolve_config
+
+
+def _pool(cfg: dict, nombre: str, reset_session: bool, **extra) -> pooling.MySQLConnectionPool:
+    return pooling.MySQLConnectionPool(
+        pool_name=nombre,
+        pool_size=2,
+        pool_reset_session=reset_session,
+        connection_timeout=10,
+        **cfg,
+        **extra,
+    )
+
+
+def checkout_antes(pool):
+    conn = pool.get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SET time_zone = '+00:00'")
+    cursor.close()
+    return conn
+
+
+def checkout_despues(pool):
+    conn = pool.get_connection()
+    if conn.in_transaction:
+        conn.rollback()
+    return conn
+
+
+def medir(pool, checkout, iteraciones: int) -> list:
+    tiempos = []
+    for _ in range(iteraciones):
+        t0 = time.perf_counter()
+        conn = checkout(pool)
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+        cursor.fetchall()
+        cursor.close()
+        conn.commit()
+        conn.close()
+        tiempos.append((time.perf_counter() - t0) * 1000)
+    return tiempos
+
+
+def resumen(nombre: str, tiempos: list):
+    ordenados = sorted(tiempos)
+    p95 = ordenados[int(len(ordenados) * 0.95) - 1]
+    print(f"{nombre:<8} media={statistics.mean(tiempos):.3f}ms p50={statistics.median(tiempos):.3f}ms p95={p95:.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia de checkout del pool MySQL (antes/después)")
+    parser.add_argument("--env-file", dest="env_file", default=None, help="Ruta a archivo .env a cargar")
+    parser.add_argument("--host", dest="host", default=None)
+    parser.add_argument("--user", dest="user", default=None)
+    parser.add_argument("--password", dest="password", default=None)
+    parser.add_argument("--database", dest="database", default=None)
+    parser.add_argument("--port", dest="port", default=None)
+    parser.add_argument("--iteraciones", type=int, default=1000)
+    args = parser.parse_args()
+
+    load_env(args.env_file)
+    cfg = resolve_config(args)
+    print("[INFO] Conectando:", {k: ("****" if k == "password" else v) for k, v in cfg.items()})
+
+    antes = _pool(cfg, "bench_antes", reset_session=True)
+    despues = _pool(cfg, "bench_despues", reset_session=False, time_zone="+00:00", charset="utf8mb4")
+
+    # Calentar ambos pools antes de medir
+    medir(antes, checkout_antes, 20)
+    medir(despues, checkout_despues, 20)
+
+    resumen("antes", medir(antes, checkout_antes, args.iteraciones))
+    resumen("despues", medir(despues, checkout_despues, args.iteraciones))
+
+
+if __name__ == "__main__":
+    main()
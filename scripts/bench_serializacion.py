@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Serialización de listados de tareas: strftime por fila + str vs. orjson nativo a bytes.
+
+Genera N tareas con la forma que devuelve MySQL (fechas como datetime sin zona, en UTC)
+y mide, para la respuesta completa:
+
+- antes:   strftime('%Y-%m-%dT%H:%M:%SZ') en cada fecha de cada fila, orjson.dumps(...).decode()
+           y la codificación a bytes que hacía Flask al construir la respuesta
+- despues: orjson.dumps con OPT_NAIVE_UTC | OPT_UTC_Z | OPT_OMIT_MICROSECONDS, bytes directos
+           (ORJSONProvider.response)
+
+Se informa la mediana de CPU por respuesta y el pico de memoria asignada (tracemalloc),
+y se comprueba que ambos cuerpos son idénticos. No necesita base de datos.
+
+Uso:
+  python scripts/bench_serializacion.py --tareas 10000
+"""
+
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import orjson
+
+OPCIONES = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z | orjson.OPT_OMIT_MICROSECONDS
+
+
+def generar_tareas(n: int):
+    inicio = datetime(2024, 1, 1)
+    tareas = []
+    for i in range(n):
+        creada = inicio + timedelta(minutes=i * 7)
+        tareas.append({
+            "id": n - i,
+            "titulo": f"Tarea {i}",
+            "descripcion": "Descripción de prueba " * 3,
+            "estado": random.choice(("pendiente", "completada", "vencida")),
+            "fecha_creacion": creada,
+            "fecha_vencimiento": creada + timedelta(days=7) if i % 4 else None,
+            "area_id": random.randint(1, 50),
+            "area_nombre": f"Área {i % 50}",
+            "area_color": "#3b82f6",
+            "grupo_id": None,
+            "asignado_a_id": None,
+        })
+    return tareas
+
+
+def respuesta_antes(tareas):
+    filas = [dict(t) for t in tareas]
+    for tarea in filas:
+        for campo in ("fecha_creacion", "fecha_vencimiento"):
+            if isinstance(tarea[campo], datetime):
+                tarea[campo] = tarea[campo].strftime("%Y-%m-%dT%H:%M:%SZ")
+    return orjson.dumps(filas).decode().encode("utf-8")
+
+
+def respuesta_despues(tareas):
+    return orjson.dumps(tareas, option=OPCIONES)
+
+
+def medir(funcion, tareas, repeticiones: int):
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.process_time()
+        funcion(tareas)
+        tiempos.append((time.process_time() - t0) * 1000)
+    tracemalloc.start()
+    cuerpo = funcion(tareas)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(tiempos), pico, len(cuerpo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serialización de tareas: strftime por fila vs. orjson nativo")
+    parser.add_argument("--tareas", type=int, default=10000)
+    parser.add_argument("--repeticiones", type=int, default=50)
+    args = parser.parse_args()
+
+    tareas = generar_tareas(args.tareas)
+    assert respuesta_antes(tareas) == respuesta_despues(tareas), "los cuerpos difieren"
+    print(f"[INFO] {args.tareas} tareas, {args.repeticiones} repeticiones")
+
+    print(f"{'modo':>8} {'cpu_ms':>8} {'pico_kb':>9} {'bytes':>9}")
+    resultados = {}
+    for modo, funcion in (("antes", respuesta_antes), ("despues", respuesta_despues)):
+        cpu_ms, pico, tam = medir(funcion, tareas, args.repeticiones)
+        resultados[modo] = (cpu_ms, pico)
+        print(f"{modo:>8} {cpu_ms:>8.2f} {pico / 1024:>9.0f} {tam:>9}")
+    (cpu_a, pico_a), (cpu_d, pico_d) = resultados["antes"], resultados["despues"]
+    print(f"[INFO] CPU x{cpu_a / max(cpu_d, 1e-9):.1f} menos, memoria pico x{pico_a / max(pico_d, 1):.1f} menos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Prueba de concurrencia del stream SSE de notificaciones (/notificaciones/<id>/stream).
+
+Abre N suscriptores inactivos contra un backend en marcha (repartidos entre varios
+usuarios), los mantiene abiertos un tiempo y después inserta notificaciones directamente
+en MySQL (como lo haría otro worker: fila + versión 'notificaciones:<id>'). Mide:
+
+- cuántos streams se aceptan (200) y cuántos se rechazan (503 por SSE_MAX_SUSCRIPTORES)
+- cuántos siguen abiertos tras el periodo de inactividad
+- latencia desde el commit hasta que cada pestaña del usuario recibe el evento
+- métricas del hub (/debug/metrics -> sse), si la ruta está disponible
+
+Las notificaciones insertadas se borran al terminar. Con miles de suscriptores hay que
+subir el límite de descriptores del cliente (ulimit -n) y, en el servidor, SSE_MAX_SUSCRIPTORES.
+
+Uso:
+  python scripts/bench_sse.py --env-file backend/env.local --url http://127.0.0.1:8000 --suscriptores 2000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+import urllib.parse
+import urllib.request
+
+from apply_indexes import connect_mysql, load_env, resolve_config
+
+
+class Estado:
+    def __init__(self):
+        self.aceptados = 0
+        self.rechazados = 0
+        self.errores = 0
+        self.abiertos = 0
+        self.recibidos = {}  # usuario_id -> [perf_counter de cada evento 'notificacion']
+
+
+async def suscriptor(host: str, port: int, usuario_id: int, estado: Estado):
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        estado.errores += 1
+        return
+    try:
+        writer.write(
+            f"GET /notificaciones/{usuario_id}/stream HTTP/1.1\r\nHost: {host}\r\n"
+            "Accept: text/event-stream\r\n\r\n".encode()
+        )
+        await writer.drain()
+        cabecera = await reader.readuntil(b"\r\n\r\n")
+        if int(cabecera.split()[1]) != 200:
+            estado.rechazados += 1
+            return
+        estado.aceptados += 1
+        estado.abiertos += 1
+        try:
+            # Cada evento llega entero en un chunk; las líneas de tamaño de chunk se ignoran
+            while True:
+                linea = await reader.readline()
+                if not linea:
+                    break
+                if linea.startswith(b"event: notificacion"):
+                    estado.recibidos.setdefault(usuario_id, []).append(time.perf_counter())
+        finally:
+            estado.abiertos -= 1
+    except (OSError, asyncio.IncompleteReadError):
+        estado.errores += 1
+    finally:
+        writer.close()
+
+
+def insertar_notificacion(conn, usuario_id: int) -> int:
+    cursor = conn.cursor()
+    cursor.execute(
+        "INSERT INTO notificaciones (usuario_id, tipo, titulo, mensaje) VALUES (%s, 'bench_sse', 'Bench SSE', 'Prueba de entrega')",
+        (usuario_id,),
+    )
+    notificacion_id = cursor.lastrowid
+    cursor.execute(
+        "INSERT INTO versiones_datos (clave, version) VALUES (%s, 1) ON DUPLICATE KEY UPDATE version = version + 1",
+        (f"notificaciones:{usuario_id}",),
+    )
+    conn.commit()
+    cursor.close()
+    return notificacion_id
+
+
+def metricas_servidor(url: str):
+    try:
+        with urllib.request.urlopen(f"{url}/debug/metrics", timeout=5) as resp:
+            return json.loads(resp.read()).get("sse")
+    except Exception:
+        return None
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[max(0, int(len(ordenados) * p) - 1)]
+
+
+async def ejecutar(args, conn):
+    destino = urllib.parse.urlparse(args.url)
+    host, port = destino.hostname, destino.port or 80
+    usuarios = list(range(args.usuario_inicial, args.usuario_inicial + args.usuarios))
+    estado = Estado()
+
+    t0 = time.perf_counter()
+    tareas = []
+    for i in range(args.suscriptores):
+        tareas.append(asyncio.create_task(suscriptor(host, port, usuarios[i % len(usuarios)], estado)))
+        if i % 200 == 199:
+            await asyncio.sleep(0.05)  # no saturar el backlog del servidor
+    while estado.aceptados + estado.rechazados + estado.errores < args.suscriptores and time.perf_counter() - t0 < 60:
+        await asyncio.sleep(0.1)
+    print(f"[INFO] {estado.aceptados} streams aceptados, {estado.rechazados} rechazados (503), "
+          f"{estado.errores} errores en {time.perf_counter() - t0:.1f}s")
+
+    print(f"[INFO] Inactividad durante {args.inactividad}s...")
+    await asyncio.sleep(args.inactividad)
+    print(f"[INFO] Streams abiertos tras la inactividad: {estado.abiertos}")
+    print(f"[INFO] Hub tras la inactividad: {metricas_servidor(args.url)}")
+
+    pestanas = {u: sum(1 for i in range(args.suscriptores) if usuarios[i % len(usuarios)] == u) for u in usuarios}
+    latencias, perdidas, ids = [], 0, []
+    for u in random.sample(usuarios, min(args.notificaciones, len(usuarios))):
+        previos = len(estado.recibidos.get(u, []))
+        ids.append(insertar_notificacion(conn, u))
+        t_commit = time.perf_counter()
+        while len(estado.recibidos.get(u, [])) - previos < pestanas[u] and time.perf_counter() - t_commit < args.espera:
+            await asyncio.sleep(0.01)
+        nuevos = estado.recibidos.get(u, [])[previos:]
+        latencias.extend((t - t_commit) * 1000 for t in nuevos)
+        perdidas += max(0, pestanas[u] - len(nuevos))
+
+    if latencias:
+        print(f"[INFO] Entrega: {len(latencias)} eventos, p50={statistics.median(latencias):.0f}ms "
+              f"p95={percentil(latencias, 0.95):.0f}ms max={max(latencias):.0f}ms, sin recibir={perdidas}")
+    else:
+        print(f"[INFO] Ningún evento recibido (sin recibir={perdidas})")
+    print(f"[INFO] Hub al final: {metricas_servidor(args.url)}")
+
+    for tarea in tareas:
+        tarea.cancel()
+    await asyncio.gather(*tareas, return_exceptions=True)
+    return ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrencia y latencia del stream SSE de notificaciones")
+    parser.add_argument("--env-file", dest="env_file", default=None, help="Ruta a archivo .env a cargar")
+    parser.add_argument("--host", dest="host", default=None)
+    parser.add_argument("--user", dest="user", default=None)
+    parser.add_argument("--password", dest="password", default=None)
+    parser.add_argument("--database", dest="database", default=None)
+    parser.add_argument("--port", dest="port", default=None)
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Backend en marcha")
+    parser.add_argument("--suscriptores", type=int, default=2000)
+    parser.add_argument("--usuarios", type=int, default=200, help="Usuarios entre los que se reparten los streams")
+    parser.add_argument("--usuario-inicial", dest="usuario_inicial", type=int, default=1)
+    parser.add_argument("--inactividad", type=int, default=60, help="Segundos con los streams abiertos sin eventos")
+    parser.add_argument("--notificaciones", type=int, default=20, help="Usuarios que reciben una notificación")
+    parser.add_argument("--espera", type=float, default=5.0, help="Segundos máximos de espera por entrega")
+    args = parser.parse_args()
+
+    load_env(args.env_file)
+    cfg = resolve_config(args)
+    print("[INFO] Conectando:", {k: ("****" if k == "password" else v) for k, v in cfg.items()})
+    conn = connect_mysql(**cfg)
+
+    ids = []
+    try:
+        ids = asyncio.run(ejecutar(args, conn))
+    finally:
+        if ids:
+            cursor = conn.cursor()
+            cursor.execute(f"DELETE FROM notificaciones WHERE id IN ({', '.join(['%s'] * len(ids))})", ids)
+            conn.commit()
+            cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Validación de existencia de usuario al crear una tarea: escaneo completo vs. clave primaria.
+
+Crea una tabla temporal `bench_usuarios` (misma forma que `usuarios`) con N usuarios
+sintéticos y mide, por validación:
+
+- antes:   SELECT * FROM ... + búsqueda lineal en Python (lo que hacía obtener_usuarios())
+- pk:      SELECT id FROM ... WHERE id IN (...) (usuarios_existentes() sin caché)
+- cache:   lo mismo con el diccionario en memoria delante (aciertos de caché)
+
+La tabla se elimina al terminar salvo --conservar.
+
+Uso:
+  python scripts/bench_usuarios_existencia.py --env-file backend/env.local --usuarios 100000
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from apply_indexes import connect_mysql, load_env, resolve_config
+
+TABLA = "bench_usuarios"
+
+
+def crear_tabla(conn, n: int):
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS {TABLA}")
+    cursor.execute(f"""
+        CREATE TABLE {TABLA} (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            nombre VARCHAR(100) NOT NULL,
+            apellido VARCHAR(100) NOT NULL,
+            correo VARCHAR(150) NOT NULL UNIQUE,
+            contrasena VARCHAR(255) NOT NULL,
+            telefono VARCHAR(20) NULL
+        ) ENGINE=InnoDB
+    """)
+    hash_falso = "$2b$12$" + "x" * 53
+    lote = []
+    for i in range(1, n + 1):
+        lote.append((f"Nombre{i}", f"Apellido{i}", f"bench{i}@example.com", hash_falso, None))
+        if len(lote) == 5000:
+            cursor.executemany(f"INSERT INTO {TABLA} (nombre, apellido, correo, contrasena, telefono) VALUES (%s, %s, %s, %s, %s)", lote)
+            lote = []
+    if lote:
+        cursor.executemany(f"INSERT INTO {TABLA} (nombre, apellido, correo, contrasena, telefono) VALUES (%s, %s, %s, %s, %s)", lote)
+    conn.commit()
+    cursor.close()
+
+
+def validar_antes(conn, usuario_id: int) -> bool:
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute(f"SELECT * FROM {TABLA}")
+    usuarios = cursor.fetchall()
+    cursor.close()
+    return any(str(u["id"]) == str(usuario_id) for u in usuarios)
+
+
+def validar_pk(conn, usuario_id: int) -> bool:
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT id FROM {TABLA} WHERE id IN (%s)", (usuario_id,))
+    existe = bool(cursor.fetchall())
+    cursor.close()
+    return existe
+
+
+def medir(nombre: str, validar, ids: list):
+    tiempos = []
+    for usuario_id in ids:
+        t0 = time.perf_counter()
+        validar(usuario_id)
+        tiempos.append((time.perf_counter() - t0) * 1000)
+    ordenados = sorted(tiempos)
+    p95 = ordenados[max(0, int(len(ordenados) * 0.95) - 1)]
+    print(f"{nombre:<7} media={statistics.mean(tiempos):.3f}ms p50={statistics.median(tiempos):.3f}ms p95={p95:.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Existencia de usuario: escaneo completo vs. clave primaria")
+    parser.add_argument("--env-file", dest="env_file", default=None, help="Ruta a archivo .env a cargar")
+    parser.add_argument("--host", dest="host", default=None)
+    parser.add_argument("--user", dest="user", default=None)
+    parser.add_argument("--password", dest="password", default=None)
+    parser.add_argument("--database", dest="database", default=None)
+    parser.add_argument("--port", dest="port", default=None)
+    parser.add_argument("--usuarios", type=int, default=100000)
+    parser.add_argument("--validaciones", type=int, default=20, help="Validaciones en modo 'antes' (es lento)")
+    parser.add_argument("--conservar", action="store_true", help="No borrar la tabla al terminar")
+    args = parser.parse_args()
+
+    load_env(args.env_file)
+    cfg = resolve_config(args)
+    print("[INFO] Conectando:", {k: ("****" if k == "password" else v) for k, v in cfg.items()})
+    conn = connect_mysql(**cfg)
+
+    try:
+        t0 = time.perf_counter()
+        crear_tabla(conn, args.usuarios)
+        print(f"[INFO] {args.usuarios} usuarios sintéticos en {time.perf_counter() - t0:.1f}s")
+
+        # Mitad existentes, mitad inexistentes (negativos)
+        ids = [random.randint(1, args.usuarios) if i % 2 else args.usuarios + i + 1 for i in range(args.validaciones)]
+        medir("antes", lambda u: validar_antes(conn, u), ids)
+        medir("pk", lambda u: validar_pk(conn, u), ids * 50)
+
+        cache = {}
+
+        def validar_cache(u):
+            if u not in cache:
+                cache[u] = validar_pk(conn, u)
+            return cache[u]
+
+        medir("cache", validar_cache, ids * 50)
+    finally:
+        if not args.conservar:
+            cursor = conn.cursor()
+            cursor.execute(f"DROP TABLE IF EXISTS {TABLA}")
+            cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
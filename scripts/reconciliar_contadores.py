@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Reconciliación de contadores_usuario / contadores_area / grupo_estadisticas contra
+las tablas tareas y miembros_grupo.
+
+La app mantiene los contadores con deltas en cada escritura; este job los recalcula
+por rangos de id, crea las filas que falten (datos anteriores a la migración), corrige
+la deriva (p. ej. borrados en cascada que no pasan por la app) y elimina filas de áreas
+o grupos borrados. Seguro de ejecutar con la app en marcha: bloquea las filas de contadores del
+rango antes de leer tareas, así un delta concurrente se aplica después sobre el valor
+ya corregido.
+
+Uso:
+  python scripts/reconciliar_contadores.py --env-file backend/env.production
+  python scripts/reconciliar_contadores.py --env-file backend/env.production --solo-informe
+"""
+
+import argparse
+import time
+
+from apply_indexes import connect_mysql, load_env, resolve_config
+
+SQL_USUARIOS = """
+    SELECT uid,
+           SUM(estado = 'pendiente'), SUM(estado = 'completada'), SUM(estado = 'vencida')
+    FROM (
+        SELECT usuario_id AS uid, estado FROM tareas
+        WHERE usuario_id BETWEEN %s AND %s AND estado IN ('pendiente', 'completada', 'vencida')
+        UNION ALL
+        SELECT asignado_a_id AS uid, estado FROM tareas
+        WHERE asignado_a_id BETWEEN %s AND %s AND estado IN ('pendiente', 'completada', 'vencida')
+    ) t
+    GROUP BY uid
+"""
+
+SQL_AREAS = """
+    SELECT area_id,
+           SUM(estado = 'pendiente'), SUM(estado = 'completada'), SUM(estado = 'vencida')
+    FROM tareas
+    WHERE area_id BETWEEN %s AND %s AND estado IN ('pendiente', 'completada', 'vencida')
+    GROUP BY area_id
+"""
+
+SQL_GRUPOS = """
+    SELECT g.id, COALESCE(t.p, 0), COALESCE(t.c, 0), COALESCE(t.v, 0), COALESCE(m.n, 0)
+    FROM grupos g
+    LEFT JOIN (
+        SELECT grupo_id, SUM(estado = 'pendiente') AS p, SUM(estado = 'completada') AS c, SUM(estado = 'vencida') AS v
+        FROM tareas
+        WHERE grupo_id BETWEEN %s AND %s AND estado IN ('pendiente', 'completada', 'vencida')
+        GROUP BY grupo_id
+    ) t ON t.grupo_id = g.id
+    LEFT JOIN (
+        SELECT grupo_id, COUNT(*) AS n FROM miembros_grupo WHERE grupo_id BETWEEN %s AND %s GROUP BY grupo_id
+    ) m ON m.grupo_id = g.id
+    WHERE g.id BETWEEN %s AND %s
+"""
+
+COLUMNAS_TAREAS = ("pendientes", "completadas", "vencidas")
+
+# (tabla de contadores, columna, tabla de entidades, consulta de agregación, columnas)
+OBJETIVOS = (
+    ("contadores_usuario", "usuario_id", "usuarios", SQL_USUARIOS, COLUMNAS_TAREAS),
+    ("contadores_area", "area_id", "areas", SQL_AREAS, COLUMNAS_TAREAS),
+    ("grupo_estadisticas", "grupo_id", "grupos", SQL_GRUPOS, COLUMNAS_TAREAS + ("miembros",)),
+)
+
+
+def reconciliar_rango(conn, tabla, columna, entidades, sql, columnas, desde, hasta, solo_informe):
+    cursor = conn.cursor()
+    try:
+        # Primero bloquear los contadores del rango; con READ COMMITTED la lectura de tareas
+        # posterior ve todo lo confirmado antes de obtener los bloqueos
+        cursor.execute(
+            f"SELECT {columna}, {', '.join(columnas)} FROM {tabla} "
+            f"WHERE {columna} BETWEEN %s AND %s FOR UPDATE",
+            (desde, hasta),
+        )
+        actuales = {fila[0]: tuple(fila[1:]) for fila in cursor.fetchall()}
+        cursor.execute(f"SELECT id FROM {entidades} WHERE id BETWEEN %s AND %s", (desde, hasta))
+        ids = [fila[0] for fila in cursor.fetchall()]
+        cursor.execute(sql, (desde, hasta) * (sql.count("%s") // 2))
+        esperados = {fila[0]: tuple(int(v or 0) for v in fila[1:]) for fila in cursor.fetchall()}
+
+        corregir = []
+        for id_ in ids:
+            esperado = esperados.get(id_, (0,) * len(columnas))
+            if actuales.get(id_) != esperado:
+                corregir.append((id_, *esperado))
+        existentes = set(ids)
+        huerfanos = [id_ for id_ in actuales if id_ not in existentes]
+        faltantes = sum(1 for fila in corregir if fila[0] not in actuales)
+
+        if not solo_informe:
+            if corregir:
+                fila_sql = "(" + ", ".join(["%s"] * (len(columnas) + 1)) + ")"
+                valores = ", ".join([fila_sql] * len(corregir))
+                cursor.execute(
+                    f"INSERT INTO {tabla} ({columna}, {', '.join(columnas)}) VALUES {valores} "
+                    "ON DUPLICATE KEY UPDATE " + ", ".join(f"{c} = VALUES({c})" for c in columnas),
+                    [v for fila in corregir for v in fila],
+                )
+            if huerfanos:
+                marcadores = ", ".join(["%s"] * len(huerfanos))
+                cursor.execute(f"DELETE FROM {tabla} WHERE {columna} IN ({marcadores})", huerfanos)
+            conn.commit()
+        else:
+            conn.rollback()
+        return len(ids), faltantes, len(corregir) - faltantes, len(huerfanos)
+    finally:
+        cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcilia contadores materializados de tareas")
+    parser.add_argument("--env-file", dest="env_file", default=None, help="Ruta a archivo .env a cargar")
+    parser.add_argument("--host", dest="host", default=None)
+    parser.add_argument("--user", dest="user", default=None)
+    parser.add_argument("--password", dest="password", default=None)
+    parser.add_argument("--database", dest="database", default=None)
+    parser.add_argument("--port", dest="port", default=None)
+    parser.add_argument("--lote", type=int, default=1000, help="Ids por transacción")
+    parser.add_argument("--solo-informe", dest="solo_informe", action="store_true", help="Informar la deriva sin corregirla")
+    args = parser.parse_args()
+
+    load_env(args.env_file)
+    cfg = resolve_config(args)
+    print("[INFO] Conectando:", {k: ("****" if k == "password" else v) for k, v in cfg.items()})
+    conn = connect_mysql(**cfg)
+    cursor = conn.cursor()
+    cursor.execute("SET SESSION TRANSACTION ISOLATION LEVEL READ COMMITTED")
+    cursor.close()
+
+    try:
+        for tabla, columna, entidades, sql, columnas in OBJETIVOS:
+            t0 = time.perf_counter()
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {entidades}")
+            maximo = cursor.fetchone()[0]
+            cursor.execute(f"SELECT COALESCE(MAX({columna}), 0) FROM {tabla}")
+            maximo = max(maximo, cursor.fetchone()[0])
+            cursor.close()
+            conn.rollback()
+
+            totales = [0, 0, 0, 0]
+            for desde in range(1, maximo + 1, args.lote):
+                resultado = reconciliar_rango(conn, tabla, columna, entidades, sql, columnas, desde, desde + args.lote - 1, args.solo_informe)
+                totales = [a + b for a, b in zip(totales, resultado)]
+            revisados, faltantes, deriva, huerfanos = totales
+            accion = "detectadas" if args.solo_informe else "corregidas"
+            print(f"[INFO] {tabla}: {revisados} filas revisadas, {faltantes} faltantes, {deriva} con deriva, "
+                  f"{huerfanos} huérfanas ({accion}) en {time.perf_counter() - t0:.1f}s")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
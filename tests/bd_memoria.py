@@ -0,0 +1,119 @@
+"""
+Dobles en memoria de MySQL para los tests del backend.
+
+BaseDatos hace de "otro worker": inserta notificaciones y sube su versión en la misma
+transacción. Conexion y Versiones sustituyen a las conexiones del pool (_checkout_pool) y al
+almacén de versiones (_versiones); Cursor responde solo a las consultas que usan el hub SSE y
+la ruta del stream, y falla con cualquier otra.
+"""
+
+import os
+import sys
+import threading
+from datetime import datetime
+
+os.environ.setdefault('VENCIDAS_BARRIDO_INTERVALO', '0')
+os.environ.setdefault('SSE_SONDEO_MS', '50')
+os.environ.setdefault('SSE_MAX_SUSCRIPTORES', '2000')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+import app as astren  # noqa: E402
+
+
+class BaseDatos:
+    """Notificaciones y versiones compartidas por todos los 'workers' del test."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.no_leidas = {}
+        self.notificaciones = {}
+        self.versiones = {}
+        self.consultas_contador = 0
+        self.consultas_nuevas = 0
+        self.lecturas_versiones = 0
+
+    def insertar(self, usuario_id, notificacion_id):
+        # Lo que hace otro worker: fila nueva y versión subida en la misma transacción
+        with self.lock:
+            self.notificaciones.setdefault(usuario_id, []).append({
+                'id': notificacion_id, 'tipo': 'tarea_asignada', 'titulo': 'Nueva tarea',
+                'mensaje': 'Te han asignado una tarea', 'datos_adicionales': '{"tarea_id": 1}',
+                'leida': False, 'fecha_creacion': datetime(2026, 1, 1),
+            })
+            self.no_leidas[usuario_id] = self.no_leidas.get(usuario_id, 0) + 1
+            clave = astren.clave_notificaciones(usuario_id)
+            self.versiones[clave] = self.versiones.get(clave, 0) + 1
+
+
+class Versiones:
+    transaccional = True
+
+    def __init__(self, db):
+        self.db = db
+
+    def obtener(self, claves):
+        with self.db.lock:
+            self.db.lecturas_versiones += 1
+            return {clave: self.db.versiones.get(clave, 0) for clave in claves}
+
+    def incrementar(self, claves, conn):
+        raise AssertionError('el hub no escribe versiones')
+
+
+class Cursor:
+    def __init__(self, db):
+        self.db = db
+        self.filas = []
+
+    def execute(self, sql, params=None):
+        sql = ' '.join(sql.split())
+        with self.db.lock:
+            if sql.startswith('SELECT usuario_id, COUNT(*) AS n FROM notificaciones'):
+                self.db.consultas_contador += 1
+                self.filas = [{'usuario_id': u, 'n': self.db.no_leidas[u]} for u in params if self.db.no_leidas.get(u)]
+            elif '(usuario_id = %s AND id > %s)' in sql:
+                self.db.consultas_nuevas += 1
+                rangos = dict(zip(params[::2], params[1::2]))
+                self.filas = [dict(n, usuario_id=u) for u, ultimo_id in sorted(rangos.items())
+                              for n in self.db.notificaciones.get(u, []) if n['id'] > ultimo_id]
+            elif sql.startswith('SELECT COUNT(*) FROM notificaciones WHERE usuario_id = %s'):
+                # Estado inicial de la ruta del stream (cursor de tuplas)
+                self.filas = [(self.db.no_leidas.get(params[0], 0),)]
+            elif sql.startswith('SELECT COALESCE(MAX(id), 0) FROM notificaciones'):
+                self.filas = [(max((n['id'] for n in self.db.notificaciones.get(params[0], [])), default=0),)]
+            else:
+                raise AssertionError(f'consulta inesperada: {sql}')
+
+    def fetchone(self):
+        return self.filas[0] if self.filas else None
+
+    def fetchall(self):
+        return list(self.filas)
+
+    def close(self):
+        pass
+
+
+class Conexion:
+    in_transaction = False
+
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self, *args, **kwargs):
+        return Cursor(self.db)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
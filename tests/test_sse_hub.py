@@ -0,0 +1,144 @@
+"""
+Hub SSE de notificaciones (_HubNotificaciones) con muchos suscriptores inactivos.
+
+Sin MySQL: las conexiones del pool y el almacén de versiones se sustituyen por dobles en
+memoria que hacen de "otro worker" (insertan la notificación y suben la versión). Comprueba
+que los suscriptores inactivos no reciben nada, que un cambio llega a todas las pestañas del
+usuario y solo a ellas, con qué latencia, y que el trabajo por sondeo no crece con las pestañas.
+
+Uso (desde la raíz del repositorio):
+  python -m unittest discover tests
+"""
+
+import time
+import unittest
+from datetime import datetime
+
+from bd_memoria import BaseDatos, Conexion, Versiones, astren
+
+USUARIOS = 50
+PESTANAS = 20
+LATENCIA_MAX_S = 1.0
+
+
+class HubNotificacionesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db = BaseDatos()
+        self._checkout_original = astren._checkout_pool
+        self._versiones_original = astren._versiones
+        astren._checkout_pool = lambda *args, **kwargs: Conexion(self.db)
+        astren._versiones = Versiones(self.db)
+        self.hub = astren._HubNotificaciones()
+        self.pestanas = {}
+        for usuario_id in range(1, USUARIOS + 1):
+            self.pestanas[usuario_id] = [self.hub.suscribir(usuario_id) for _ in range(PESTANAS)]
+            self.hub.estado_inicial(usuario_id, 0, 0)
+
+    def tearDown(self):
+        self.hub.detener()
+        if self.hub._hilo is not None:
+            self.hub._hilo.join(2)
+        astren._checkout_pool = self._checkout_original
+        astren._versiones = self._versiones_original
+
+    def _esperar_sondeos(self, n):
+        limite = time.monotonic() + 5
+        inicial = self.hub.metricas()['sondeos']
+        while self.hub.metricas()['sondeos'] < inicial + n:
+            self.assertLess(time.monotonic(), limite, 'el hub no sondea')
+            time.sleep(0.01)
+
+    def _pendientes(self, usuario_id):
+        return sum(sub.cola.qsize() for sub in self.pestanas[usuario_id])
+
+    def test_suscriptores_inactivos_no_reciben_nada(self):
+        self.assertEqual(self.hub.metricas()['suscriptores'], USUARIOS * PESTANAS)
+        self._esperar_sondeos(5)
+        self.assertEqual(sum(self._pendientes(u) for u in self.pestanas), 0)
+        self.assertEqual(self.hub.metricas()['errores'], 0)
+
+    def test_cambio_de_otro_worker_llega_a_todas_las_pestanas(self):
+        self._esperar_sondeos(2)
+        contador_previo = self.db.consultas_contador
+        lecturas_previas = self.db.lecturas_versiones
+        sondeos_previos = self.hub.metricas()['sondeos']
+
+        inicio = time.monotonic()
+        self.db.insertar(7, 101)
+        recibidos = []
+        for sub in self.pestanas[7]:
+            evento = sub.cola.get(timeout=LATENCIA_MAX_S)
+            recibidos.append((time.monotonic() - inicio, evento))
+        latencia_max = max(t for t, _ in recibidos)
+
+        self.assertLess(latencia_max, LATENCIA_MAX_S)
+        for _, evento in recibidos:
+            self.assertIn('event: notificacion', evento)
+            self.assertIn('id: 101', evento)
+        for sub in self.pestanas[7]:
+            self.assertIn('"count":1', sub.cola.get(timeout=LATENCIA_MAX_S))
+        self.assertEqual(self._pendientes(7), 0)
+        self.assertEqual(sum(self._pendientes(u) for u in self.pestanas if u != 7), 0)
+
+        # Una consulta de contador por despacho, no una por pestaña, y una lectura de versiones por sondeo
+        self.assertEqual(self.db.consultas_contador - contador_previo, 1)
+        sondeos = self.hub.metricas()['sondeos'] - sondeos_previos
+        self.assertLessEqual(self.db.lecturas_versiones - lecturas_previas, sondeos + 1)
+
+    def test_cambios_de_varios_usuarios_en_un_despacho(self):
+        # El primer sondeo despacha a los 50 usuarios: dos consultas, no dos por usuario
+        self._esperar_sondeos(2)
+        self.assertEqual(self.db.consultas_contador, 1)
+        self.assertEqual(self.db.consultas_nuevas, 1)
+        previas = self.db.consultas_contador
+        for usuario_id in (2, 4, 6):
+            self.db.insertar(usuario_id, 200 + usuario_id)
+        for usuario_id in (2, 4, 6):
+            self.assertIn(f'id: {200 + usuario_id}', self.pestanas[usuario_id][0].cola.get(timeout=LATENCIA_MAX_S))
+        self.assertLessEqual(self.db.consultas_contador - previas, 3)
+
+    def test_pestana_nueva_recibe_lo_despachado_mientras_lee_su_estado(self):
+        self._esperar_sondeos(1)
+        # Alta de una pestaña más del usuario 5; antes de que lea su estado inicial llega una notificación
+        nueva = self.hub.suscribir(5)
+        self.db.insertar(5, 77)
+        self.assertIn('id: 77', nueva.cola.get(timeout=LATENCIA_MAX_S))
+        self.hub.estado_inicial(5, 1, 77)
+        self.assertIn('"count":1', nueva.cola.get(timeout=LATENCIA_MAX_S))
+
+    def test_usuario_nuevo_espera_a_su_estado_inicial(self):
+        self._esperar_sondeos(1)
+        sub = self.hub.suscribir(500)
+        self.db.insertar(500, 9)
+        self._esperar_sondeos(3)
+        self.assertEqual(sub.cola.qsize(), 0)
+        # Estado leído después de la notificación 9: no se repite; la siguiente sí llega
+        self.hub.estado_inicial(500, 1, 9)
+        self.db.insertar(500, 10)
+        self.assertIn('id: 10', sub.cola.get(timeout=LATENCIA_MAX_S))
+        self.assertIn('"count":2', sub.cola.get(timeout=LATENCIA_MAX_S))
+        self.assertEqual(sub.cola.qsize(), 0)
+
+    def test_cambio_confirmado_tarde_no_se_pierde(self):
+        # Sin ventana de tiempo: un commit que se hace visible muchos sondeos después se detecta igual
+        self._esperar_sondeos(10)
+        self.db.insertar(3, 55)
+        evento = self.pestanas[3][0].cola.get(timeout=LATENCIA_MAX_S)
+        self.assertIn('id: 55', evento)
+
+    def test_escritura_local_se_despacha_sin_esperar_al_sondeo(self):
+        self._esperar_sondeos(1)
+        with self.db.lock:
+            self.db.notificaciones[9] = [{'id': 7, 'tipo': 'x', 'titulo': 't', 'mensaje': 'm',
+                                          'datos_adicionales': None, 'leida': False,
+                                          'fecha_creacion': datetime(2026, 1, 1)}]
+            self.db.no_leidas[9] = 1
+        # El oyente de invalidación de este worker marca al usuario tras el commit
+        self.hub.marcar([9])
+        for sub in self.pestanas[9]:
+            self.assertIn('event: notificacion', sub.cola.get(timeout=LATENCIA_MAX_S))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+"""
+/notificaciones/<id>/stream con miles de conexiones reales abiertas a la vez.
+
+Levanta la app en un servidor WSGI con un hilo por conexión (como el worker gthread de
+gunicorn) en 127.0.0.1 y abre un socket TCP por pestaña. MySQL y el almacén de versiones son
+los dobles de bd_memoria. Comprueba que todas las pestañas reciben su contador inicial, que
+pasado SSE_MAX_SUSCRIPTORES el worker responde 503, y que una notificación de otro worker
+llega a todas las pestañas de su usuario (y a ninguna más) en menos de un segundo.
+
+Uso (desde la raíz del repositorio):
+  python -m unittest discover tests
+"""
+
+import resource
+import selectors
+import socket
+import threading
+import time
+import unittest
+
+from werkzeug.serving import make_server
+
+from bd_memoria import BaseDatos, Conexion, Versiones, astren
+
+CONEXIONES = 2000
+USUARIOS = 100
+LATENCIA_MAX_S = 1.0
+
+
+def _abrir_stream(puerto, usuario_id):
+    sock = socket.create_connection(('127.0.0.1', puerto), timeout=5)
+    sock.sendall(f'GET /notificaciones/{usuario_id}/stream HTTP/1.0\r\nHost: localhost\r\n\r\n'.encode())
+    return sock
+
+
+def _leer_hasta(sock, buffer, marca):
+    while marca not in buffer:
+        datos = sock.recv(4096)
+        if not datos:
+            raise AssertionError(f'conexión cerrada esperando {marca!r}: {buffer!r}')
+        buffer += datos
+    return buffer
+
+
+def _leer_cabeceras(sock):
+    """Línea de estado y resto del buffer tras las cabeceras."""
+    buffer = _leer_hasta(sock, b'', b'\r\n\r\n')
+    cabeceras, resto = buffer.split(b'\r\n\r\n', 1)
+    return cabeceras.split(b'\r\n', 1)[0].decode(), resto
+
+
+@unittest.skipIf(resource.getrlimit(resource.RLIMIT_NOFILE)[0] < 2 * CONEXIONES + 100,
+                 'límite de descriptores insuficiente para abrir las conexiones')
+class StreamNotificacionesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db = BaseDatos()
+        self._originales = (astren._checkout_pool, astren._versiones,
+                            astren._hub_notificaciones, astren._SSE_MAX_SUSCRIPTORES)
+        astren._checkout_pool = lambda *args, **kwargs: Conexion(self.db)
+        astren._versiones = Versiones(self.db)
+        astren._hub_notificaciones = astren._HubNotificaciones()
+        astren._SSE_MAX_SUSCRIPTORES = CONEXIONES
+        self.servidor = make_server('127.0.0.1', 0, astren.app, threaded=True)
+        self.servidor.request_queue_size = 1024
+        self.hilo = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+        self.hilo.start()
+        self.puerto = self.servidor.server_port
+        self.sockets = []
+
+    def tearDown(self):
+        # Al detener el hub los streams terminan y sus hilos cierran las conexiones
+        astren._hub_notificaciones.detener()
+        for sock, _ in self.sockets:
+            sock.close()
+        self.servidor.shutdown()
+        self.servidor.server_close()
+        (astren._checkout_pool, astren._versiones,
+         astren._hub_notificaciones, astren._SSE_MAX_SUSCRIPTORES) = self._originales
+
+    def _abrir_pestanas(self):
+        for i in range(CONEXIONES):
+            usuario_id = i % USUARIOS + 1
+            sock = _abrir_stream(self.puerto, usuario_id)
+            estado, resto = _leer_cabeceras(sock)
+            self.assertIn(' 200 ', estado)
+            # Cuerpo en chunks (HTTP/1.1): se lee hasta el fin del chunk del contador
+            inicial = _leer_hasta(sock, resto, b'}\n\n\r\n')
+            self.assertIn(b'retry: 3000', inicial)
+            self.assertIn(b'event: contador', inicial)
+            self.assertIn(b'"count":0', inicial)
+            self.sockets.append((sock, usuario_id))
+
+    def test_miles_de_pestanas_inactivas_y_una_notificacion(self):
+        self._abrir_pestanas()
+        self.assertEqual(astren.metricas_sse()['suscriptores'], CONEXIONES)
+
+        # Pasado el límite del worker: 503 y el frontend vuelve al sondeo
+        extra = _abrir_stream(self.puerto, 1)
+        estado, _ = _leer_cabeceras(extra)
+        extra.close()
+        self.assertIn(' 503 ', estado)
+
+        selector = selectors.DefaultSelector()
+        for sock, usuario_id in self.sockets:
+            sock.setblocking(False)
+            selector.register(sock, selectors.EVENT_READ, usuario_id)
+        try:
+            inicio = time.monotonic()
+            self.db.insertar(7, 101)
+            buffers = {}
+            limite = inicio + LATENCIA_MAX_S
+            while time.monotonic() < limite:
+                for clave, _ in selector.select(timeout=0.05):
+                    self.assertEqual(clave.data, 7, 'una pestaña de otro usuario recibió datos')
+                    buffers[clave.fileobj] = buffers.get(clave.fileobj, b'') + clave.fileobj.recv(65536)
+                completas = [b for b in buffers.values() if b'event: contador' in b]
+                if len(completas) == CONEXIONES // USUARIOS:
+                    break
+            latencia = time.monotonic() - inicio
+            # Un poco más para ver que nada llega a las pestañas del resto de usuarios
+            for clave, _ in selector.select(timeout=0.2):
+                self.assertEqual(clave.data, 7, 'una pestaña de otro usuario recibió datos')
+        finally:
+            selector.close()
+
+        self.assertLess(latencia, LATENCIA_MAX_S)
+        self.assertEqual(len(buffers), CONEXIONES // USUARIOS)
+        for buffer in buffers.values():
+            self.assertIn(b'event: notificacion', buffer)
+            self.assertIn(b'id: 101', buffer)
+            self.assertIn(b'"count":1', buffer)
+
+
+if __name__ == '__main__':
+    unittest.main()